@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""Normalised author ids with paper and co-author inverted indexes.
+
+Dossiers store authors as raw display strings ("Richard Boyle",
+"Boyle, R.", "Sébastien Déjean"), so an author page would have to scan the
+whole corpus. This stage reads every dossier once and maintains:
+
+``authors``
+    Stable id -> display name, spelling variants, papers, and co-author
+    counts. Ids are derived from the normalised name, so they do not depend on
+    the order papers were ingested in.
+``papers``
+    Dossier id -> author ids plus a hash of the raw author list.
+``aliases``
+    Normalised name key -> author id, so initial-only spellings ("R Boyle")
+    keep resolving to the full-name author they were merged into.
+
+Names are normalised by stripping diacritics and case, reordering
+"Family, Given" forms, recognising PubMed-style "Family GH" initials and
+dropping generational suffixes. An initial-only name is merged into the single
+known author with the same family name and initial; if that is ambiguous it
+gets its own id. An initial-only author registered before its full-name
+counterpart appeared is merged into it on the later update, so incremental
+updates end up with the same authors as a rebuild. (A spelling that was
+already merged stays merged if a second candidate appears later.)
+
+The index is one gzip-compressed JSON file. Rebuilding is incremental: papers
+whose author list is unchanged are skipped, changed papers have their old
+contributions removed before the new ones are added, and papers that no longer
+exist are dropped. Lookups and co-author lists are plain dictionary reads:
+
+    python scripts/author_index.py build --json-dir data/papers
+    python scripts/author_index.py lookup "Boyle R"
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from corpus_export import iter_dossiers
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = Path("data/authors.json.gz")
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+PARTICLES = {"da", "de", "del", "della", "der", "di", "dos", "du", "la", "le", "van", "von", "st"}
+_INITIALS = re.compile(r"^[A-Z]{1,3}$")
+_SEPARATORS = re.compile(r"[\s.,]+")
+
+
+@dataclass(frozen=True)
+class AuthorName:
+    family: str
+    given: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        """``family|first given name (or initial)``, the unit author ids are derived from."""
+
+        return f"{self.family}|{self.given[0] if self.given else ''}"
+
+    @property
+    def initial_key(self) -> str:
+        return f"{self.family}|{self.given[0][:1] if self.given else ''}"
+
+    @property
+    def initial_only(self) -> bool:
+        return not self.given or len(self.given[0]) == 1
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def normalize_name(raw: str) -> Optional[AuthorName]:
+    """Parse a display name into folded family name and given names/initials."""
+
+    text = " ".join(raw.replace("\u00a0", " ").split())
+    if not text:
+        return None
+    if "," in text:
+        family_part, _, given_part = text.partition(",")
+        family_tokens = family_part.split()
+        given_tokens = _SEPARATORS.split(given_part.strip())
+    else:
+        tokens = [token for token in _SEPARATORS.split(text) if token]
+        while len(tokens) > 2 and _fold(tokens[-1]) in SUFFIXES:
+            tokens.pop()
+        if len(tokens) >= 2 and _INITIALS.match(tokens[-1]) and not _INITIALS.match(tokens[0]):
+            # PubMed style: "Boyle RA".
+            family_tokens, given_tokens = tokens[:-1], list(tokens[-1])
+        else:
+            split = len(tokens) - 1
+            while split > 1 and _fold(tokens[split - 1]) in PARTICLES:
+                split -= 1
+            family_tokens, given_tokens = tokens[split:], tokens[:split]
+
+    family_tokens = [token for token in family_tokens if _fold(token) not in SUFFIXES]
+    family = " ".join(_fold(token) for token in family_tokens)
+    given: List[str] = []
+    for token in given_tokens:
+        token = token.strip("-")
+        if not token or _fold(token) in SUFFIXES:
+            continue
+        if _INITIALS.match(token) and len(token) > 1 and token.isupper():
+            given.extend(_fold(char) for char in token)
+        else:
+            given.append(_fold(token).replace("-", ""))
+    if not family:
+        return None
+    return AuthorName(family, tuple(given))
+
+
+def author_id(key: str) -> str:
+    return "au_" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _authors_hash(authors: List[str]) -> str:
+    return hashlib.sha1("\x1f".join(authors).encode("utf-8")).hexdigest()[:16]
+
+
+class AuthorIndex:
+    """In-memory author index backed by a gzip JSON file."""
+
+    def __init__(self) -> None:
+        self.authors: Dict[str, Dict[str, object]] = {}
+        self.papers: Dict[str, Dict[str, object]] = {}
+        self.aliases: Dict[str, str] = {}
+        # initial key -> full-name author ids, for merging "R Boyle" spellings.
+        self._by_initial: Dict[str, set] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "AuthorIndex":
+        index = cls()
+        if not path.exists():
+            return index
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") != INDEX_VERSION:
+            logger.warning("%s has index version %r; rebuilding from scratch", path, payload.get("version"))
+            return index
+        index.authors = payload["authors"]
+        index.papers = payload["papers"]
+        index.aliases = payload["aliases"]
+        for key, identifier in index.aliases.items():
+            family, _, given = key.partition("|")
+            if len(given) > 1:
+                index._by_initial.setdefault(f"{family}|{given[0]}", set()).add(identifier)
+        return index
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "version": INDEX_VERSION,
+            "authors": self.authors,
+            "papers": self.papers,
+            "aliases": self.aliases,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(path.suffix + ".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        temporary.replace(path)
+
+    def resolve(self, raw: str, create: bool = False) -> Optional[str]:
+        """Author id for a raw name; with ``create`` a new author is registered."""
+
+        name = normalize_name(raw)
+        if name is None:
+            return None
+        if name.key in self.aliases:
+            return self.aliases[name.key]
+        if name.initial_only:
+            candidates = self._by_initial.get(name.initial_key, set())
+            if len(candidates) == 1:
+                identifier = next(iter(candidates))
+                if create:
+                    self.aliases[name.key] = identifier
+                return identifier
+        if not create:
+            return None
+        identifier = author_id(name.key)
+        self.aliases[name.key] = identifier
+        self.authors.setdefault(identifier, {"name": raw, "variants": [], "papers": [], "coauthors": {}})
+        if not name.initial_only:
+            candidates = self._by_initial.setdefault(name.initial_key, set())
+            candidates.add(identifier)
+            # An earlier update may have given "R Boyle" its own id because no
+            # "Richard Boyle" was known yet; fold it in as a rebuild would.
+            standalone = self.aliases.get(name.initial_key)
+            if len(candidates) == 1 and standalone is not None and standalone != identifier and standalone in self.authors:
+                self._merge_author(standalone, identifier)
+        return identifier
+
+    def _merge_author(self, source: str, target: str) -> None:
+        """Fold the initial-only author ``source`` into the full-name author ``target``."""
+
+        merged = self.authors.pop(source)
+        author = self.authors[target]
+        for key, identifier in self.aliases.items():
+            if identifier == source:
+                self.aliases[key] = target
+        for spelling in (merged["name"], *merged["variants"]):
+            if spelling != author["name"] and spelling not in author["variants"]:
+                author["variants"].append(spelling)
+        for paper_id in merged["papers"]:
+            members = self.papers[paper_id]["authors"]
+            position = members.index(source)
+            if target in members:
+                del members[position]
+            else:
+                members[position] = target
+                author["papers"].append(paper_id)
+        author["papers"].sort()
+        for identifier in {target, *merged["coauthors"]}:
+            counts: Dict[str, int] = {}
+            for paper_id in self.authors[identifier]["papers"]:
+                for other in self.papers[paper_id]["authors"]:
+                    if other != identifier:
+                        counts[other] = counts.get(other, 0) + 1
+            self.authors[identifier]["coauthors"] = counts
+        logger.debug("Merged %s (%s) into %s (%s)", source, merged["name"], target, author["name"])
+
+    def _remove_paper(self, paper_id: str) -> None:
+        entry = self.papers.pop(paper_id, None)
+        if not entry:
+            return
+        members = entry["authors"]
+        for identifier in members:
+            author = self.authors.get(identifier)
+            if not author:
+                continue
+            if paper_id in author["papers"]:
+                author["papers"].remove(paper_id)
+            coauthors = author["coauthors"]
+            for other in members:
+                if other != identifier and other in coauthors:
+                    coauthors[other] -= 1
+                    if coauthors[other] <= 0:
+                        del coauthors[other]
+        for identifier in members:
+            author = self.authors.get(identifier)
+            if author is not None and not author["papers"]:
+                del self.authors[identifier]
+                for key in [key for key, value in self.aliases.items() if value == identifier]:
+                    del self.aliases[key]
+                for members_of_key in self._by_initial.values():
+                    members_of_key.discard(identifier)
+
+    def _add_paper(self, paper_id: str, raw_authors: List[str]) -> None:
+        members: List[str] = []
+        for raw in raw_authors:
+            identifier = self.resolve(raw, create=True)
+            if identifier is None or identifier in members:
+                continue
+            members.append(identifier)
+            author = self.authors[identifier]
+            if raw != author["name"] and raw not in author["variants"]:
+                author["variants"].append(raw)
+                # Prefer the most complete spelling for display.
+                if len(raw) > len(author["name"]):
+                    author["variants"].remove(raw)
+                    author["variants"].append(author["name"])
+                    author["name"] = raw
+            author["papers"].append(paper_id)
+            author["papers"].sort()
+        for identifier in members:
+            coauthors = self.authors[identifier]["coauthors"]
+            for other in members:
+                if other != identifier:
+                    coauthors[other] = coauthors.get(other, 0) + 1
+        self.papers[paper_id] = {"sha": _authors_hash(raw_authors), "authors": members}
+
+    def update(self, dossiers: Iterable[Dict[str, object]], prune: bool = True) -> Counter:
+        """Apply one pass over ``dossiers``; returns added/changed/removed counts."""
+
+        stats: Counter = Counter()
+        seen = set()
+        pending: List[Tuple[str, List[str]]] = []
+        for data in dossiers:
+            paper_id = str(data.get("id") or "")
+            if not paper_id:
+                continue
+            seen.add(paper_id)
+            raw_authors = [str(author) for author in data.get("authors") or [] if str(author).strip()]
+            existing = self.papers.get(paper_id)
+            if existing and existing["sha"] == _authors_hash(raw_authors):
+                stats["unchanged"] += 1
+                continue
+            stats["changed" if existing else "added"] += 1
+            if existing:
+                self._remove_paper(paper_id)
+            pending.append((paper_id, raw_authors))
+        if prune:
+            for paper_id in sorted(set(self.papers) - seen):
+                self._remove_paper(paper_id)
+                stats["removed"] += 1
+
+        # Register full-name spellings before initial-only ones so "R Boyle"
+        # can merge into "Richard Boyle" regardless of paper order.
+        for _, raw_authors in pending:
+            for raw in raw_authors:
+                name = normalize_name(raw)
+                if name is not None and not name.initial_only:
+                    self.resolve(raw, create=True)
+        for paper_id, raw_authors in pending:
+            self._add_paper(paper_id, raw_authors)
+        return stats
+
+    def papers_of(self, identifier: str) -> List[str]:
+        author = self.authors.get(identifier)
+        return list(author["papers"]) if author else []
+
+    def coauthors_of(self, identifier: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        author = self.authors.get(identifier)
+        if not author:
+            return []
+        ranked = sorted(author["coauthors"].items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+def build_index(json_dir: Path, index_path: Path, rebuild: bool = False) -> AuthorIndex:
+    started = time.perf_counter()
+    index = AuthorIndex() if rebuild else AuthorIndex.load(index_path)
+    stats = index.update(iter_dossiers(json_dir))
+    index.save(index_path)
+    logger.info(
+        "Author index %s: %d authors over %d papers (%d added, %d changed, %d removed, %d unchanged) in %.2fs",
+        index_path,
+        len(index.authors),
+        len(index.papers),
+        stats["added"],
+        stats["changed"],
+        stats["removed"],
+        stats["unchanged"],
+        time.perf_counter() - started,
+    )
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and query the normalised author index")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_PATH, help="Author index file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Create or incrementally update the index")
+    build.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory (or .pack) of JSON dossiers")
+    build.add_argument("--rebuild", action="store_true", help="Ignore the existing index and start over")
+
+    lookup = subparsers.add_parser("lookup", help="Show an author's papers and top co-authors")
+    lookup.add_argument("name", help='Author name in any supported form, e.g. "Boyle, Richard" or "Boyle R"')
+    lookup.add_argument("--coauthors", type=int, default=10, help="How many co-authors to list")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet or args.command == "lookup")
+    try:
+        if args.command == "build":
+            json_dir = args.json_dir if args.json_dir.suffix == ".pack" else normalize_json_dir(args.json_dir)
+            build_index(json_dir, args.index, rebuild=args.rebuild)
+            return
+        index = AuthorIndex.load(args.index)
+        identifier = index.resolve(args.name)
+        if identifier is None:
+            logger.error("No author matching %r in %s", args.name, args.index)
+            raise SystemExit(1)
+        author = index.authors[identifier]
+        print(f"{author['name']} ({identifier})")
+        if author["variants"]:
+            print(f"  also: {', '.join(author['variants'])}")
+        print(f"  papers: {', '.join(author['papers'])}")
+        for other, count in index.coauthors_of(identifier, args.coauthors):
+            print(f"  {count:>3}  {index.authors[other]['name']}")
+    except (OSError, ValueError) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ const OUT_PAPERS_DIR = join(OUT_DIR, 'papers');
 type KeywordCounts = Record<string, number>;
 
 type RawPaper = {
+  schema_version?: number;
   id: string;
   title: string;
   authors: string[];
@@ -29,6 +30,7 @@ type RawPaper = {
   metrics?: {
     keyword_counts?: KeywordCounts;
   };
+  citations_by_year?: CitationPoint[];
 };
 
 type CitationPoint = { y: number; c: number };
@@ -163,6 +165,12 @@ const mapLinks = (links: RawPaper['links']) => {
   } satisfies PaperDetail['links'];
 };
 
+const normaliseCitations = (points: RawPaper['citations_by_year']) =>
+  (points ?? [])
+    .filter((point) => Number.isFinite(point?.y) && Number.isFinite(point?.c))
+    .map((point) => ({ y: Math.trunc(point.y), c: Math.trunc(point.c) }))
+    .sort((a, b) => a.y - b.y);
+
 const ensureSections = (sections: RawPaper['sections']) => ({
   abstract: sections?.abstract ?? '',
   methods: sections?.methods ?? '',
@@ -185,7 +193,7 @@ const toDetail = (paper: RawPaper): PaperDetail => {
     links: mapLinks(paper.links),
     ai_summary: paper.ai_summary ?? paper.summary ?? '',
     access: deriveAccessTags(paper),
-    citations_by_year: [],
+    citations_by_year: normaliseCitations(paper.citations_by_year),
     confidence: computeConfidence(paper),
     entities: selectEntities(keywordCounts, keywords)
   };
@@ -198,31 +206,81 @@ const writeDetail = async (detail: PaperDetail) => {
 
 const toIndexEntry = ({ sections, links, ...rest }: PaperDetail): PaperIndex => rest;
 
-const run = async () => {
-  await mkdir(OUT_PAPERS_DIR, { recursive: true });
+const byYearThenTitle = (a: PaperIndex, b: PaperIndex) => {
+  if (b.year === a.year) {
+    return a.title.localeCompare(b.title);
+  }
+  return b.year - a.year;
+};
+
+const buildDetail = async (file: string) => {
+  const buffer = await readFile(join(RAW_DIR, file), 'utf-8');
+  const detail = toDetail(JSON.parse(buffer) as RawPaper);
+  await writeDetail(detail);
+  return detail;
+};
+
+// `--ids exp_001,exp_002` rebuilds only those dossiers and patches them into
+// the existing index.json (used by `pmc_ingest.py --watch`).
+const parseIds = (argv: string[]) => {
+  const position = argv.indexOf('--ids');
+  if (position === -1 || !argv[position + 1]) {
+    return null;
+  }
+  return argv[position + 1].split(',').map((id) => id.trim()).filter(Boolean);
+};
+
+const readIndex = async (): Promise<PaperIndex[] | null> => {
+  try {
+    return JSON.parse(await readFile(join(OUT_DIR, 'index.json'), 'utf-8')) as PaperIndex[];
+  } catch {
+    return null;
+  }
+};
+
+const runFull = async () => {
   const files = (await readdir(RAW_DIR)).filter((file) => file.endsWith('.json'));
   const details: PaperDetail[] = [];
 
   for (const file of files) {
-    const rawPath = join(RAW_DIR, file);
-    const buffer = await readFile(rawPath, 'utf-8');
-    const paper = JSON.parse(buffer) as RawPaper;
-    const detail = toDetail(paper);
-    details.push(detail);
-    await writeDetail(detail);
+    details.push(await buildDetail(file));
   }
 
-  const sorted = details.sort((a, b) => {
-    if (b.year === a.year) {
-      return a.title.localeCompare(b.title);
+  const indexEntries = details.map((detail) => toIndexEntry(detail)).sort(byYearThenTitle);
+  await writeFile(join(OUT_DIR, 'index.json'), JSON.stringify(indexEntries, null, 2));
+
+  console.log(`Generated ${details.length} dossiers from ${basename(RAW_DIR)}`);
+};
+
+const runIncremental = async (ids: string[], index: PaperIndex[]) => {
+  const entries = new Map(index.map((entry) => [entry.id, entry]));
+  let updated = 0;
+
+  for (const id of ids) {
+    try {
+      const detail = await buildDetail(`${id}.json`);
+      entries.set(detail.id, toIndexEntry(detail));
+      updated += 1;
+    } catch (error) {
+      console.warn(`Skipping ${id}: ${(error as Error).message}`);
     }
-    return b.year - a.year;
-  });
+  }
 
-  const indexEntries = sorted.map((detail) => toIndexEntry(detail));
+  const indexEntries = [...entries.values()].sort(byYearThenTitle);
   await writeFile(join(OUT_DIR, 'index.json'), JSON.stringify(indexEntries, null, 2));
 
-  console.log(`Generated ${details.length} dossiers from ${basename(RAW_DIR)}`);
+  console.log(`Updated ${updated} of ${indexEntries.length} dossiers from ${basename(RAW_DIR)}`);
+};
+
+const run = async () => {
+  await mkdir(OUT_PAPERS_DIR, { recursive: true });
+  const ids = parseIds(process.argv.slice(2));
+  const index = ids ? await readIndex() : null;
+  if (ids && index) {
+    await runIncremental(ids, index);
+  } else {
+    await runFull();
+  }
 };
 
 run().catch((error) => {
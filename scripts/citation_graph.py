@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Reference-list extraction and an in-corpus citation graph.
+
+Each cached PMC page (``data/raw_pmc/<pmcid>.html``) ends with a reference
+list whose entries link to PubMed, PMC and doi.org. This stage:
+
+1. Finds the ``ref-list`` section of the raw HTML and parses each ``<li>``
+   that carries a ``<cite>`` with a handful of regexes (no full-page parse),
+   yielding the PMID, PMCID, DOI and year of every reference.
+2. Builds a hash index from every dossier's own identifiers
+   (``pmid:…``, ``pmc:…``, ``doi:…`` taken from its ``citation_pmid`` /
+   ``citation_doi`` meta tags and PMCID) to its node number, and resolves
+   references through it in O(1) each.
+3. Stores the resulting edges as a CSR adjacency list (``indptr`` /
+   ``indices`` ``int32`` arrays, citing paper -> cited paper).
+4. Computes ``citations_by_year`` – how many corpus papers cite each paper,
+   per citing year – in one vectorised pass over the edge array.
+
+The graph is written to ``graph.npz`` and a ``citations.json`` sidecar keyed
+by dossier id; ``--write-dossiers`` also stores ``citations_by_year`` in each
+dossier, where ``npm run build:nasa-data`` picks it up for the frontend:
+
+    python scripts/citation_graph.py --out data/citations --write-dossiers
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from dossier_schema import save_dossier
+from corpus_export import iter_dossier_paths
+from metadata_repair import YEAR_PATTERN, parse_year
+
+logger = logging.getLogger(__name__)
+
+_REF_LIST = re.compile(r"<section[^>]*class=\"[^\"]*\bref-list\b[^\"]*\"[^>]*>", re.IGNORECASE)
+_ITEM = re.compile(r"<li\b[^>]*>(.*?)</li>", re.IGNORECASE | re.DOTALL)
+_CITE = re.compile(r"<cite\b[^>]*>(.*?)</cite>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_PMID_LINK = re.compile(r"pubmed\.ncbi\.nlm\.nih\.gov/(\d+)")
+_PMCID_LINK = re.compile(r"/articles/(PMC\d+)", re.IGNORECASE)
+_DOI_LINK = re.compile(r"doi\.org/(10\.[^\"\s<>]+)", re.IGNORECASE)
+_DOI_TEXT = re.compile(r"\bdoi:\s*(10\.\S+?)[.,;]?(?:\s|$)", re.IGNORECASE)
+_SCHOLAR_YEAR = re.compile(r"publication_year=(\d{4})")
+_META_PMID = re.compile(r"<meta\s+name=\"citation_pmid\"\s+content=\"(\d+)\"", re.IGNORECASE)
+_META_DOI = re.compile(r"<meta\s+name=\"citation_doi\"\s+content=\"([^\"]+)\"", re.IGNORECASE)
+
+
+@dataclass
+class Reference:
+    pmid: Optional[str] = None
+    pmcid: Optional[str] = None
+    doi: Optional[str] = None
+    year: Optional[int] = None
+
+    def keys(self) -> List[str]:
+        return identifier_keys(self.pmid, self.pmcid, self.doi)
+
+
+def identifier_keys(pmid: Optional[str], pmcid: Optional[str], doi: Optional[str]) -> List[str]:
+    """Hash-index keys for an article; DOIs are case-insensitive."""
+
+    keys = []
+    if pmid:
+        keys.append(f"pmid:{pmid}")
+    if pmcid:
+        keys.append(f"pmc:{pmcid.upper()}")
+    if doi:
+        keys.append(f"doi:{doi.lower().rstrip('.')}")
+    return keys
+
+
+def parse_references(page: str) -> List[Reference]:
+    """References from the ``ref-list`` section of a PMC article page."""
+
+    match = _REF_LIST.search(page)
+    if not match:
+        return []
+    references = []
+    for item in _ITEM.finditer(page, match.start()):
+        body = html.unescape(item.group(1))
+        cite = _CITE.search(body)
+        if not cite:
+            # Page chrome after the list (download links, footer menus).
+            continue
+        text = _TAG.sub(" ", cite.group(1))
+        pmid = _PMID_LINK.search(body)
+        pmcid = _PMCID_LINK.search(body)
+        doi = _DOI_LINK.search(body) or _DOI_TEXT.search(text)
+        scholar_year = _SCHOLAR_YEAR.search(body)
+        text_year = YEAR_PATTERN.search(text)
+        references.append(
+            Reference(
+                pmid=pmid.group(1) if pmid else None,
+                pmcid=pmcid.group(1).upper() if pmcid else None,
+                doi=doi.group(1) if doi else None,
+                year=parse_year(scholar_year.group(1) if scholar_year else text_year.group(0) if text_year else None),
+            )
+        )
+    return references
+
+
+def article_keys(page: str, pmcid: str) -> List[str]:
+    pmid = _META_PMID.search(page)
+    doi = _META_DOI.search(page)
+    return identifier_keys(pmid.group(1) if pmid else None, pmcid, html.unescape(doi.group(1)) if doi else None)
+
+
+@dataclass
+class CitationGraph:
+    """CSR citation graph: node ``i`` cites ``indices[indptr[i]:indptr[i+1]]``."""
+
+    ids: List[str]
+    years: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    reference_counts: np.ndarray
+    _reverse: Optional[Tuple[np.ndarray, np.ndarray]] = field(default=None, repr=False)
+
+    @property
+    def edges(self) -> int:
+        return len(self.indices)
+
+    def cites(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def cited_by(self, node: int) -> np.ndarray:
+        if self._reverse is None:
+            # Transpose once: sort edges by target, then count per target.
+            sources = np.repeat(np.arange(len(self.ids), dtype=np.int32), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind="stable")
+            reverse_indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=len(self.ids)), out=reverse_indptr[1:])
+            self._reverse = (reverse_indptr, sources[order])
+        indptr, sources = self._reverse
+        return sources[indptr[node] : indptr[node + 1]]
+
+    def citations_by_year(self) -> List[List[Dict[str, int]]]:
+        """Per node, ``[{"y": year, "c": count}, …]`` of citing papers by their year."""
+
+        result: List[List[Dict[str, int]]] = [[] for _ in self.ids]
+        sources = np.repeat(np.arange(len(self.ids), dtype=np.int64), np.diff(self.indptr))
+        citing_years = self.years[sources].astype(np.int64)
+        known = citing_years > 0
+        span = int(citing_years.max()) + 1 if known.any() else 1
+        keys, counts = np.unique(self.indices[known].astype(np.int64) * span + citing_years[known], return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            node, year = divmod(key, span)
+            result[node].append({"y": year, "c": count})
+        return result
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            ids=np.array(self.ids),
+            years=self.years,
+            indptr=self.indptr,
+            indices=self.indices,
+            reference_counts=self.reference_counts,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "CitationGraph":
+        with np.load(path) as arrays:
+            return cls(
+                ids=arrays["ids"].tolist(),
+                years=arrays["years"],
+                indptr=arrays["indptr"],
+                indices=arrays["indices"],
+                reference_counts=arrays["reference_counts"],
+            )
+
+
+def _load_dossiers(json_dir: Path) -> Iterable[Tuple[Path, Dict[str, object]]]:
+    for path in iter_dossier_paths(json_dir):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        if isinstance(data, dict):
+            yield path, data
+
+
+def build_graph(json_dir: Path, raw_dir: Path) -> CitationGraph:
+    """Parse every dossier's cached reference list and link in-corpus citations."""
+
+    started = time.perf_counter()
+    ids: List[str] = []
+    years: List[int] = []
+    references: List[List[Reference]] = []
+    index: Dict[str, int] = {}
+    missing_html = 0
+    for path, data in _load_dossiers(json_dir):
+        node = len(ids)
+        pmcid = str(data.get("pmcid") or "").upper()
+        ids.append(str(data.get("id") or path.stem))
+        years.append(parse_year(data.get("year")) or 0)
+        raw_path = raw_dir / f"{pmcid}.html"
+        if not pmcid or not raw_path.exists():
+            missing_html += 1
+            references.append([])
+            if pmcid:
+                index.setdefault(f"pmc:{pmcid}", node)
+            continue
+        page = raw_path.read_text(encoding="utf-8", errors="ignore")
+        references.append(parse_references(page))
+        for key in article_keys(page, pmcid):
+            index.setdefault(key, node)
+
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    targets: List[int] = []
+    for node, refs in enumerate(references):
+        cited = set()
+        for reference in refs:
+            for key in reference.keys():
+                target = index.get(key)
+                if target is not None:
+                    if target != node:
+                        cited.add(target)
+                    break
+        targets.extend(sorted(cited))
+        indptr[node + 1] = len(targets)
+
+    graph = CitationGraph(
+        ids=ids,
+        years=np.array(years, dtype=np.int32),
+        indptr=indptr,
+        indices=np.array(targets, dtype=np.int32),
+        reference_counts=np.array([len(refs) for refs in references], dtype=np.int32),
+    )
+    logger.info(
+        "Citation graph: %d papers, %d references parsed, %d in-corpus citations (%d papers without cached HTML) in %.2fs",
+        len(ids),
+        int(graph.reference_counts.sum()),
+        graph.edges,
+        missing_html,
+        time.perf_counter() - started,
+    )
+    return graph
+
+
+def write_outputs(graph: CitationGraph, out_dir: Path, json_dir: Optional[Path] = None) -> Dict[str, int]:
+    """Write ``graph.npz`` and ``citations.json``; optionally update dossiers."""
+
+    by_year = graph.citations_by_year()
+    graph.save(out_dir / "graph.npz")
+    sidecar = {
+        record_id: {
+            "references": int(graph.reference_counts[node]),
+            "cites": [graph.ids[target] for target in graph.cites(node).tolist()],
+            "cited_by": [graph.ids[source] for source in graph.cited_by(node).tolist()],
+            "citations_by_year": by_year[node],
+        }
+        for node, record_id in enumerate(graph.ids)
+    }
+    (out_dir / "citations.json").write_text(json.dumps(sidecar, indent=1), encoding="utf-8")
+
+    updated = 0
+    if json_dir is not None:
+        nodes = {record_id: node for node, record_id in enumerate(graph.ids)}
+        for path, data in _load_dossiers(json_dir):
+            node = nodes.get(str(data.get("id") or path.stem))
+            if node is None or data.get("citations_by_year") == by_year[node]:
+                continue
+            data["citations_by_year"] = by_year[node]
+            save_dossier(path, data)
+            updated += 1
+        logger.info("Updated citations_by_year in %d dossier(s)", updated)
+    return {"papers": len(graph.ids), "edges": graph.edges, "updated": updated}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract reference lists and build the in-corpus citation graph")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--raw-dir", type=Path, default=Path("data/raw_pmc"), help="Directory for cached raw HTML")
+    parser.add_argument("--out", type=Path, default=Path("data/citations"), help="Where graph.npz and citations.json are written")
+    parser.add_argument("--write-dossiers", action="store_true", help="Store citations_by_year in each dossier")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    json_dir = normalize_json_dir(args.json_dir)
+    try:
+        graph = build_graph(json_dir, args.raw_dir)
+        write_outputs(graph, args.out, json_dir if args.write_dossiers else None)
+    except Exception as exc:
+        logger.exception("Citation graph build failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""Columnar snapshot of the dossier corpus for fast faceting and trend queries.
+
+The frontend trend views and our reporting aggregate over organism, platform,
+year and experiment type. Iterating hundreds of JSON dossiers for every such
+query is slow, so this module flattens the corpus into two tables:
+
+``papers``
+    One row per dossier: ``id``, ``pmcid``, ``title``, ``year`` and the
+    dictionary-encoded categorical columns listed in ``CATEGORICAL_COLUMNS``.
+``sections``
+    One row per non-empty section: ``paper`` (row index into ``papers``),
+    dictionary-encoded ``section`` name, ``chars`` and ``text``.
+
+When ``pyarrow`` is installed the tables are written as Parquet with real
+dictionary columns. Otherwise the same layout is stored in NumPy ``.npz``
+archives (integer codes + category arrays, strings as offset/byte buffers), so
+loading never requires pickling.
+
+Facet counts and year trends are computed with ``np.bincount`` over the codes:
+
+    python scripts/corpus_columnar.py build --out data/columnar
+    python scripts/corpus_columnar.py facets data/columnar --column organism
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corpus_export import iter_dossiers
+from pmc_ingest import configure_logging, normalize_json_dir
+
+logger = logging.getLogger(__name__)
+
+try:  # Optional dependency for Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - exercised when pyarrow is absent
+    pa = None
+    pq = None
+
+CATEGORICAL_COLUMNS = ("organism", "platform", "experiment_type")
+SECTION_NAMES = ("abstract", "methods", "results", "conclusion")
+MISSING_YEAR = -1
+MISSING_CODE = -1
+
+
+@dataclass
+class Categorical:
+    """Dictionary-encoded column: ``codes`` index into ``categories`` (-1 = null)."""
+
+    codes: np.ndarray
+    categories: List[str]
+
+    @classmethod
+    def encode(cls, values: Iterable[Optional[str]]) -> "Categorical":
+        lookup: Dict[str, int] = {}
+        codes: List[int] = []
+        for value in values:
+            if value is None or (isinstance(value, str) and not value.strip()):
+                codes.append(MISSING_CODE)
+                continue
+            text = str(value).strip()
+            codes.append(lookup.setdefault(text, len(lookup)))
+        return cls(np.asarray(codes, dtype=np.int32), list(lookup))
+
+    def decode(self) -> List[Optional[str]]:
+        return [self.categories[code] if code >= 0 else None for code in self.codes.tolist()]
+
+
+@dataclass
+class ColumnarSnapshot:
+    ids: List[str]
+    pmcids: List[str]
+    titles: List[str]
+    year: np.ndarray
+    categoricals: Dict[str, Categorical]
+    section_paper: np.ndarray
+    section_name: Categorical
+    section_chars: np.ndarray
+    section_text: List[str] = field(repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _coerce_year(value: object) -> int:
+    try:
+        return int(str(value).split("-")[0]) if value not in (None, "") else MISSING_YEAR
+    except (TypeError, ValueError):
+        return MISSING_YEAR
+
+
+def build_snapshot(dossiers: Iterable[Dict[str, object]]) -> ColumnarSnapshot:
+    """Flatten dossiers into a :class:`ColumnarSnapshot` in a single pass."""
+
+    ids: List[str] = []
+    pmcids: List[str] = []
+    titles: List[str] = []
+    years: List[int] = []
+    raw_categoricals: Dict[str, List[Optional[str]]] = {name: [] for name in CATEGORICAL_COLUMNS}
+    section_paper: List[int] = []
+    section_names: List[str] = []
+    section_text: List[str] = []
+
+    for row, data in enumerate(dossiers):
+        ids.append(str(data.get("id") or ""))
+        pmcids.append(str(data.get("pmcid") or ""))
+        titles.append(str(data.get("title") or ""))
+        years.append(_coerce_year(data.get("year")))
+        for name in CATEGORICAL_COLUMNS:
+            value = data.get(name)
+            raw_categoricals[name].append(value if isinstance(value, str) else None)
+
+        sections = data.get("sections")
+        if not isinstance(sections, dict):
+            continue
+        for name, text in sections.items():
+            if isinstance(text, str) and text.strip():
+                section_paper.append(row)
+                section_names.append(name)
+                section_text.append(text)
+
+    return ColumnarSnapshot(
+        ids=ids,
+        pmcids=pmcids,
+        titles=titles,
+        year=np.asarray(years, dtype=np.int32),
+        categoricals={name: Categorical.encode(values) for name, values in raw_categoricals.items()},
+        section_paper=np.asarray(section_paper, dtype=np.int32),
+        section_name=Categorical.encode(section_names),
+        section_chars=np.asarray([len(text) for text in section_text], dtype=np.int32),
+        section_text=section_text,
+    )
+
+
+def _encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings Arrow-style: int64 offsets plus one UTF-8 byte buffer."""
+
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _decode_strings(offsets: np.ndarray, data: np.ndarray) -> List[str]:
+    buffer = data.tobytes()
+    bounds = offsets.tolist()
+    return [buffer[start:end].decode("utf-8") for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _write_npz(snapshot: ColumnarSnapshot, out_dir: Path) -> List[Path]:
+    papers: Dict[str, np.ndarray] = {"year": snapshot.year}
+    for name, values in (("id", snapshot.ids), ("pmcid", snapshot.pmcids), ("title", snapshot.titles)):
+        papers[f"{name}_offsets"], papers[f"{name}_data"] = _encode_strings(values)
+    for name, column in snapshot.categoricals.items():
+        papers[f"{name}_codes"] = column.codes
+        papers[f"{name}_cat_offsets"], papers[f"{name}_cat_data"] = _encode_strings(column.categories)
+
+    sections: Dict[str, np.ndarray] = {
+        "paper": snapshot.section_paper,
+        "chars": snapshot.section_chars,
+        "section_codes": snapshot.section_name.codes,
+    }
+    sections["section_cat_offsets"], sections["section_cat_data"] = _encode_strings(snapshot.section_name.categories)
+    sections["text_offsets"], sections["text_data"] = _encode_strings(snapshot.section_text)
+
+    papers_path = out_dir / "papers.npz"
+    sections_path = out_dir / "sections.npz"
+    np.savez_compressed(papers_path, **papers)
+    np.savez_compressed(sections_path, **sections)
+    return [papers_path, sections_path]
+
+
+def _dictionary_array(column: Categorical) -> "pa.DictionaryArray":
+    codes = pa.array(column.codes, mask=column.codes < 0, type=pa.int32())
+    return pa.DictionaryArray.from_arrays(codes, pa.array(column.categories, type=pa.string()))
+
+
+def _write_parquet(snapshot: ColumnarSnapshot, out_dir: Path) -> List[Path]:
+    papers = pa.table(
+        {
+            "id": pa.array(snapshot.ids, type=pa.string()),
+            "pmcid": pa.array(snapshot.pmcids, type=pa.string()),
+            "title": pa.array(snapshot.titles, type=pa.string()),
+            "year": pa.array(snapshot.year, mask=snapshot.year == MISSING_YEAR, type=pa.int32()),
+            **{name: _dictionary_array(column) for name, column in snapshot.categoricals.items()},
+        }
+    )
+    sections = pa.table(
+        {
+            "paper": pa.array(snapshot.section_paper, type=pa.int32()),
+            "section": _dictionary_array(snapshot.section_name),
+            "chars": pa.array(snapshot.section_chars, type=pa.int32()),
+            "text": pa.array(snapshot.section_text, type=pa.string()),
+        }
+    )
+    papers_path = out_dir / "papers.parquet"
+    sections_path = out_dir / "sections.parquet"
+    pq.write_table(papers, papers_path, compression="zstd")
+    pq.write_table(sections, sections_path, compression="zstd")
+    return [papers_path, sections_path]
+
+
+def write_snapshot(snapshot: ColumnarSnapshot, out_dir: Path, fmt: str = "auto") -> List[Path]:
+    """Persist ``snapshot`` as Parquet (when pyarrow is available) or ``.npz``."""
+
+    if fmt == "auto":
+        fmt = "parquet" if pa is not None else "npz"
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("pyarrow is required for Parquet output. Install with `pip install pyarrow` or use --format npz")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = _write_parquet(snapshot, out_dir) if fmt == "parquet" else _write_npz(snapshot, out_dir)
+    logger.info(
+        "Wrote %s snapshot with %d papers and %d sections to %s",
+        fmt,
+        len(snapshot),
+        len(snapshot.section_text),
+        out_dir,
+    )
+    return paths
+
+
+def _categorical_from_arrow(column: "pa.ChunkedArray") -> Categorical:
+    combined = column.combine_chunks()
+    if not isinstance(combined, pa.DictionaryArray):
+        combined = combined.dictionary_encode()
+    codes = combined.indices.fill_null(MISSING_CODE).to_numpy(zero_copy_only=False).astype(np.int32)
+    return Categorical(codes, combined.dictionary.to_pylist())
+
+
+def load_snapshot(snapshot_dir: Path) -> ColumnarSnapshot:
+    """Load a snapshot written by :func:`write_snapshot`, preferring Parquet."""
+
+    if (snapshot_dir / "papers.parquet").exists():
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet snapshots")
+        papers = pq.read_table(snapshot_dir / "papers.parquet")
+        sections = pq.read_table(snapshot_dir / "sections.parquet")
+        return ColumnarSnapshot(
+            ids=papers.column("id").to_pylist(),
+            pmcids=papers.column("pmcid").to_pylist(),
+            titles=papers.column("title").to_pylist(),
+            year=papers.column("year").fill_null(MISSING_YEAR).to_numpy().astype(np.int32),
+            categoricals={name: _categorical_from_arrow(papers.column(name)) for name in CATEGORICAL_COLUMNS},
+            section_paper=sections.column("paper").to_numpy().astype(np.int32),
+            section_name=_categorical_from_arrow(sections.column("section")),
+            section_chars=sections.column("chars").to_numpy().astype(np.int32),
+            section_text=sections.column("text").to_pylist(),
+        )
+
+    with np.load(snapshot_dir / "papers.npz", allow_pickle=False) as papers, np.load(
+        snapshot_dir / "sections.npz", allow_pickle=False
+    ) as sections:
+        return ColumnarSnapshot(
+            ids=_decode_strings(papers["id_offsets"], papers["id_data"]),
+            pmcids=_decode_strings(papers["pmcid_offsets"], papers["pmcid_data"]),
+            titles=_decode_strings(papers["title_offsets"], papers["title_data"]),
+            year=papers["year"],
+            categoricals={
+                name: Categorical(
+                    papers[f"{name}_codes"],
+                    _decode_strings(papers[f"{name}_cat_offsets"], papers[f"{name}_cat_data"]),
+                )
+                for name in CATEGORICAL_COLUMNS
+            },
+            section_paper=sections["paper"],
+            section_name=Categorical(
+                sections["section_codes"],
+                _decode_strings(sections["section_cat_offsets"], sections["section_cat_data"]),
+            ),
+            section_chars=sections["chars"],
+            section_text=_decode_strings(sections["text_offsets"], sections["text_data"]),
+        )
+
+
+def facet_counts(snapshot: ColumnarSnapshot, column: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+    """Count papers per category of ``column`` (``year`` or a categorical column).
+
+    ``mask`` is an optional boolean row filter, e.g. ``snapshot.year >= 2010``.
+    """
+
+    if column == "year":
+        years = snapshot.year if mask is None else snapshot.year[mask]
+        years = years[years != MISSING_YEAR]
+        if not years.size:
+            return {}
+        values, counts = np.unique(years, return_counts=True)
+        return {str(value): int(count) for value, count in zip(values.tolist(), counts.tolist())}
+
+    encoded = snapshot.categoricals[column]
+    codes = encoded.codes if mask is None else encoded.codes[mask]
+    counts = np.bincount(codes[codes >= 0], minlength=len(encoded.categories))
+    order = np.argsort(-counts, kind="stable")
+    return {encoded.categories[i]: int(counts[i]) for i in order.tolist() if counts[i]}
+
+
+def year_trend(snapshot: ColumnarSnapshot, column: str) -> Dict[str, Dict[int, int]]:
+    """Papers per year for every category of ``column`` (a 2-D bincount)."""
+
+    encoded = snapshot.categoricals[column]
+    valid = (encoded.codes >= 0) & (snapshot.year != MISSING_YEAR)
+    if not valid.any():
+        return {}
+    years = snapshot.year[valid]
+    first_year = int(years.min())
+    span = int(years.max()) - first_year + 1
+    flat = encoded.codes[valid].astype(np.int64) * span + (years - first_year)
+    grid = np.bincount(flat, minlength=len(encoded.categories) * span).reshape(len(encoded.categories), span)
+    trend: Dict[str, Dict[int, int]] = {}
+    for code, category in enumerate(encoded.categories):
+        nonzero = np.flatnonzero(grid[code])
+        if nonzero.size:
+            trend[category] = {first_year + int(offset): int(grid[code, offset]) for offset in nonzero}
+    return trend
+
+
+def section_char_totals(snapshot: ColumnarSnapshot) -> Dict[str, int]:
+    """Total characters stored per section name across the corpus."""
+
+    totals = np.bincount(
+        snapshot.section_name.codes,
+        weights=snapshot.section_chars,
+        minlength=len(snapshot.section_name.categories),
+    )
+    return {name: int(total) for name, total in zip(snapshot.section_name.categories, totals.tolist())}
+
+
+def build_from_dir(json_dir: Path, out_dir: Path, fmt: str = "auto") -> List[Path]:
+    json_dir = normalize_json_dir(json_dir)
+    snapshot = build_snapshot(iter_dossiers(json_dir))
+    return write_snapshot(snapshot, out_dir, fmt)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and query a columnar snapshot of Astro Genesis dossiers")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Write papers/sections tables from data/papers")
+    build_parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    build_parser.add_argument("--out", type=Path, default=Path("data/columnar"), help="Snapshot output directory")
+    build_parser.add_argument("--format", choices=["auto", "parquet", "npz"], default="auto", help="Storage format (default: parquet if pyarrow is installed)")
+
+    facets_parser = subparsers.add_parser("facets", help="Print facet counts from an existing snapshot")
+    facets_parser.add_argument("snapshot", type=Path, help="Snapshot directory")
+    facets_parser.add_argument("--column", choices=("year",) + CATEGORICAL_COLUMNS, default="organism", help="Column to facet on")
+    facets_parser.add_argument("--by-year", action="store_true", help="Break the facet down by publication year")
+
+    args = parser.parse_args()
+    configure_logging(args.verbose, args.quiet)
+    logger.debug("CLI arguments: %s", args)
+
+    try:
+        if args.command == "build":
+            build_from_dir(args.json_dir, args.out, args.format)
+        else:
+            snapshot = load_snapshot(args.snapshot)
+            if args.by_year and args.column != "year":
+                result: object = year_trend(snapshot, args.column)
+            else:
+                result = facet_counts(snapshot, args.column)
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+    except Exception as exc:
+        logger.exception("Columnar %s failed", args.command)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Stream the dossier corpus as newline-delimited JSON.
+
+Downstream analytics jobs would otherwise open every ``data/papers/exp_*.json``
+file individually. This module concatenates the dossiers into a single NDJSON
+stream (one record per line) that can be piped or read sequentially:
+
+    python scripts/corpus_export.py export --out corpus.ndjson.gz
+    python scripts/corpus_export.py export --fields id,year,organism,keywords --out -
+    python scripts/corpus_export.py read corpus.ndjson.gz --fields id,title
+
+Compression is inferred from the output suffix (``.gz``, ``.bz2``, ``.xz``) or
+forced with ``--compression``. Both the exporter and the reader hold a single
+record in memory at a time, so memory use stays constant as the corpus grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import dataclasses
+import gzip
+import io
+import json
+import logging
+import lzma
+import sys
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from pmc_ingest import ArticleRecord, configure_logging, normalize_json_dir
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+}
+
+_OPENERS = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+
+
+def infer_compression(path: Path, compression: Optional[str] = None) -> Optional[str]:
+    """Return the codec requested explicitly or implied by ``path``'s suffix."""
+
+    if compression and compression != "auto":
+        return None if compression == "none" else compression
+    return COMPRESSION_SUFFIXES.get(path.suffix.lower())
+
+
+def open_stream(path: Path, mode: str, compression: Optional[str] = None) -> IO[str]:
+    """Open ``path`` as a text stream, transparently (de)compressing it.
+
+    ``-`` maps to stdout/stdin so exports can be piped into other tools.
+    """
+
+    codec = infer_compression(path, compression)
+    if str(path) == "-":
+        raw = sys.stdout.buffer if "w" in mode else sys.stdin.buffer
+        if codec:
+            raw = _OPENERS[codec](raw, mode.replace("t", "") + "b")  # type: ignore[operator]
+        return io.TextIOWrapper(raw, encoding="utf-8", newline="\n")
+    if codec:
+        return _OPENERS[codec](path, mode + "t", encoding="utf-8", newline="\n")  # type: ignore[operator]
+    return path.open(mode, encoding="utf-8", newline="\n")
+
+
+def iter_dossier_paths(json_dir: Path) -> Iterator[Path]:
+    """Yield dossier paths in id order."""
+
+    yield from sorted(path for path in json_dir.glob("*.json") if path.is_file())
+
+
+def iter_dossiers(json_dir: Path) -> Iterator[Dict[str, object]]:
+    """Yield raw dossier dictionaries one at a time, skipping unreadable files.
+
+    ``json_dir`` may also be a ``.pack`` file written by ``corpus_pack.py``.
+    """
+
+    if json_dir.suffix == ".pack" and json_dir.is_file():
+        from corpus_pack import iter_pack
+
+        yield from iter_pack(json_dir)
+        return
+
+    for path in iter_dossier_paths(json_dir):
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        if isinstance(data, dict):
+            yield data
+        else:
+            logger.warning("Skipping %s: expected a JSON object", path)
+
+
+def project(data: Dict[str, object], fields: Optional[Sequence[str]]) -> Dict[str, object]:
+    """Keep only ``fields`` (in the requested order); ``None`` keeps everything."""
+
+    if not fields:
+        return data
+    return {name: data.get(name) for name in fields}
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def export_ndjson(
+    json_dir: Path,
+    out_path: Path,
+    fields: Optional[Sequence[str]] = None,
+    compression: Optional[str] = None,
+) -> int:
+    """Write every dossier in ``json_dir`` to ``out_path`` as NDJSON.
+
+    Returns the number of records written.
+    """
+
+    json_dir = normalize_json_dir(json_dir)
+    known = {f.name for f in dataclasses.fields(ArticleRecord)} | {"ai_summary"}
+    for name in fields or []:
+        if name not in known:
+            logger.warning("Projected field %r is not part of the dossier schema", name)
+
+    with open_stream(out_path, "w", compression) as handle:
+        count = write_ndjson((project(data, fields) for data in iter_dossiers(json_dir)), handle)
+    logger.info("Exported %d dossiers from %s -> %s", count, json_dir, out_path)
+    return count
+
+
+def iter_ndjson(
+    path: Path,
+    fields: Optional[Sequence[str]] = None,
+    compression: Optional[str] = None,
+) -> Iterator[Dict[str, object]]:
+    """Lazily yield dictionaries from an NDJSON export."""
+
+    with open_stream(path, "r", compression) as handle:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as exc:
+                logger.warning("Skipping malformed line %d in %s: %s", line_no, path, exc)
+                continue
+            yield project(data, fields)
+
+
+def iter_ndjson_records(path: Path, compression: Optional[str] = None) -> Iterator[ArticleRecord]:
+    """Lazily yield :class:`ArticleRecord` instances from a full (unprojected) export."""
+
+    for data in iter_ndjson(path, compression=compression):
+        yield ArticleRecord.from_dict(data)
+
+
+def write_ndjson(records: Iterable[Dict[str, object]], handle: IO[str]) -> int:
+    count = 0
+    for data in records:
+        handle.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        handle.write("\n")
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream Astro Genesis dossiers as newline-delimited JSON")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export data/papers into a single NDJSON stream")
+    export_parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    export_parser.add_argument("--out", type=Path, default=Path("-"), help="Output path ('-' for stdout)")
+    export_parser.add_argument("--fields", default=None, help="Comma-separated column projection, e.g. id,year,organism,keywords")
+    export_parser.add_argument("--compression", choices=["auto", "none", "gzip", "bz2", "xz"], default="auto", help="Compression codec (default: infer from suffix)")
+
+    read_parser = subparsers.add_parser("read", help="Re-emit (optionally projected) records from an NDJSON export")
+    read_parser.add_argument("path", type=Path, help="NDJSON file to read ('-' for stdin)")
+    read_parser.add_argument("--fields", default=None, help="Comma-separated column projection")
+    read_parser.add_argument("--compression", choices=["auto", "none", "gzip", "bz2", "xz"], default="auto", help="Compression codec (default: infer from suffix)")
+
+    args = parser.parse_args()
+    # Keep log lines out of the NDJSON stream whenever it is written to stdout.
+    to_stdout = args.command == "read" or str(args.out) == "-"
+    configure_logging(args.verbose, args.quiet, stream=sys.stderr if to_stdout else None)
+    logger.debug("CLI arguments: %s", args)
+
+    try:
+        if args.command == "export":
+            export_ndjson(args.json_dir, args.out, parse_fields(args.fields), args.compression)
+        else:
+            out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="\n")
+            write_ndjson(iter_ndjson(args.path, parse_fields(args.fields), args.compression), out)
+            out.flush()
+    except Exception as exc:
+        logger.exception("NDJSON %s failed", args.command)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
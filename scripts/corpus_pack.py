@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Single-file, offset-indexed dossier pack with a memory-mapped reader.
+
+Instead of opening hundreds of small ``exp_*.json`` files, :func:`write_pack`
+concatenates every dossier into one binary file:
+
+``header`` (32 bytes, little-endian)
+    ``magic`` ``b"AGPACK\\x00\\x01"``, ``version`` u16, ``flags`` u16,
+    ``count`` u32, ``index_offset`` u64, ``index_length`` u64.
+``blobs``
+    One JSON document per dossier, stored raw or zlib-compressed (only when
+    compression actually saves space), in id order.
+``index``
+    ``count`` fixed-width entries (offset u64, length u32, raw length u32,
+    codec u8, id length u8) followed by the UTF-8 ids.
+
+:class:`PackReader` maps the file with :mod:`mmap` and loads only the index,
+so fetching one paper is a dict lookup plus a slice of the mapping
+(:meth:`PackReader.raw` returns a zero-copy ``memoryview``), and a full scan
+is one sequential pass over the blobs. ``--raw`` packs keep every blob
+uncompressed so the file can be served as a single cacheable asset and
+compressed by the HTTP layer instead.
+
+    python scripts/corpus_pack.py build --json-dir data/papers --out data/corpus.pack
+    python scripts/corpus_pack.py get data/corpus.pack exp_001
+    python scripts/corpus_pack.py info data/corpus.pack
+
+``corpus_export.iter_dossiers`` accepts a ``.pack`` path wherever it accepts a
+dossier directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from corpus_export import iter_dossier_paths
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AGPACK\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+ENTRY = struct.Struct("<QIIBB")
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+FLAG_RAW_ONLY = 1
+
+
+def write_pack(json_dir: Path, out_path: Path, compress: bool = True, level: int = 6) -> Dict[str, int]:
+    """Pack every dossier in ``json_dir`` into ``out_path``; returns size stats."""
+
+    entries: List[Tuple[str, int, int, int, int]] = []
+    raw_total = 0
+    temporary = out_path.with_suffix(out_path.suffix + ".tmp")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with temporary.open("wb") as handle:
+        handle.write(b"\x00" * HEADER.size)
+        offset = HEADER.size
+        for path in iter_dossier_paths(json_dir):
+            raw = path.read_bytes()
+            try:
+                record_id = str(json.loads(raw).get("id") or path.stem)
+            except (json.JSONDecodeError, AttributeError) as exc:
+                logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+                continue
+            blob, codec = raw, CODEC_RAW
+            if compress:
+                packed = zlib.compress(raw, level)
+                if len(packed) < len(raw):
+                    blob, codec = packed, CODEC_ZLIB
+            handle.write(blob)
+            entries.append((record_id, offset, len(blob), len(raw), codec))
+            offset += len(blob)
+            raw_total += len(raw)
+
+        index_offset = offset
+        ids = b"".join(record_id.encode("utf-8") for record_id, *_ in entries)
+        for record_id, blob_offset, length, raw_length, codec in entries:
+            encoded = record_id.encode("utf-8")
+            if len(encoded) > 255:
+                raise ValueError(f"dossier id too long for pack index: {record_id!r}")
+            handle.write(ENTRY.pack(blob_offset, length, raw_length, codec, len(encoded)))
+        handle.write(ids)
+        index_length = len(entries) * ENTRY.size + len(ids)
+
+        handle.seek(0)
+        flags = 0 if compress else FLAG_RAW_ONLY
+        handle.write(HEADER.pack(MAGIC, VERSION, flags, len(entries), index_offset, index_length))
+    temporary.replace(out_path)
+
+    size = out_path.stat().st_size
+    logger.info(
+        "Packed %d dossiers into %s: %.1f KiB (%.1f KiB of JSON)",
+        len(entries),
+        out_path,
+        size / 1024,
+        raw_total / 1024,
+    )
+    return {"papers": len(entries), "bytes": size, "json_bytes": raw_total}
+
+
+class PackReader:
+    """Random and sequential access to a pack through a read-only ``mmap``."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, self.flags, count, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus pack")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported pack version {version}")
+
+        ids_offset = index_offset + count * ENTRY.size
+        self._entries: Dict[str, Tuple[int, int, int, int]] = {}
+        self.ids: List[str] = []
+        cursor = ids_offset
+        for position in range(count):
+            offset, length, raw_length, codec, id_length = ENTRY.unpack_from(
+                self._map, index_offset + position * ENTRY.size
+            )
+            record_id = bytes(self._view[cursor : cursor + id_length]).decode("utf-8")
+            cursor += id_length
+            self._entries[record_id] = (offset, length, raw_length, codec)
+            self.ids.append(record_id)
+        if cursor != index_offset + index_length:
+            raise ValueError(f"{path}: corrupt pack index")
+
+    def __enter__(self) -> "PackReader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._entries
+
+    def close(self) -> None:
+        """Release the mapping.
+
+        If views from :meth:`raw` are still alive the mapping cannot be
+        unmapped yet; it is then left for the garbage collector to free once
+        the last view goes away, instead of raising ``BufferError``.
+        """
+
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            logger.debug("%s: views still exported; leaving the mapping to the garbage collector", self.path)
+        self._file.close()
+
+    def raw(self, record_id: str) -> memoryview:
+        """The stored blob for ``record_id`` as a view into the mapping (no copy).
+
+        Call ``release()`` on the view (or use it in a ``with`` block) when done
+        so :meth:`close` can unmap the file immediately.
+        """
+
+        offset, length, _, _ = self._entries[record_id]
+        return self._view[offset : offset + length]
+
+    def get_bytes(self, record_id: str) -> bytes:
+        """The dossier's JSON bytes, decompressed if necessary."""
+
+        _, _, _, codec = self._entries[record_id]
+        with self.raw(record_id) as blob:
+            return zlib.decompress(blob) if codec == CODEC_ZLIB else bytes(blob)
+
+    def get(self, record_id: str) -> Dict[str, object]:
+        return json.loads(self.get_bytes(record_id))
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        # Entries are laid out in id order, so this is one sequential read.
+        for record_id in self.ids:
+            yield self.get(record_id)
+
+
+def iter_pack(path: Path) -> Iterator[Dict[str, object]]:
+    with PackReader(path) as reader:
+        yield from reader
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pack dossiers into one memory-mappable file")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Write a pack from a dossier directory")
+    build.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    build.add_argument("--out", type=Path, default=Path("data/corpus.pack"), help="Pack file to write")
+    build.add_argument("--raw", action="store_true", help="Store JSON uncompressed (for serving with HTTP compression)")
+
+    get = subparsers.add_parser("get", help="Print one dossier from a pack")
+    get.add_argument("pack", type=Path)
+    get.add_argument("id", help="Dossier id, e.g. exp_001")
+
+    info = subparsers.add_parser("info", help="Summarise a pack")
+    info.add_argument("pack", type=Path)
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet or args.command == "get")
+    try:
+        if args.command == "build":
+            write_pack(normalize_json_dir(args.json_dir), args.out, compress=not args.raw)
+        elif args.command == "get":
+            with PackReader(args.pack) as reader:
+                if args.id not in reader:
+                    logger.error("%s not found in %s", args.id, args.pack)
+                    raise SystemExit(1)
+                sys.stdout.write(reader.get_bytes(args.id).decode("utf-8"))
+                sys.stdout.write("\n")
+        else:
+            with PackReader(args.pack) as reader:
+                compressed = sum(1 for entry in reader._entries.values() if entry[3] == CODEC_ZLIB)
+                raw_bytes = sum(entry[2] for entry in reader._entries.values())
+                print(
+                    f"{args.pack}: {len(reader)} dossiers ({compressed} compressed), "
+                    f"{args.pack.stat().st_size / 1024:.1f} KiB for {raw_bytes / 1024:.1f} KiB of JSON"
+                )
+    except (OSError, ValueError) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
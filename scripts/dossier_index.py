@@ -0,0 +1,129 @@
+"""Persistent index of dossier state for incremental summarisation.
+
+``summarize_jsons`` used to parse every dossier on each run just to find the
+few without ``ai_summary``. :class:`DossierIndex` remembers, per file, its
+``mtime``/size, a hash of its ``sections`` and of its ``ai_summary``, and the
+sections hash the summary was written for. :meth:`DossierIndex.refresh` only
+``stat``s unchanged files, re-reading a dossier only when it was modified
+since the last run, so startup cost scales with the number of changed and
+pending dossiers rather than the corpus.
+
+A dossier is *pending* when it has no ``ai_summary`` and *stale* when its
+sections changed after the summary was written. A summary that itself
+changed (e.g. rewritten by ``pmc_ingest --combined-summary``) is trusted to
+match the current sections.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+SUMMARY_KEY = "ai_summary"
+
+
+def content_hash(value: object) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IndexEntry:
+    mtime_ns: int
+    size: int
+    sections_sha256: str
+    summary_sha256: Optional[str] = None
+    summarized_sections_sha256: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.summary_sha256 is None:
+            return "pending"
+        if self.summarized_sections_sha256 != self.sections_sha256:
+            return "stale"
+        return "summarized"
+
+
+class DossierIndex:
+    def __init__(self, path: Path, data_dir: Path):
+        self.path = path
+        self.data_dir = data_dir
+        self.entries: Dict[str, IndexEntry] = {}
+        self.reread = 0
+        if path.exists():
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                payload = {}
+            if payload.get("version") == INDEX_VERSION:
+                self.entries = {name: IndexEntry(**entry) for name, entry in payload.get("entries", {}).items()}
+
+    def save(self) -> None:
+        payload = {
+            "version": INDEX_VERSION,
+            "entries": {name: asdict(entry) for name, entry in sorted(self.entries.items())},
+        }
+        temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+        os.replace(temporary, self.path)
+
+    def _entry_for(self, stat: os.stat_result, data: Dict, previous: Optional[IndexEntry]) -> IndexEntry:
+        sections_hash = content_hash(data.get("sections"))
+        summary = data.get(SUMMARY_KEY)
+        summary_hash = content_hash(summary) if summary is not None else None
+        if summary_hash is None:
+            summarized = None
+        elif previous is None or previous.summary_sha256 != summary_hash:
+            summarized = sections_hash
+        else:
+            summarized = previous.summarized_sections_sha256
+        return IndexEntry(stat.st_mtime_ns, stat.st_size, sections_hash, summary_hash, summarized)
+
+    def refresh(self) -> List[str]:
+        """Sync with the directory; returns the names of unreadable dossiers."""
+
+        errors: List[str] = []
+        seen = set()
+        with os.scandir(self.data_dir) as listing:
+            for item in listing:
+                if not item.name.endswith(".json") or not item.is_file() or Path(item.path) == self.path:
+                    continue
+                seen.add(item.name)
+                stat = item.stat()
+                previous = self.entries.get(item.name)
+                if previous and previous.mtime_ns == stat.st_mtime_ns and previous.size == stat.st_size:
+                    continue
+                try:
+                    with open(item.path, "r", encoding="utf-8") as handle:
+                        data = json.load(handle)
+                except (OSError, json.JSONDecodeError):
+                    errors.append(item.name)
+                    continue
+                if not isinstance(data, dict):
+                    errors.append(item.name)
+                    continue
+                self.reread += 1
+                self.entries[item.name] = self._entry_for(stat, data, previous)
+        for name in set(self.entries) - seen:
+            del self.entries[name]
+        return errors
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """``(name, status)`` for dossiers needing a summary, in name order."""
+
+        return [
+            (name, entry.status)
+            for name, entry in sorted(self.entries.items())
+            if entry.status != "summarized"
+        ]
+
+    def mark_summarized(self, path: Path, data: Dict) -> None:
+        """Record that ``data`` was just written to ``path`` with a fresh summary."""
+
+        entry = self._entry_for(path.stat(), data, None)
+        entry.summarized_sections_sha256 = entry.sections_sha256
+        self.entries[path.name] = entry
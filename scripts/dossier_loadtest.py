@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Closed-loop load test for ``dossier_server.py``.
+
+``--concurrency`` client threads each keep one HTTP/1.1 connection open and
+issue requests back to back for ``--duration`` seconds. Requests are drawn
+from a weighted mix of paper detail, facet, filter and search routes using ids
+and facet values fetched from the server. With ``--revalidate`` a share of
+detail requests carry the ETag seen earlier, exercising the ``304`` path.
+The run reports throughput, latency percentiles per route and the server's
+cache hit ratio:
+
+    python scripts/dossier_loadtest.py --url http://127.0.0.1:8765 --duration 10 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = "detail=6,facets=1,filter=2,search=2"
+SEARCH_TERMS = ("microgravity", "bone", "radiation", "mice", "arabidopsis", "muscle", "gene expression", "spaceflight")
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[position]
+
+
+def parse_mix(value: str) -> List[Tuple[str, int]]:
+    mix = []
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("detail", "facets", "filter", "search"):
+            raise ValueError(f"unknown route {name!r} in --mix")
+        mix.append((name, int(weight or 1)))
+    return mix
+
+
+class Client:
+    def __init__(self, host: str, port: int, gzip_ok: bool):
+        self.host, self.port = host, port
+        self.gzip_ok = gzip_ok
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+
+    def get(self, path: str, etag: Optional[str] = None) -> Tuple[int, Optional[str], bytes]:
+        headers = {"Accept-Encoding": "gzip"} if self.gzip_ok else {}
+        if etag:
+            headers["If-None-Match"] = etag
+        for attempt in range(2):
+            try:
+                self.connection.request("GET", path, headers=headers)
+                response = self.connection.getresponse()
+                body = response.read()
+                return response.status, response.getheader("ETag"), body
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                if attempt:
+                    raise
+        raise RuntimeError("unreachable")
+
+
+def run_load(
+    url: str,
+    duration: float,
+    concurrency: int,
+    mix: List[Tuple[str, int]],
+    revalidate: float = 0.0,
+    gzip_ok: bool = True,
+    seed: int = 7,
+) -> Dict[str, object]:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    probe = Client(host, port, gzip_ok=False)
+    _, _, body = probe.get("/papers?limit=500")
+    ids = [paper["id"] for paper in json.loads(body)["results"]]
+    _, _, body = probe.get("/facets")
+    facets = {name: list(values) for name, values in json.loads(body)["facets"].items() if values}
+    if not ids:
+        raise RuntimeError("server has no papers to request")
+
+    routes = [name for name, weight in mix for _ in range(weight)]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    transferred = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(number: int) -> None:
+        rng = random.Random(seed + number)
+        client = Client(host, port, gzip_ok)
+        etags: Dict[str, str] = {}
+        local_latency: Dict[str, List[float]] = defaultdict(list)
+        local_status: Counter = Counter()
+        local_bytes = 0
+        while time.perf_counter() < deadline:
+            route = rng.choice(routes)
+            etag = None
+            if route == "detail":
+                paper_id = rng.choice(ids)
+                path = f"/papers/{quote(paper_id)}"
+                if paper_id in etags and rng.random() < revalidate:
+                    etag = etags[paper_id]
+            elif route == "facets":
+                path = "/facets"
+            elif route == "filter" and facets:
+                name = rng.choice(sorted(facets))
+                path = f"/papers?{name}={quote(str(rng.choice(facets[name])))}&limit=20"
+            else:
+                path = f"/search?q={quote(rng.choice(SEARCH_TERMS))}&limit=20"
+            started = time.perf_counter()
+            try:
+                status, returned_etag, payload = client.get(path, etag)
+            except (http.client.HTTPException, OSError):
+                local_status["error"] += 1
+                continue
+            local_latency[route].append(time.perf_counter() - started)
+            local_status[status] += 1
+            local_bytes += len(payload)
+            if route == "detail" and returned_etag:
+                etags[paper_id] = returned_etag
+        with lock:
+            for name, values in local_latency.items():
+                latencies[name].extend(values)
+            statuses.update(local_status)
+            transferred[0] += local_bytes
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    _, _, body = probe.get("/stats")
+    cache = json.loads(body).get("cache", {})
+    every = sorted(value for values in latencies.values() for value in values)
+    report: Dict[str, object] = {
+        "requests": len(every),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(every) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(every, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(every, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(every, 0.99) * 1000, 2),
+        "statuses": {str(key): value for key, value in sorted(statuses.items(), key=str)},
+        "mib_received": round(transferred[0] / (1 << 20), 2),
+        "routes": {},
+        "cache_hit_ratio": round(cache["hits"] / max(cache["hits"] + cache["misses"], 1), 3) if cache else None,
+    }
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        report["routes"][name] = {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of dossier_server.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="Base URL of the running server")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent keep-alive clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted route mix (default {DEFAULT_MIX})")
+    parser.add_argument("--revalidate", type=float, default=0.0, help="Share of repeat detail requests sent with If-None-Match")
+    parser.add_argument("--no-gzip", action="store_true", help="Do not send Accept-Encoding: gzip")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        report = run_load(
+            args.url,
+            args.duration,
+            args.concurrency,
+            parse_mix(args.mix),
+            revalidate=args.revalidate,
+            gzip_ok=not args.no_gzip,
+        )
+    except (OSError, ValueError, RuntimeError, http.client.HTTPException) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['requests']} requests in {report['seconds']}s: {report['rps']} req/s, "
+        f"p50 {report['p50_ms']}ms, p95 {report['p95_ms']}ms, p99 {report['p99_ms']}ms"
+    )
+    print(f"statuses {report['statuses']}, {report['mib_received']} MiB received, cache hit ratio {report['cache_hit_ratio']}")
+    for name, stats in report["routes"].items():
+        print(f"  {name:<8} {stats['requests']:>7} requests  p50 {stats['p50_ms']:>7}ms  p99 {stats['p99_ms']:>7}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""Versioned dossier schema with a compiled validator, repairs and migrations.
+
+Every consumer of ``data/papers`` used to guard against malformed dossiers on
+its own: ``build-nasa-data.ts`` defaults missing sections, ``compile_payload``
+accepts authors as a list or a string, the frontend copes with a ``null``
+year. This module defines the shape once (:data:`FIELDS`) and enforces it
+where dossiers are written, so bad records are caught at ingest instead of at
+render time.
+
+* :func:`compile_validator` turns :data:`FIELDS` into one generated Python
+  function with the type checks inlined, so a clean dossier costs a handful of
+  ``type(...) is`` tests and no per-field dispatch.
+* :func:`repair` fixes what can be fixed (string author lists, missing or
+  ``null`` sections, string or out-of-range years, empty ``ai_summary``…)
+  after running the :data:`MIGRATIONS` from the dossier's ``schema_version``
+  up to :data:`SCHEMA_VERSION`.
+* :func:`encode` stamps, migrates and repairs a dossier before it is written;
+  :func:`write_dossier` writes through a temporary file and ``os.replace``.
+  :func:`save_dossier` does both and is what every script that rewrites
+  dossiers (``pmc_ingest``, ``summarize_jsons``, ``metrics_engine``,
+  ``metadata_repair`` …) uses.
+
+``check`` validates the whole corpus in one pass and reports failures grouped
+by field; ``--repair`` rewrites the affected dossiers in place:
+
+    python scripts/dossier_schema.py check --json-dir data/papers
+    python scripts/dossier_schema.py check --json-dir data/papers --repair
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from metadata_repair import MIN_YEAR, parse_year
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+SECTION_NAMES = ("abstract", "methods", "results", "conclusion")
+MAX_YEAR = 2100
+EXAMPLES_PER_PROBLEM = 5
+
+# (field, problem) pairs returned by a validator.
+Problem = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Field:
+    """One top-level dossier key.
+
+    ``kind`` selects the check and the repair: ``version``, ``id``, ``text``,
+    ``optional_text``, ``nonempty_text``, ``string_list``, ``year``,
+    ``sections``, ``string_map``, ``mapping`` or ``citations``. Keys that are
+    not ``required`` are only checked when present.
+    """
+
+    name: str
+    kind: str
+    required: bool = True
+
+
+FIELDS: Sequence[Field] = (
+    Field("schema_version", "version"),
+    Field("id", "id"),
+    Field("pmcid", "id"),
+    Field("title", "text"),
+    Field("authors", "string_list"),
+    Field("year", "year"),
+    Field("organism", "optional_text"),
+    Field("experiment_type", "optional_text"),
+    Field("platform", "optional_text"),
+    Field("keywords", "string_list"),
+    Field("sections", "sections"),
+    Field("links", "string_map"),
+    Field("summary", "optional_text"),
+    Field("ai_summary", "nonempty_text", required=False),
+    Field("metrics", "mapping"),
+    Field("citations_by_year", "citations", required=False),
+)
+
+# Expressions that are true when ``v`` is valid, per field kind.
+_CHECKS: Dict[str, str] = {
+    "version": "type(v) is int and v == SCHEMA_VERSION",
+    "id": "type(v) is str and v != ''",
+    "text": "type(v) is str",
+    "optional_text": "v is None or type(v) is str",
+    "nonempty_text": "type(v) is str and v.strip() != ''",
+    "string_list": "type(v) is list and all(type(item) is str and item for item in v)",
+    "year": "v is None or (type(v) is int and MIN_YEAR <= v <= MAX_YEAR)",
+    "sections": "type(v) is dict and all(type(v.get(name)) is str for name in SECTION_NAMES)"
+    " and all(type(text) is str for text in v.values())",
+    "string_map": "type(v) is dict and all(type(value) is str for value in v.values())",
+    "mapping": "type(v) is dict",
+    "citations": "type(v) is list and all(type(point) is dict and type(point.get('y')) is int"
+    " and type(point.get('c')) is int for point in v)",
+}
+
+
+def compile_validator(fields: Sequence[Field] = FIELDS) -> Callable[[Dict[str, object]], List[Problem]]:
+    """Generate ``validate(dossier) -> [(field, problem), …]`` for ``fields``.
+
+    The function body is built from :data:`_CHECKS` and compiled once, so
+    validating a dossier runs straight-line code with no loop over field
+    specs. A valid dossier returns a shared empty list; do not mutate it.
+    """
+
+    lines = ["def validate(d):", "    problems = _EMPTY", "    get = d.get"]
+    for spec in fields:
+        if spec.kind not in _CHECKS:
+            raise ValueError(f"unknown field kind {spec.kind!r} for {spec.name!r}")
+        lines.append(f"    v = get({spec.name!r}, _MISSING)")
+        if spec.required:
+            lines.append("    if v is _MISSING:")
+            lines.append(f"        problems = problems + [({spec.name!r}, 'missing')]")
+            lines.append(f"    elif not ({_CHECKS[spec.kind]}):")
+        else:
+            lines.append(f"    if v is not _MISSING and not ({_CHECKS[spec.kind]}):")
+        lines.append(f"        problems = problems + [({spec.name!r}, _describe({spec.kind!r}, v))]")
+    lines.append("    return problems")
+    namespace: Dict[str, object] = {
+        "_EMPTY": [],
+        "_MISSING": _MISSING,
+        "_describe": _describe,
+        "SCHEMA_VERSION": SCHEMA_VERSION,
+        "SECTION_NAMES": SECTION_NAMES,
+        "MIN_YEAR": MIN_YEAR,
+        "MAX_YEAR": MAX_YEAR,
+    }
+    exec(compile("\n".join(lines), "<dossier_schema.validate>", "exec"), namespace)  # noqa: S102 - generated from FIELDS
+    return namespace["validate"]  # type: ignore[return-value]
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
+
+def _describe(kind: str, value: object) -> str:
+    """Short problem label for an invalid ``value``; used to group the report."""
+
+    if value is None:
+        return "null"
+    if kind == "version":
+        return "outdated" if isinstance(value, int) else f"type {type(value).__name__}"
+    if kind == "year" and isinstance(value, int):
+        return "out of range"
+    if kind in ("id", "nonempty_text") and isinstance(value, str):
+        return "empty"
+    if kind == "string_list" and isinstance(value, list):
+        return "bad items"
+    if kind == "sections" and isinstance(value, dict):
+        return "missing or non-string sections"
+    if kind in ("string_map", "citations") and isinstance(value, (dict, list)):
+        return "bad items"
+    return f"type {type(value).__name__}"
+
+
+validate = compile_validator()
+
+
+# -- migrations -----------------------------------------------------------------------------
+
+
+def _migrate_v0(data: Dict[str, object]) -> None:
+    # Dossiers written before the schema existed carry no version and may hold
+    # the PMC link at the top level instead of under ``links``.
+    for legacy, key in (("pmc_url", "pmc_html"), ("pdf_url", "pmc_pdf")):
+        value = data.pop(legacy, None)
+        links = data.setdefault("links", {})
+        if isinstance(value, str) and value and isinstance(links, dict):
+            links.setdefault(key, value)
+
+
+# ``MIGRATIONS[n]`` upgrades a version-``n`` dossier to version ``n + 1``.
+MIGRATIONS: Dict[int, Callable[[Dict[str, object]], None]] = {0: _migrate_v0}
+
+
+def migrate(data: Dict[str, object]) -> bool:
+    """Run migrations in place up to :data:`SCHEMA_VERSION`; returns ``True`` if any ran."""
+
+    version = data.get("schema_version")
+    version = version if isinstance(version, int) and not isinstance(version, bool) else 0
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"dossier schema_version {version} is newer than supported {SCHEMA_VERSION}")
+    migrated = version < SCHEMA_VERSION
+    while version < SCHEMA_VERSION:
+        MIGRATIONS[version](data)
+        version += 1
+    data["schema_version"] = SCHEMA_VERSION
+    return migrated
+
+
+# -- repairs --------------------------------------------------------------------------------
+
+_LIST_SEPARATORS = re.compile(r"\s*[;,]\s*")
+_PMCID = re.compile(r"PMC\d+", re.IGNORECASE)
+
+
+def _text(value: object) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(_text(item) for item in value if item is not None).strip()
+    return str(value)
+
+
+def _string_list(value: object) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item for item in _LIST_SEPARATORS.split(value.strip()) if item]
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [str(item).strip() for item in value if item is not None and str(item).strip()]
+
+
+def _year(value: object) -> Optional[int]:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    year = parse_year(value) if not isinstance(value, bool) else None
+    return year if year is not None and year <= MAX_YEAR else None
+
+
+def _citations(value: object) -> List[Dict[str, int]]:
+    points: Dict[int, int] = {}
+    for point in value if isinstance(value, list) else []:
+        if not isinstance(point, dict):
+            continue
+        try:
+            year, count = int(point.get("y")), int(point.get("c"))
+        except (TypeError, ValueError):
+            continue
+        points[year] = points.get(year, 0) + count
+    return [{"y": year, "c": count} for year, count in sorted(points.items())]
+
+
+def _repair_field(data: Dict[str, object], spec: Field, source: Optional[Path]) -> None:
+    value = data.get(spec.name)
+    kind = spec.kind
+    if kind == "id":
+        if spec.name == "id" and source is not None:
+            data["id"] = source.stem
+        elif spec.name == "pmcid":
+            links = data.get("links")
+            match = _PMCID.search(" ".join(map(_text, links.values()))) if isinstance(links, dict) else None
+            if match:
+                data["pmcid"] = match.group(0).upper()
+    elif kind == "text":
+        data[spec.name] = _text(value)
+    elif kind == "optional_text":
+        data[spec.name] = _text(value) or None
+    elif kind == "nonempty_text":
+        text = _text(value).strip()
+        if text:
+            data[spec.name] = text
+        else:
+            # ``summarize_jsons`` treats a present ``ai_summary`` as done.
+            data.pop(spec.name, None)
+    elif kind == "string_list":
+        data[spec.name] = _string_list(value)
+    elif kind == "year":
+        data[spec.name] = _year(value)
+    elif kind == "sections":
+        sections = value if isinstance(value, dict) else {}
+        repaired = {name: _text(text) for name, text in sections.items()}
+        for name in SECTION_NAMES:
+            repaired.setdefault(name, "")
+        data[spec.name] = repaired
+    elif kind == "string_map":
+        mapping = value if isinstance(value, dict) else {}
+        data[spec.name] = {key: _text(item) for key, item in mapping.items() if item is not None and _text(item)}
+    elif kind == "mapping":
+        data[spec.name] = value if isinstance(value, dict) else {}
+    elif kind == "citations":
+        data[spec.name] = _citations(value)
+
+
+_FIELDS_BY_NAME = {spec.name: spec for spec in FIELDS}
+
+
+def repair(data: Dict[str, object], source: Optional[Path] = None) -> Tuple[List[Problem], List[Problem]]:
+    """Migrate and repair ``data`` in place.
+
+    Returns ``(found, remaining)``: the problems the validator reported before
+    repairing, and those no repair could fix (for example a dossier without a
+    ``pmcid`` or any PMC link).
+    """
+
+    found = list(validate(data))
+    if not found:
+        return found, []
+    migrate(data)
+    for name, _ in found:
+        if name != "schema_version":
+            _repair_field(data, _FIELDS_BY_NAME[name], source)
+    return found, list(validate(data))
+
+
+# -- writing --------------------------------------------------------------------------------
+
+
+def dumps(data: Dict[str, object]) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def encode(data: Dict[str, object], label: str = "dossier") -> bytes:
+    """Stamp, validate and repair ``data``, then serialise it for writing.
+
+    Used on every dossier write. Older dossiers are migrated first. Repairs
+    are logged; problems that remain are logged as errors but the dossier is
+    still written, so one bad field does not lose the rest of the record.
+    """
+
+    migrate(data)
+    found, remaining = repair(data)
+    if found:
+        fixed = sorted(set(found) - set(remaining))
+        if fixed:
+            logger.warning("Repaired %s: %s", label, ", ".join(f"{name} ({problem})" for name, problem in fixed))
+        if remaining:
+            logger.error("%s still invalid: %s", label, ", ".join(f"{name} ({problem})" for name, problem in remaining))
+    return dumps(data)
+
+
+def write_dossier(path: Path, payload: bytes) -> None:
+    """Write ``payload`` to ``path`` atomically (temporary file + ``os.replace``)."""
+
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(payload)
+    os.replace(temporary, path)
+
+
+def save_dossier(path: Path, data: Dict[str, object], label: Optional[str] = None) -> None:
+    """Validate, repair and atomically write ``data`` as the dossier at ``path``."""
+
+    write_dossier(path, encode(data, label or path.stem))
+
+
+# -- corpus pass ----------------------------------------------------------------------------
+
+
+@dataclass
+class CorpusReport:
+    files: int = 0
+    valid: int = 0
+    repaired: int = 0
+    invalid: int = 0
+    unreadable: int = 0
+    seconds: float = 0.0
+    problems: Counter = field(default_factory=Counter)
+    remaining: Counter = field(default_factory=Counter)
+    examples: Dict[Problem, List[str]] = field(default_factory=lambda: defaultdict(list))
+
+    def add(self, name: str, found: Sequence[Problem], remaining: Sequence[Problem]) -> None:
+        for problem in found:
+            self.problems[problem] += 1
+            if len(self.examples[problem]) < EXAMPLES_PER_PROBLEM:
+                self.examples[problem].append(name)
+        self.remaining.update(remaining)
+
+    def by_field(self) -> Dict[str, Dict[str, object]]:
+        grouped: Dict[str, Dict[str, object]] = {}
+        for (field_name, problem), count in sorted(self.problems.items()):
+            entry = grouped.setdefault(field_name, {"total": 0, "problems": {}})
+            entry["total"] += count
+            entry["problems"][problem] = {
+                "count": count,
+                "unrepaired": self.remaining.get((field_name, problem), 0),
+                "examples": self.examples[(field_name, problem)],
+            }
+        return grouped
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "files": self.files,
+            "valid": self.valid,
+            "repaired": self.repaired,
+            "invalid": self.invalid,
+            "unreadable": self.unreadable,
+            "seconds": round(self.seconds, 3),
+            "fields": self.by_field(),
+        }
+
+
+def check_corpus(json_dir: Path, repair_in_place: bool = False) -> CorpusReport:
+    """Validate every dossier in ``json_dir`` in one pass.
+
+    With ``repair_in_place`` each dossier that needed a migration or repair
+    is rewritten atomically; clean dossiers are never touched.
+    """
+
+    report = CorpusReport()
+    started = time.perf_counter()
+    with os.scandir(json_dir) as listing:
+        names = sorted(entry.name for entry in listing if entry.name.endswith(".json") and entry.is_file())
+    for name in names:
+        path = json_dir / name
+        report.files += 1
+        try:
+            data = json.loads(path.read_bytes())
+        except (OSError, ValueError) as exc:
+            logger.error("Cannot read %s: %s", path, exc)
+            report.unreadable += 1
+            continue
+        if not isinstance(data, dict):
+            report.add(name, [("<root>", f"type {type(data).__name__}")], [("<root>", f"type {type(data).__name__}")])
+            report.invalid += 1
+            continue
+        if not validate(data):
+            report.valid += 1
+            continue
+        found, remaining = repair(data, source=path)
+        report.add(name, found, remaining)
+        if remaining:
+            report.invalid += 1
+        if repair_in_place and len(remaining) < len(found):
+            write_dossier(path, dumps(data))
+            report.repaired += 1
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def format_report(report: CorpusReport, repaired: bool) -> str:
+    rate = report.files / report.seconds if report.seconds else 0.0
+    lines = [
+        f"{report.files} dossier(s) in {report.seconds:.2f}s ({rate:,.0f}/s): {report.valid} valid, "
+        f"{report.files - report.valid - report.unreadable} with problems, {report.invalid} not repairable, "
+        f"{report.unreadable} unreadable" + (f"; {report.repaired} rewritten" if repaired else "")
+    ]
+    for field_name, entry in report.by_field().items():
+        lines.append(f"  {field_name}: {entry['total']}")
+        for problem, detail in entry["problems"].items():
+            suffix = f", {detail['unrepaired']} unrepaired" if detail["unrepaired"] else ""
+            lines.append(f"    {problem:<32} {detail['count']:>6}{suffix}  e.g. {', '.join(detail['examples'])}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate, repair and migrate dossiers against the dossier schema")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("check", help="Validate every dossier and report problems grouped by field")
+    check.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory holding JSON dossiers")
+    check.add_argument("--repair", action="store_true", help="Migrate and repair dossiers in place (atomic writes)")
+    check.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    json_dir = normalize_json_dir(args.json_dir)
+    try:
+        report = check_corpus(json_dir, repair_in_place=args.repair)
+    except (OSError, ValueError) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+    print(json.dumps(report.as_dict(), indent=2) if args.json else format_report(report, args.repair))
+    unresolved = report.invalid + report.unreadable if args.repair else report.files - report.valid
+    if unresolved:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
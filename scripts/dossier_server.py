@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""Read-only local HTTP API over the dossier store.
+
+Internal tools can query the corpus over HTTP instead of opening
+``data/papers/*.json`` themselves:
+
+``GET /papers/<id>``
+    The full dossier.
+``GET /papers?organism=&platform=&year=&experiment_type=&q=&limit=&offset=``
+    Paper summaries matching every given facet (repeat a parameter to OR
+    values; ``year`` also accepts ``2010-2015``), ranked by ``q`` when given.
+``GET /search?q=``
+    Same as ``/papers`` with a required query.
+``GET /facets``
+    Value counts for each facet, restricted by any filters given.
+``GET /stats``
+    Cache and request counters.
+
+Facets and search run against an in-memory index built from one pass over the
+dossiers and rebuilt when the directory changes. Dossier bodies are served
+from an LRU cache bounded by bytes that keeps both the raw and gzipped
+encodings. Strong ETags come from the manifest written at ingest time
+(:mod:`etag_manifest`), so ``If-None-Match`` revalidation answers ``304``
+without touching the file. Requests are handled by a fixed thread pool; a
+keep-alive connection that stays idle for ``KEEPALIVE_TIMEOUT`` seconds is
+closed so it gives its thread back:
+
+    python scripts/dossier_server.py --port 8765 --cache-mb 64
+    python scripts/dossier_loadtest.py --url http://127.0.0.1:8765 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from etag_manifest import ETAG_FILENAME, EtagManifest, strong_etag
+from metrics_engine import tokenize
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("organism", "platform", "year", "experiment_type")
+SEARCH_FIELDS = {"title": 3.0, "keywords": 2.0, "authors": 2.0, "organism": 1.0, "summary": 1.0}
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+GZIP_MIN_BYTES = 512
+RELOAD_CHECK_SECONDS = 1.0
+# Idle keep-alive connections are closed after this long so they cannot pin pool threads.
+KEEPALIVE_TIMEOUT = 5.0
+
+
+class InvalidQuery(ValueError):
+    """A query parameter the API cannot interpret; answered with ``400``."""
+
+
+@dataclass
+class CachedBody:
+    etag: str
+    raw: bytes
+    gzipped: Optional[bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.raw) + len(self.gzipped or b"")
+
+
+class ByteLRU:
+    """Thread-safe LRU whose capacity is a byte budget, not an entry count."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: CachedBody) -> None:
+        if value.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._items[key] = value
+            self.bytes += value.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def encode_body(payload: bytes, etag: Optional[str] = None) -> CachedBody:
+    gzipped = gzip.compress(payload, compresslevel=6) if len(payload) >= GZIP_MIN_BYTES else None
+    return CachedBody(etag or strong_etag(payload), payload, gzipped)
+
+
+class FacetIndex:
+    """Facet postings and an inverted search index over paper summaries."""
+
+    def __init__(self, json_dir: Path):
+        self.json_dir = json_dir
+        self.papers: Dict[str, Dict[str, object]] = {}
+        self.paths: Dict[str, Path] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {name: {} for name in FACETS}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.generation = 0
+        self.signature: Tuple[int, int] = (0, 0)
+
+    @staticmethod
+    def directory_signature(json_dir: Path) -> Tuple[int, int]:
+        stat = json_dir.stat()
+        return stat.st_mtime_ns, sum(1 for _ in json_dir.glob("*.json"))
+
+    def build(self) -> None:
+        started = time.perf_counter()
+        papers: Dict[str, Dict[str, object]] = {}
+        paths: Dict[str, Path] = {}
+        facets: Dict[str, Dict[str, Set[str]]] = {name: {} for name in FACETS}
+        postings: Dict[str, Dict[str, float]] = {}
+        signature = self.directory_signature(self.json_dir)
+        for path in sorted(self.json_dir.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+                continue
+            if not isinstance(data, dict):
+                continue
+            paper_id = str(data.get("id") or path.stem)
+            paths[paper_id] = path
+            papers[paper_id] = {
+                "id": paper_id,
+                "title": data.get("title") or "",
+                "authors": data.get("authors") or [],
+                "year": data.get("year"),
+                "organism": data.get("organism"),
+                "platform": data.get("platform"),
+                "experiment_type": data.get("experiment_type"),
+                "keywords": data.get("keywords") or [],
+            }
+            for name in FACETS:
+                value = data.get(name)
+                if value not in (None, ""):
+                    facets[name].setdefault(str(value).lower(), set()).add(paper_id)
+            for field_name, weight in SEARCH_FIELDS.items():
+                value = data.get(field_name)
+                text = " ".join(map(str, value)) if isinstance(value, list) else str(value or "")
+                for token, count in Counter(tokenize(text)).items():
+                    scores = postings.setdefault(token, {})
+                    scores[paper_id] = scores.get(paper_id, 0.0) + weight * (1 + math.log(count))
+        self.papers, self.paths, self.facets, self.postings = papers, paths, facets, postings
+        self.signature = signature
+        self.generation += 1
+        logger.info(
+            "Indexed %d dossiers (%d search terms) in %.2fs",
+            len(papers),
+            len(postings),
+            time.perf_counter() - started,
+        )
+
+    def filter(self, params: Dict[str, List[str]]) -> Set[str]:
+        selected = set(self.papers)
+        for name in FACETS:
+            values = [value for raw in params.get(name, []) for value in raw.split(",") if value]
+            if not values:
+                continue
+            matched: Set[str] = set()
+            for value in values:
+                if name == "year" and "-" in value:
+                    low, _, high = (bound.strip() for bound in value.partition("-"))
+                    if not all(bound.isdigit() for bound in (low, high) if bound):
+                        raise InvalidQuery("invalid year range")
+                    for year, ids in self.facets[name].items():
+                        if year.isdigit() and int(low or 0) <= int(year) <= int(high or 9999):
+                            matched |= ids
+                else:
+                    matched |= self.facets[name].get(value.lower(), set())
+            selected &= matched
+        return selected
+
+    def search(self, query: str, candidates: Iterable[str]) -> List[Tuple[str, float]]:
+        """Rank ``candidates`` by summed IDF-weighted field scores for ``query``."""
+
+        allowed = set(candidates)
+        scores: Dict[str, float] = {}
+        total = max(len(self.papers), 1)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + total / len(postings))
+            for paper_id, score in postings.items():
+                if paper_id in allowed:
+                    scores[paper_id] = scores.get(paper_id, 0.0) + score * idf
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def facet_counts(self, selected: Set[str]) -> Dict[str, Dict[str, int]]:
+        counts: Dict[str, Dict[str, int]] = {}
+        for name in FACETS:
+            values = {value: len(ids & selected) for value, ids in self.facets[name].items()}
+            counts[name] = dict(sorted(((k, v) for k, v in values.items() if v), key=lambda item: (-item[1], item[0])))
+        return counts
+
+
+class DossierStore:
+    """Index, ETags and body cache for one dossier directory."""
+
+    def __init__(self, json_dir: Path, cache_bytes: int):
+        self.json_dir = json_dir
+        self.index = FacetIndex(json_dir)
+        self.etags = EtagManifest(json_dir.parent / ETAG_FILENAME)
+        self.cache = ByteLRU(cache_bytes)
+        self.requests: Counter = Counter()
+        self._reload_lock = threading.Lock()
+        self._checked = 0.0
+        self.index.build()
+
+    def maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < RELOAD_CHECK_SECONDS:
+            return
+        with self._reload_lock:
+            if now - self._checked < RELOAD_CHECK_SECONDS:
+                return
+            self._checked = now
+            if FacetIndex.directory_signature(self.json_dir) != self.index.signature:
+                logger.info("Dossier directory changed; rebuilding index")
+                self.index.build()
+                self.cache.clear()
+
+    def _path_and_stat(self, paper_id: str) -> Optional[Tuple[Path, os.stat_result]]:
+        path = self.index.paths.get(paper_id)
+        if path is None:
+            return None
+        try:
+            return path, path.stat()
+        except FileNotFoundError:
+            return None
+
+    def paper_etag(self, paper_id: str) -> Optional[str]:
+        """ETag of a dossier from the manifest, without reading the file if it is unchanged."""
+
+        found = self._path_and_stat(paper_id)
+        return self.etags.etag_for(*found) if found else None
+
+    def paper(self, paper_id: str) -> Optional[CachedBody]:
+        found = self._path_and_stat(paper_id)
+        if found is None:
+            return None
+        path, stat = found
+        key = f"paper:{paper_id}"
+        cached = self.cache.get(key)
+        # A dossier rewritten since it was cached has a different mtime/size, hence ETag.
+        if cached is not None and cached.etag == self.etags.etag_for(path, stat):
+            return cached
+        payload = path.read_bytes()
+        body = encode_body(payload, self.etags.etag_for(path, stat, payload))
+        self.cache.put(key, body)
+        return body
+
+    def query(self, kind: str, params: Dict[str, List[str]]) -> CachedBody:
+        key = f"{kind}:{self.index.generation}:" + json.dumps(sorted(params.items()))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        selected = self.index.filter(params)
+        if kind == "facets":
+            result: object = {"total": len(selected), "facets": self.index.facet_counts(selected)}
+        else:
+            query = " ".join(params.get("q", []))
+            if query:
+                ranked = self.index.search(query, selected)
+            else:
+                ranked = [(paper_id, 0.0) for paper_id in sorted(selected)]
+            offset = _int_param(params, "offset", 0, 0, len(ranked))
+            limit = _int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+            page = ranked[offset : offset + limit]
+            results = []
+            for paper_id, score in page:
+                summary = dict(self.index.papers[paper_id])
+                if query:
+                    summary["score"] = round(score, 4)
+                results.append(summary)
+            result = {"total": len(ranked), "offset": offset, "limit": limit, "results": results}
+        body = encode_body(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        self.cache.put(key, body)
+        return body
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        value = default
+    return max(low, min(value, high))
+
+
+class DossierHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; avoid Nagle + delayed-ACK stalls on keep-alive.
+    disable_nagle_algorithm = True
+    timeout = KEEPALIVE_TIMEOUT
+    server_version = "AstroGenesisDossiers/1"
+    store: DossierStore
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        params = {key: values for key, values in parse_qs(url.query).items()}
+        route = url.path.rstrip("/") or "/"
+        store = self.store
+        store.maybe_reload()
+        try:
+            if route.startswith("/papers/"):
+                paper_id = unquote(route[len("/papers/") :])
+                etag = store.paper_etag(paper_id)
+                if etag is not None and etag in _etag_list(self.headers.get("If-None-Match")):
+                    self._send_not_modified(etag, "no-cache")
+                    return
+                body = store.paper(paper_id) if etag is not None else None
+                if body is None:
+                    self._send_error(HTTPStatus.NOT_FOUND, "paper not found")
+                else:
+                    self._send_body(body, cache_control="no-cache")
+            elif route == "/papers":
+                self._send_body(store.query("papers", params))
+            elif route == "/search":
+                if not params.get("q"):
+                    self._send_error(HTTPStatus.BAD_REQUEST, "missing q")
+                else:
+                    self._send_body(store.query("papers", params))
+            elif route == "/facets":
+                self._send_body(store.query("facets", params))
+            elif route == "/stats":
+                stats = {"papers": len(store.index.papers), "cache": store.cache.stats(), "requests": dict(store.requests)}
+                self._send_body(encode_body(json.dumps(stats).encode("utf-8")), cache_control="no-store")
+            elif route == "/healthz":
+                self._send_body(encode_body(b'{"ok":true}'), cache_control="no-store")
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, "unknown route")
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except InvalidQuery as exc:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(exc))
+        except Exception:
+            logger.exception("%s %s failed", self.command, self.path)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "internal error")
+        finally:
+            store.requests[route.split("/")[1] or "root"] += 1
+            logger.debug("%s %s in %.1fms", self.command, self.path, (time.perf_counter() - started) * 1000)
+
+    def _send_body(self, body: CachedBody, cache_control: str = "max-age=60") -> None:
+        if body.etag in _etag_list(self.headers.get("If-None-Match")):
+            self._send_not_modified(body.etag, cache_control)
+            return
+        use_gzip = body.gzipped is not None and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        payload = body.gzipped if use_gzip else body.raw
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", body.etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_not_modified(self, etag: str, cache_control: str) -> None:
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        payload = json.dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - signature from http.server
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _etag_list(header: Optional[str]) -> Sequence[str]:
+    if not header:
+        return ()
+    if header.strip() == "*":
+        return ("*",)
+    return [value.strip() for value in header.split(",")]
+
+
+class PooledHTTPServer(HTTPServer):
+    """``HTTPServer`` that hands each connection to a fixed-size thread pool.
+
+    A connection holds its thread until the client disconnects or the
+    handler's ``timeout`` expires, so the handler must set one.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], handler: type, workers: int):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dossier-http")
+
+    def process_request(self, request, client_address) -> None:  # type: ignore[override]
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(json_dir: Path, host: str = "127.0.0.1", port: int = 8765, workers: int = 16, cache_bytes: int = 64 << 20) -> PooledHTTPServer:
+    store = DossierStore(json_dir, cache_bytes)
+    handler = type("BoundDossierHandler", (DossierHandler,), {"store": store})
+    return PooledHTTPServer((host, port), handler, workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve dossiers over a local read-only HTTP API")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=16, help="Request-handling threads")
+    parser.add_argument("--cache-mb", type=float, default=64, help="Byte budget of the response cache in MiB")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        server = make_server(
+            normalize_json_dir(args.json_dir),
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            cache_bytes=int(args.cache_mb * (1 << 20)),
+        )
+    except OSError as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+    logger.info("Serving %s on http://%s:%d", args.json_dir, args.host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
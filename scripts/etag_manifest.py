@@ -0,0 +1,68 @@
+"""Strong ETags for dossiers, recorded when they are written.
+
+``pmc_ingest.write_record`` hashes the exact bytes it writes and records the
+digest together with the file's ``mtime``/size in ``data/etags.json``.
+``dossier_server`` serves those digests as ``ETag`` headers without reading
+or hashing the file again. A dossier rewritten by another tool (metrics
+refresh, citation graph, summariser) no longer matches its recorded
+``mtime``/size, so its ETag is recomputed from the file on first use.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ETAG_FILENAME = "etags.json"
+
+
+def strong_etag(payload: bytes) -> str:
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+class EtagManifest:
+    """``{file name: [etag, mtime_ns, size]}`` for one dossier directory."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, List[object]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path.exists():
+            try:
+                self._entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+
+    def record(self, path: Path, payload: bytes) -> str:
+        """Store the ETag of ``payload``, which was just written to ``path``."""
+
+        etag = strong_etag(payload)
+        stat = path.stat()
+        with self._lock:
+            self._entries[path.name] = [etag, stat.st_mtime_ns, stat.st_size]
+            self._dirty = True
+        return etag
+
+    def etag_for(self, path: Path, stat: Optional[os.stat_result] = None, payload: Optional[bytes] = None) -> str:
+        """The recorded ETag if ``path`` is unchanged since, otherwise a fresh one."""
+
+        stat = stat or path.stat()
+        with self._lock:
+            entry = self._entries.get(path.name)
+        if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+            return str(entry[0])
+        return self.record(path, payload if payload is not None else path.read_bytes())
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+            temporary.write_text(json.dumps(self._entries, sort_keys=True, separators=(",", ":")), encoding="utf-8")
+            os.replace(temporary, self.path)
+            self._dirty = False
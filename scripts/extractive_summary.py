@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Extractive summaries for heuristic (no-LLM) ingest runs, built with NumPy.
+
+``pmc_ingest.simple_summary`` used to keep the first three sentences of the
+abstract. This module instead scores every sentence of every section and
+keeps the best ones:
+
+1. Sentences from all documents in a batch are vectorised together into one
+   sparse TF-IDF matrix (COO arrays). IDF is computed over each document's
+   own sentences, so common words carry little weight without a stopword
+   list and a summary does not depend on which batch the document was in.
+2. ``textrank`` (default) ranks sentences with personalised PageRank over each
+   document's cosine-similarity graph. Graphs are padded into one
+   ``(documents, sentences, sentences)`` tensor and all documents are iterated
+   together with batched matrix products. A per-section prior, used both as
+   the teleport vector and to weight the final score, favours abstract,
+   results and conclusion sentences over methods. ``centroid`` instead scores each sentence by its similarity to its
+   document's TF-IDF centroid, computed for the whole batch with ``bincount``.
+3. The top sentences are picked greedily, skipping near-duplicates of ones
+   already chosen, and emitted in document order.
+
+Running the module directly rewrites ``summary`` for dossiers that still carry
+the old first-sentences summary (or every dossier with ``--all``):
+
+    python scripts/extractive_summary.py --json-dir data/papers --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from dossier_schema import save_dossier
+from metrics_engine import tokenize
+from prompt_budget import split_sentences
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("textrank", "centroid")
+DEFAULT_SENTENCES = 3
+MIN_SENTENCE_TOKENS = 6
+MAX_SENTENCE_TOKENS = 80
+MAX_SENTENCES_PER_DOCUMENT = 400
+DAMPING = 0.85
+MAX_ITERATIONS = 60
+TOLERANCE = 1e-6
+REDUNDANCY_THRESHOLD = 0.75
+BATCH_SIZE = 64
+TENSOR_BUDGET = 4_000_000
+SECTION_WEIGHTS: Dict[str, float] = {
+    "abstract": 1.0,
+    "results": 0.8,
+    "conclusion": 0.8,
+    "discussion": 0.6,
+    "introduction": 0.4,
+    "methods": 0.15,
+}
+DEFAULT_SECTION_WEIGHT = 0.3
+
+
+def candidate_sentences(sections: Mapping[str, str]) -> List[Tuple[str, List[str], float]]:
+    """``(sentence, tokens, prior)`` for every usable sentence, in document order."""
+
+    candidates = []
+    for name, text in sections.items():
+        if not isinstance(text, str) or not text:
+            continue
+        prior = SECTION_WEIGHTS.get(name, DEFAULT_SECTION_WEIGHT)
+        for sentence in split_sentences(text):
+            tokens = [token for token in tokenize(sentence) if len(token) > 2 and not token.isdigit()]
+            if MIN_SENTENCE_TOKENS <= len(tokens) <= MAX_SENTENCE_TOKENS:
+                candidates.append((sentence.strip(), tokens, prior))
+            if len(candidates) >= MAX_SENTENCES_PER_DOCUMENT:
+                return candidates
+    return candidates
+
+
+def _tfidf(
+    token_lists: Sequence[List[str]], owner: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """L2-normalised sublinear TF-IDF for all sentences as COO ``(rows, cols, values)``."""
+
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    if not rows:
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, 0
+
+    # Collapse repeated (row, col) pairs into term frequencies.
+    keys = np.asarray(rows, dtype=np.int64) * len(vocabulary) + np.asarray(cols, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    rows_arr, cols_arr = np.divmod(keys, len(vocabulary))
+
+    # Sentence frequency of each term within its own document.
+    documents = owner[rows_arr]
+    _, term_slot = np.unique(documents * len(vocabulary) + cols_arr, return_inverse=True)
+    sentence_frequency = np.bincount(term_slot)[term_slot]
+    document_sentences = np.bincount(owner)[documents]
+    idf = np.log((1 + document_sentences) / (1 + sentence_frequency)) + 1.0
+    values = (1.0 + np.log(counts)) * idf
+    norms = np.sqrt(np.bincount(rows_arr, weights=values**2, minlength=len(token_lists)))
+    values = values / np.maximum(norms[rows_arr], 1e-12)
+    return rows_arr, cols_arr, values, len(vocabulary)
+
+
+def _centroid_scores(
+    rows: np.ndarray, cols: np.ndarray, values: np.ndarray, owner: np.ndarray, n_terms: int
+) -> np.ndarray:
+    """Cosine similarity of every sentence to its document's TF-IDF centroid."""
+
+    n_sentences = len(owner)
+    if not len(rows):
+        return np.zeros(n_sentences)
+    documents = owner[rows]
+    keys, inverse = np.unique(documents * n_terms + cols, return_inverse=True)
+    centroid = np.bincount(inverse, weights=values)
+    centroid_norm = np.sqrt(np.bincount(keys // n_terms, weights=centroid**2))
+    dots = np.bincount(rows, weights=values * centroid[inverse], minlength=n_sentences)
+    return dots / np.maximum(centroid_norm[owner], 1e-12)
+
+
+def _similarity(rows: np.ndarray, cols: np.ndarray, values: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Dense cosine-similarity matrix for sentences ``start:stop`` of one document."""
+
+    lo, hi = np.searchsorted(rows, [start, stop])
+    local_terms, local_cols = np.unique(cols[lo:hi], return_inverse=True)
+    matrix = np.zeros((stop - start, len(local_terms)))
+    matrix[rows[lo:hi] - start, local_cols] = values[lo:hi]
+    return matrix @ matrix.T
+
+
+def _textrank(similarities: Sequence[np.ndarray], priors: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """Personalised PageRank for a batch of sentence graphs, iterated together."""
+
+    size = max(len(prior) for prior in priors)
+    batch = len(priors)
+    transition = np.zeros((batch, size, size))
+    teleport = np.zeros((batch, size))
+    for index, (similarity, prior) in enumerate(zip(similarities, priors)):
+        n = len(prior)
+        graph = similarity.copy()
+        np.fill_diagonal(graph, 0.0)
+        transition[index, :n, :n] = graph
+        teleport[index, :n] = prior / prior.sum()
+
+    out_weight = transition.sum(axis=2, keepdims=True)
+    dangling = out_weight[:, :, 0] == 0
+    transition = np.divide(transition, out_weight, out=np.zeros_like(transition), where=out_weight > 0)
+
+    rank = teleport.copy()
+    for _ in range(MAX_ITERATIONS):
+        lost = (rank * dangling).sum(axis=1, keepdims=True)
+        updated = (1 - DAMPING) * teleport + DAMPING * (np.einsum("bi,bij->bj", rank, transition) + lost * teleport)
+        if np.abs(updated - rank).sum(axis=1).max() < TOLERANCE:
+            rank = updated
+            break
+        rank = updated
+    return [rank[index, : len(prior)] for index, prior in enumerate(priors)]
+
+
+def _select(scores: np.ndarray, similarity: np.ndarray, count: int) -> List[int]:
+    chosen: List[int] = []
+    for position in np.argsort(-scores, kind="stable"):
+        if chosen and similarity[position, chosen].max() >= REDUNDANCY_THRESHOLD:
+            continue
+        chosen.append(int(position))
+        if len(chosen) == count:
+            break
+    return sorted(chosen)
+
+
+def summarize_batch(
+    documents: Sequence[Mapping[str, str]],
+    n_sentences: int = DEFAULT_SENTENCES,
+    method: str = "textrank",
+) -> List[str]:
+    """Extractive summaries for ``documents`` (each a ``sections`` mapping).
+
+    Returns ``""`` for a document with no usable sentences so callers can fall
+    back to another rule.
+    """
+
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {', '.join(METHODS)}")
+    candidates = [candidate_sentences(sections) for sections in documents]
+    bounds = np.cumsum([0] + [len(sentences) for sentences in candidates])
+    owner = np.repeat(np.arange(len(documents)), np.diff(bounds))
+    rows, cols, values, n_terms = _tfidf([tokens for sentences in candidates for _, tokens, _ in sentences], owner)
+
+    active = [index for index, sentences in enumerate(candidates) if sentences]
+    similarities = {index: _similarity(rows, cols, values, bounds[index], bounds[index + 1]) for index in active}
+    priors = {index: np.array([prior for _, _, prior in candidates[index]]) for index in active}
+
+    scores: Dict[int, np.ndarray] = {}
+    if method == "centroid":
+        centroid = _centroid_scores(rows, cols, values, owner, n_terms)
+        for index in active:
+            scores[index] = centroid[bounds[index] : bounds[index + 1]] * priors[index]
+    else:
+        # Group documents of similar length so padding stays small, and cap
+        # each padded (documents, n, n) tensor at TENSOR_BUDGET cells.
+        ordered = sorted(active, key=lambda index: len(candidates[index]))
+        start = 0
+        while start < len(ordered):
+            stop = start + 1
+            while (
+                stop < len(ordered)
+                and stop - start < BATCH_SIZE
+                and (stop + 1 - start) * len(candidates[ordered[stop]]) ** 2 <= TENSOR_BUDGET
+            ):
+                stop += 1
+            group, start = ordered[start:stop], stop
+            ranks = _textrank([similarities[index] for index in group], [priors[index] for index in group])
+            scores.update((index, rank * priors[index]) for index, rank in zip(group, ranks))
+
+    summaries = []
+    for index, sentences in enumerate(candidates):
+        if not sentences:
+            summaries.append("")
+            continue
+        chosen = _select(scores[index], similarities[index], n_sentences)
+        summaries.append(" ".join(sentences[position][0] for position in chosen))
+    return summaries
+
+
+def summarize_sections(
+    sections: Mapping[str, str],
+    n_sentences: int = DEFAULT_SENTENCES,
+    method: str = "textrank",
+) -> str:
+    return summarize_batch([sections], n_sentences=n_sentences, method=method)[0]
+
+
+def refresh_summaries(
+    json_dir: Path,
+    n_sentences: int = DEFAULT_SENTENCES,
+    method: str = "textrank",
+    rewrite_all: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 256,
+) -> Tuple[int, int]:
+    """Rewrite heuristic ``summary`` fields across ``json_dir``; returns ``(scanned, updated)``."""
+
+    from pmc_ingest import lead_summary
+
+    scanned = updated = 0
+    started = time.perf_counter()
+    paths = sorted(json_dir.glob("*.json"))
+    for offset in range(0, len(paths), batch_size):
+        batch: List[Tuple[Path, Dict[str, object]]] = []
+        for path in paths[offset : offset + batch_size]:
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+                continue
+            if not isinstance(data, dict):
+                continue
+            scanned += 1
+            sections = data.get("sections") or {}
+            current = data.get("summary") or ""
+            if rewrite_all or not current or current == lead_summary(sections):
+                batch.append((path, data))
+
+        summaries = summarize_batch(
+            [data.get("sections") or {} for _, data in batch], n_sentences=n_sentences, method=method
+        )
+        for (path, data), summary in zip(batch, summaries):
+            if not summary or summary == data.get("summary"):
+                continue
+            data["summary"] = summary
+            updated += 1
+            if not dry_run:
+                save_dossier(path, data)
+            logger.debug("Rewrote summary for %s", path.name)
+    logger.info(
+        "Scored %d dossiers, rewrote %d summaries in %.2fs",
+        scanned,
+        updated,
+        time.perf_counter() - started,
+    )
+    return scanned, updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite heuristic dossier summaries with extractive ranking")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--method", choices=METHODS, default="textrank", help="Sentence scoring method")
+    parser.add_argument("--sentences", type=int, default=DEFAULT_SENTENCES, help="Sentences per summary")
+    parser.add_argument("--all", action="store_true", help="Rewrite every summary, not only first-sentence ones")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without rewriting dossiers")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        refresh_summaries(
+            normalize_json_dir(args.json_dir),
+            n_sentences=args.sentences,
+            method=args.method,
+            rewrite_all=args.all,
+            dry_run=args.dry_run,
+        )
+    except Exception as exc:
+        logger.exception("Summary refresh failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Pluggable LLM providers for the ingest and summarisation scripts.
+
+Both ``pmc_ingest.OptionalLLM`` and ``summarize_jsons`` talk to an
+:class:`LLMBackend` instead of the OpenAI client directly:
+
+* :class:`OpenAIBackend` – the hosted OpenAI API (``OPENAI_API_KEY``). Schema
+  requests use the Responses API with strict structured outputs.
+* :class:`OpenAICompatibleBackend` – any server exposing
+  ``/v1/chat/completions`` (llama.cpp ``llama-server``, vLLM, Ollama, LM
+  Studio…), e.g. ``--llm-backend openai-compatible --llm-base-url
+  http://localhost:8080/v1``. Requests share one keep-alive connection pool.
+* :class:`FakeBackend` – deterministic, offline responses derived from the
+  prompt text (and the JSON schema, when given) for tests and benchmarks.
+
+``summarize_jsons`` sends its dossiers through :meth:`LLMBackend.complete_batch`,
+which keeps up to ``max_concurrency`` requests in flight so servers with
+continuous batching (``llama-server --parallel N``, vLLM) decode them
+together. ``pmc_ingest --pipeline`` gets the same effect from its enrich
+stage, which runs ``max_concurrency`` rows at once.
+
+Every backend reports token usage on the returned :class:`Completion` so the
+:class:`~prompt_budget.UsageLedger` keeps working; local models have no entry
+in ``MODEL_PRICING`` and are therefore logged without a cost.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from llm_control import AIMDLimiter, BackendController
+from prompt_budget import count_tokens, response_usage
+
+BACKENDS = ("openai", "openai-compatible", "fake")
+DEFAULT_BASE_URL = "http://localhost:8080/v1"
+DEFAULT_LOCAL_MODEL = "local"
+
+
+class BackendConfigError(RuntimeError):
+    """The selected backend cannot be constructed (missing key, package, URL)."""
+
+
+@dataclass
+class CompletionRequest:
+    prompt: str
+    max_tokens: Optional[int] = None
+    temperature: float = 0.2
+    schema: Optional[Dict[str, Any]] = None
+    schema_name: str = "response"
+    model: Optional[str] = None
+
+
+@dataclass
+class Completion:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMBackend(ABC):
+    """Base class: subclasses implement :meth:`complete` for one request."""
+
+    name = "base"
+
+    def __init__(self, model: str, max_concurrency: int = 4):
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+
+    @abstractmethod
+    def complete(self, request: CompletionRequest) -> Completion:
+        """Send one request and return its completion; errors propagate."""
+
+    def complete_batch(
+        self,
+        requests: Sequence[CompletionRequest],
+        controller: Optional[BackendController] = None,
+    ) -> List[Union[Completion, Exception]]:
+        """Run ``requests`` concurrently, returning results (or errors) in order."""
+
+        def run(request: CompletionRequest) -> Union[Completion, Exception]:
+            try:
+                if controller is not None:
+                    return controller.call(self.complete, request)
+                return self.complete(request)
+            except Exception as exc:  # returned, not raised, so one failure keeps the batch
+                return exc
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, max(1, len(requests)))) as pool:
+            return list(pool.map(run, requests))
+
+    def make_controller(self) -> BackendController:
+        """A controller whose concurrency window suits this backend."""
+
+        return BackendController(limiter=AIMDLimiter(initial=min(2, self.max_concurrency), maximum=self.max_concurrency))
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-4o-mini", api_key: Optional[str] = None, max_concurrency: int = 8):
+        super().__init__(model, max_concurrency)
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise BackendConfigError("OPENAI_API_KEY not set")
+        try:
+            from openai import OpenAI
+        except Exception as exc:  # pragma: no cover - optional path
+            raise BackendConfigError(f"openai package unavailable ({exc})") from exc
+        self.client = OpenAI(api_key=api_key)
+
+    def complete(self, request: CompletionRequest) -> Completion:
+        model = request.model or self.model
+        if request.schema is not None:
+            kwargs: Dict[str, Any] = {}
+            if request.max_tokens:
+                kwargs["max_output_tokens"] = request.max_tokens
+            response = self.client.responses.create(
+                model=model,
+                input=request.prompt,
+                temperature=request.temperature,
+                text={
+                    "format": {
+                        "type": "json_schema",
+                        "name": request.schema_name,
+                        "schema": request.schema,
+                        "strict": True,
+                    }
+                },
+                **kwargs,
+            )
+            text = response.output[0].content[0].text  # type: ignore[index]
+        else:
+            kwargs = {"max_tokens": request.max_tokens} if request.max_tokens else {}
+            response = self.client.chat.completions.create(
+                model=model,
+                temperature=request.temperature,
+                messages=[{"role": "user", "content": request.prompt}],
+                **kwargs,
+            )
+            text = response.choices[0].message.content or ""
+        return Completion(text.strip(), model, *response_usage(response))
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Chat Completions over plain HTTP against a self-hosted server."""
+
+    name = "openai-compatible"
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        model: str = DEFAULT_LOCAL_MODEL,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 4,
+        timeout: float = 300.0,
+    ):
+        super().__init__(model, max_concurrency)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if not base_url:
+            raise BackendConfigError("openai-compatible backend needs --llm-base-url (or LLM_BASE_URL)")
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        api_key = api_key or os.getenv("LLM_API_KEY")
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def complete(self, request: CompletionRequest) -> Completion:
+        model = request.model or self.model
+        body: Dict[str, Any] = {
+            "model": model,
+            "messages": [{"role": "user", "content": request.prompt}],
+            "temperature": request.temperature,
+        }
+        if request.max_tokens:
+            body["max_tokens"] = request.max_tokens
+        if request.schema is not None:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": request.schema_name, "schema": request.schema, "strict": True},
+            }
+        response = self.session.post(self.url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        text = ((data.get("choices") or [{}])[0].get("message") or {}).get("content") or ""
+        usage = data.get("usage") or {}
+        return Completion(
+            text.strip(),
+            # Not a hosted model name, so the usage ledger logs it without a price.
+            f"{self.name}:{model}",
+            int(usage.get("prompt_tokens") or 0),
+            int(usage.get("completion_tokens") or 0),
+        )
+
+    def make_controller(self) -> BackendController:
+        # No rate limits to discover: start at the configured parallelism and
+        # only back off if the server starts rejecting or stalling requests.
+        return BackendController(limiter=AIMDLimiter(initial=self.max_concurrency, maximum=self.max_concurrency))
+
+
+_FAKE_WORD = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic offline responses for tests and benchmarks.
+
+    Text is assembled from words of the prompt chosen by its SHA-256 digest,
+    so identical prompts always yield identical output. With a ``schema`` the
+    response is a JSON document that satisfies it. ``latency`` adds a fixed
+    delay per request and ``fail_every`` makes every n-th request raise a
+    transient ``ConnectionError``, to exercise the circuit breaker and retry
+    paths.
+    """
+
+    name = "fake"
+
+    def __init__(self, model: str = "fake", max_concurrency: int = 8, latency: float = 0.0, fail_every: int = 0):
+        super().__init__(model, max_concurrency)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+
+    def complete(self, request: CompletionRequest) -> Completion:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise ConnectionError(f"fake backend failure on call {self.calls}")
+
+        words = _FAKE_WORD.findall(request.prompt) or ["fake"]
+        seed = int.from_bytes(hashlib.sha256(request.prompt.encode("utf-8")).digest()[:8], "big")
+        if request.schema is not None:
+            text = json.dumps(_fake_value(request.schema, words, seed), ensure_ascii=False)
+        else:
+            text = _fake_text(words, seed, min(request.max_tokens or 150, 150))
+        return Completion(
+            text,
+            f"{self.name}:{request.model or self.model}",
+            count_tokens(request.prompt),
+            count_tokens(text),
+        )
+
+
+def _fake_text(words: Sequence[str], seed: int, length: int) -> str:
+    start = seed % len(words)
+    picked = [words[(start + offset) % len(words)] for offset in range(max(1, min(length, len(words))))]
+    return " ".join(picked).capitalize() + "."
+
+
+def _fake_value(schema: Mapping[str, Any], words: Sequence[str], seed: int, length: int = 24) -> Any:
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((candidate for candidate in kind if candidate != "null"), "null")
+    if kind == "object":
+        return {
+            key: _fake_value(subschema, words, seed + index, length)
+            for index, (key, subschema) in enumerate((schema.get("properties") or {}).items())
+        }
+    if kind == "array":
+        count = min(int(schema.get("maxItems", 3)), 3)
+        # Array items (keywords, tags) are single words rather than sentences.
+        items = schema.get("items") or {"type": "string"}
+        return [_fake_value(items, words, seed + index * 7919, 1) for index in range(count)]
+    if kind == "string":
+        text = _fake_text(words, seed, length)
+        return text.rstrip(".").lower() if length == 1 else text
+    if kind == "integer":
+        return int(schema.get("minimum", 0))
+    if kind == "number":
+        return float(schema.get("minimum", 0))
+    if kind == "boolean":
+        return bool(seed & 1)
+    return None
+
+
+def create_backend(
+    kind: str = "openai",
+    model: Optional[str] = None,
+    base_url: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+) -> LLMBackend:
+    """Build the backend named ``kind`` (one of :data:`BACKENDS`).
+
+    Raises :class:`BackendConfigError` when it cannot be configured.
+    """
+
+    extra: Dict[str, Any] = {"max_concurrency": max_concurrency} if max_concurrency else {}
+    if kind == "openai":
+        return OpenAIBackend(model=model or "gpt-4o-mini", **extra)
+    if kind == "openai-compatible":
+        return OpenAICompatibleBackend(
+            base_url=base_url or os.getenv("LLM_BASE_URL") or DEFAULT_BASE_URL,
+            model=model or os.getenv("LLM_MODEL") or DEFAULT_LOCAL_MODEL,
+            **extra,
+        )
+    if kind == "fake":
+        return FakeBackend(model=model or "fake", **extra)
+    raise BackendConfigError(f"Unknown LLM backend {kind!r}; expected one of {', '.join(BACKENDS)}")
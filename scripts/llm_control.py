@@ -0,0 +1,282 @@
+"""Shared health and concurrency control for LLM backends.
+
+A single failed request used to disable the LLM for the rest of a run
+(``OptionalLLM``) while ``summarize_jsons`` kept hammering both models for
+every file during an outage. :class:`BackendController` replaces both
+behaviours:
+
+* :class:`CircuitBreaker` – ``closed`` while requests succeed; ``open`` after
+  ``failure_threshold`` consecutive transient failures (timeouts, connection
+  errors, 429, 5xx – see :func:`is_transient_error`), rejecting calls immediately;
+  ``half_open`` once ``reset_timeout`` has elapsed, letting a single probe
+  through to decide whether to close again.
+* :class:`AIMDLimiter` – additive-increase / multiplicative-decrease bound on
+  in-flight requests. Each success grows the window by ``1/limit``; a 429 or a
+  response slower than ``latency_target`` halves it.
+* :class:`RetryQueue` – items that failed (or were rejected by an open
+  breaker) are parked and replayed at the end of the run once the breaker
+  allows traffic again.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+from run_metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailable(RuntimeError):
+    """Raised instead of calling the backend while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM backend circuit open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    return getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """Best-effort detection of HTTP 429 / rate-limit errors across clients."""
+
+    return _status_code(exc) == 429 or "ratelimit" in type(exc).__name__.lower()
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether ``exc`` says the backend is unhealthy rather than the request bad.
+
+    Timeouts, connection errors, 408, 429 and 5xx responses count; other 4xx
+    responses (bad request, bad key, schema rejected) and local errors do not,
+    since retrying later would fail the same way.
+    """
+
+    status = _status_code(exc)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    if is_throttle_error(exc) or isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # requests / openai / httpx timeout and connection error classes.
+    names = " ".join(cls.__name__.lower() for cls in type(exc).__mro__)
+    return "timeout" in names or "connection" in names
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("LLM circuit half-open: probing backend")
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("LLM circuit closed: backend recovered")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(
+                        "LLM circuit open after %d consecutive failure(s); pausing for %.1fs",
+                        self._failures,
+                        self.reset_timeout,
+                    )
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+class AIMDLimiter:
+    def __init__(
+        self,
+        initial: int = 2,
+        minimum: int = 1,
+        maximum: int = 8,
+        backoff: float = 0.5,
+        latency_target: Optional[float] = None,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self._window = float(max(minimum, min(initial, maximum)))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self._window))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self, latency: float) -> None:
+        if self.latency_target is not None and latency > self.latency_target:
+            self._decrease("latency %.1fs above %.1fs target" % (latency, self.latency_target))
+            return
+        with self._cond:
+            self._window = min(float(self.maximum), self._window + 1.0 / self._window)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        self._decrease("rate limited")
+
+    def _decrease(self, reason: str) -> None:
+        with self._cond:
+            before = self.limit
+            self._window = max(float(self.minimum), self._window * self.backoff)
+            if self.limit != before:
+                logger.info("LLM concurrency %d -> %d (%s)", before, self.limit, reason)
+
+
+class BackendController:
+    """Routes every LLM call through a circuit breaker and an AIMD limiter."""
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[AIMDLimiter] = None,
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or AIMDLimiter()
+
+    def call(self, fn: Callable[..., T], *args: object, **kwargs: object) -> T:
+        if not self.breaker.allow():
+            raise BackendUnavailable(self.breaker.retry_after())
+        with self.limiter.slot():
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                METRICS.llm_seconds.observe(time.monotonic() - started, outcome="error")
+                METRICS.failures.inc(stage="llm")
+                if is_throttle_error(exc):
+                    self.limiter.on_throttle()
+                if is_transient_error(exc):
+                    self.breaker.record_failure()
+                else:
+                    # The backend answered; only this request is bad.
+                    self.breaker.record_success()
+                raise
+            elapsed = time.monotonic() - started
+            METRICS.llm_seconds.observe(elapsed, outcome="ok")
+            self.limiter.on_success(elapsed)
+            self.breaker.record_success()
+            return result
+
+
+class RetryQueue(Generic[T]):
+    """Items to replay later in the run, keyed so repeats replace earlier entries."""
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+        self._items: "OrderedDict[Hashable, T]" = OrderedDict()
+        self._attempts: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, key: Hashable, item: T) -> bool:
+        """Queue ``item``; returns ``False`` once it has used up its attempts."""
+
+        attempts = self._attempts.get(key, 0) + 1
+        self._attempts[key] = attempts
+        if attempts > self.max_attempts:
+            logger.warning("Giving up on %s after %d attempts", key, attempts - 1)
+            self._items.pop(key, None)
+            return False
+        self._items[key] = item
+        return True
+
+    def drain(self, controller: BackendController, max_wait: float = 120.0) -> Iterator[Tuple[Hashable, T]]:
+        """Yield queued items, sleeping while the breaker is open.
+
+        Stops early (leaving items queued) if the breaker would stay open for
+        longer than ``max_wait`` seconds.
+        """
+
+        while self._items:
+            wait = controller.breaker.retry_after()
+            if wait > max_wait:
+                logger.warning("LLM backend still unavailable; leaving %d item(s) unretried", len(self._items))
+                return
+            if wait:
+                logger.info("Waiting %.1fs for the LLM circuit before retrying %d item(s)", wait, len(self._items))
+                time.sleep(wait)
+            key, item = self._items.popitem(last=False)
+            yield key, item
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Publication-year resolution and a metadata-only repair pass for dossiers.
+
+``extract_meta_from_html`` used to read only ``citation_date``, which PMC
+pages do not carry, so most dossiers were written with ``"year": null``.
+:func:`resolve_year` now tries, in order:
+
+1. ``citation_publication_date`` / ``citation_date`` meta tags
+2. Dublin Core ``DC.date`` (and ``DC.date.issued``) meta tags
+3. ``datePublished`` / ``dateCreated`` in JSON-LD blocks
+4. the article history block ("Issue date 2019 Nov; Accepted …")
+
+``pmc_ingest`` then falls back to the CSV row. Anything still missing can be
+resolved in batches from a metadata endpoint: NCBI E-utilities ``esummary``
+(or a local server speaking the same JSON) via ``--endpoint``, or a static
+``{"PMC123": 2019}`` file via ``--metadata-file`` for offline runs.
+
+The repair pass rewrites only ``year`` (and ``metrics.publication_year``) in
+existing dossiers. It reads just the ``<head>`` and history block of each
+cached HTML file rather than re-parsing the article body:
+
+    python scripts/metadata_repair.py --json-dir data/papers --raw-dir data/raw_pmc
+    python scripts/metadata_repair.py --endpoint https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import re
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+MIN_YEAR = 1900
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+META_SOURCES: Sequence[Tuple[str, Sequence[str]]] = (
+    ("citation_publication_date", ("citation_publication_date",)),
+    ("citation_date", ("citation_date",)),
+    ("dc_date", ("dc.date", "dc.date.issued", "dcterms.issued")),
+)
+JSON_LD_KEYS = ("datePublished", "dateCreated")
+# Most to least representative of the publication year.
+HISTORY_LABELS = ("published", "epub", "issue date", "collection date", "accepted", "received")
+CSV_YEAR_KEYS = ("year", "Year", "publication_year", "Publication Year", "date", "Date")
+ENDPOINT_BATCH_SIZE = 200
+
+_HEAD = re.compile(r"<head\b.*?</head>", re.IGNORECASE | re.DOTALL)
+_HISTORY = re.compile(r"<section[^>]*class=\"[^\"]*\bhistory\b[^\"]*\"[^>]*>.*?</section>", re.IGNORECASE | re.DOTALL)
+
+
+def parse_year(value: object) -> Optional[int]:
+    """First plausible four-digit year in ``value`` (ISO dates, "2023 Nov 8", …)."""
+
+    if isinstance(value, int) and not isinstance(value, bool):
+        candidates = [value]
+    elif isinstance(value, str):
+        candidates = [int(match.group(0)) for match in YEAR_PATTERN.finditer(value)]
+    else:
+        return None
+    latest = date.today().year + 1
+    for year in candidates:
+        if MIN_YEAR <= year <= latest:
+            return year
+    return None
+
+
+def _meta_content(metas: Sequence[Tuple[str, str]], names: Sequence[str]) -> Optional[str]:
+    for name, content in metas:
+        if name in names and content:
+            return content
+    return None
+
+
+def _json_ld_dates(scripts: Iterable[str]) -> Iterable[str]:
+    for text in scripts:
+        try:
+            data = json.loads(text or "")
+        except json.JSONDecodeError:
+            continue
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+            elif isinstance(node, dict):
+                for key in JSON_LD_KEYS:
+                    if isinstance(node.get(key), str):
+                        yield node[key]
+                if "@graph" in node:
+                    stack.append(node["@graph"])
+
+
+def _history_year(history: Optional[str]) -> Optional[int]:
+    if history is None:
+        return None
+    events: Dict[str, str] = {}
+    for part in history.split(";"):
+        match = re.match(r"\s*([A-Za-z ]+?)\s+((?:19|20)\d{2}.*)", part)
+        if match:
+            events.setdefault(match.group(1).strip().lower(), match.group(2))
+    for label in HISTORY_LABELS:
+        for event, value in events.items():
+            if event.startswith(label):
+                year = parse_year(value)
+                if year:
+                    return year
+    return None
+
+
+def resolve_year_from(
+    metas: Sequence[Tuple[str, str]],
+    json_ld: Iterable[str] = (),
+    history: Optional[str] = None,
+) -> Tuple[Optional[int], Optional[str]]:
+    """:func:`resolve_year` over already-extracted parts of a page.
+
+    ``metas`` holds ``(lower-cased name or property, content)`` pairs in
+    document order, ``json_ld`` the bodies of ``application/ld+json`` scripts
+    and ``history`` the text of the history section. Used by extractors that
+    never build a soup.
+    """
+
+    for source, names in META_SOURCES:
+        year = parse_year(_meta_content(metas, names))
+        if year:
+            return year, source
+    for value in _json_ld_dates(json_ld):
+        year = parse_year(value)
+        if year:
+            return year, "json_ld"
+    year = _history_year(history)
+    if year:
+        return year, "history"
+    return None, None
+
+
+def resolve_year(soup: BeautifulSoup) -> Tuple[Optional[int], Optional[str]]:
+    """Return ``(year, source)`` from the first source in the chain that has one."""
+
+    metas = [
+        ((tag.get("name") or tag.get("property") or "").strip().lower(), tag.get("content") or "")
+        for tag in soup.find_all("meta")
+    ]
+    scripts = [script.string or "" for script in soup.find_all("script", attrs={"type": "application/ld+json"})]
+    block = soup.find("section", class_="history")
+    history = block.get_text(" ", strip=True) if block is not None else None
+    return resolve_year_from(metas, scripts, history)
+
+
+def metadata_soup(html: str) -> BeautifulSoup:
+    """A small soup holding only ``<head>`` and the history block of ``html``.
+
+    Enough for :func:`resolve_year` at a fraction of the cost of parsing the
+    whole article.
+    """
+
+    pieces = [match.group(0) for match in (_HEAD.search(html), _HISTORY.search(html)) if match]
+    return BeautifulSoup("".join(pieces), "lxml")
+
+
+def row_year(row: Mapping[str, object]) -> Optional[int]:
+    for key in CSV_YEAR_KEYS:
+        year = parse_year(str(row.get(key) or ""))
+        if year:
+            return year
+    return None
+
+
+class MetadataEndpoint:
+    """Batched year lookup against an E-utilities ``esummary``-style endpoint.
+
+    Requests ``GET <url>?db=pmc&retmode=json&id=<numeric ids>`` for up to
+    ``batch_size`` PMCIDs at a time and reads ``pubdate`` / ``epubdate`` from
+    each ``result[<uid>]`` entry. A batch that fails is logged and skipped,
+    so the years from the other batches are still returned.
+    """
+
+    def __init__(self, url: str, batch_size: int = ENDPOINT_BATCH_SIZE, delay: float = 0.34):
+        from pmc_ingest import make_session
+
+        self.url = url
+        self.batch_size = batch_size
+        self.delay = delay
+        self.session = make_session()
+
+    def resolve(self, pmcids: Sequence[str]) -> Dict[str, int]:
+        years: Dict[str, int] = {}
+        for start in range(0, len(pmcids), self.batch_size):
+            batch = pmcids[start : start + self.batch_size]
+            ids = ",".join(pmcid.upper().replace("PMC", "") for pmcid in batch)
+            try:
+                response = self.session.get(self.url, params={"db": "pmc", "retmode": "json", "id": ids}, timeout=60)
+                response.raise_for_status()
+                result = response.json().get("result") or {}
+            except (requests.RequestException, ValueError) as exc:
+                logger.error("Metadata endpoint failed for %d PMCID(s) starting at %s: %s", len(batch), batch[0], exc)
+                result = {}
+            for uid in result.get("uids") or []:
+                entry = result.get(uid) or {}
+                year = parse_year(entry.get("pubdate")) or parse_year(entry.get("epubdate"))
+                if year:
+                    years[f"PMC{uid}"] = year
+            logger.info("Metadata endpoint resolved %d/%d PMCIDs", len(years), start + len(batch))
+            if start + self.batch_size < len(pmcids):
+                time.sleep(self.delay)
+        return years
+
+
+class StaticMetadata:
+    """Offline stand-in for :class:`MetadataEndpoint` backed by ``{pmcid: year}``."""
+
+    def __init__(self, mapping: Mapping[str, object]):
+        self.years = {pmcid.upper(): year for pmcid, year in mapping.items() if parse_year(year)}
+
+    @classmethod
+    def load(cls, path: Path) -> "StaticMetadata":
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def resolve(self, pmcids: Sequence[str]) -> Dict[str, int]:
+        return {pmcid: parse_year(self.years[pmcid.upper()]) for pmcid in pmcids if pmcid.upper() in self.years}
+
+
+def load_csv_years(csv_path: Path) -> Dict[str, int]:
+    """``{pmcid: year}`` for CSV rows that carry a year column."""
+
+    from pmc_ingest import derive_pmcid
+
+    years: Dict[str, int] = {}
+    with csv_path.open("r", encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle):
+            pmcid = derive_pmcid(row)
+            year = row_year(row)
+            if pmcid and year:
+                years[pmcid] = year
+    return years
+
+
+def repair_corpus(
+    json_dir: Path,
+    raw_dir: Path,
+    csv_path: Optional[Path] = None,
+    source: Optional[object] = None,
+    recompute: bool = False,
+    dry_run: bool = False,
+) -> Counter:
+    """Fill in missing ``year`` values; returns a count per resolution source.
+
+    ``source`` is a :class:`MetadataEndpoint` or :class:`StaticMetadata` used
+    for whatever the cached HTML and the CSV cannot answer. With ``recompute``
+    every dossier is re-resolved, not only those without a year.
+    """
+
+    # dossier_schema imports this module for parse_year.
+    from dossier_schema import save_dossier
+
+    started = time.perf_counter()
+    csv_years = load_csv_years(csv_path) if csv_path and csv_path.exists() else {}
+    resolved: Dict[Path, Tuple[Dict[str, object], int, str]] = {}
+    unresolved: Dict[str, Tuple[Path, Dict[str, object]]] = {}
+    stats: Counter = Counter()
+
+    for path in sorted(json_dir.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        if not isinstance(data, dict):
+            continue
+        stats["scanned"] += 1
+        if parse_year(data.get("year")) and not recompute:
+            continue
+        pmcid = str(data.get("pmcid") or "").upper()
+        year, origin = None, None
+        raw_path = raw_dir / f"{pmcid}.html"
+        if pmcid and raw_path.exists():
+            year, origin = resolve_year(metadata_soup(raw_path.read_text(encoding="utf-8", errors="ignore")))
+        if not year and pmcid in csv_years:
+            year, origin = csv_years[pmcid], "csv"
+        if year:
+            resolved[path] = (data, year, origin)
+        elif pmcid:
+            unresolved[pmcid] = (path, data)
+        else:
+            stats["unresolved"] += 1
+
+    if unresolved and source is not None:
+        try:
+            found = source.resolve(sorted(unresolved))
+        except Exception as exc:
+            logger.error("Metadata endpoint failed: %s", exc)
+            found = {}
+        for pmcid, year in found.items():
+            path, data = unresolved.pop(pmcid)
+            resolved[path] = (data, year, "endpoint")
+    stats["unresolved"] += len(unresolved)
+
+    for path, (data, year, origin) in resolved.items():
+        stats[origin] += 1
+        if data.get("year") == year:
+            continue
+        stats["updated"] += 1
+        logger.debug("%s: year %s -> %d (%s)", path.name, data.get("year"), year, origin)
+        data["year"] = year
+        if isinstance(data.get("metrics"), dict):
+            data["metrics"]["publication_year"] = year
+        if not dry_run:
+            save_dossier(path, data)
+    for pmcid in sorted(unresolved):
+        logger.warning("No publication year found for %s (%s)", pmcid, unresolved[pmcid][0].name)
+
+    sources = ", ".join(f"{name}={stats[name]}" for name in sorted(stats) if name not in ("scanned", "updated", "unresolved"))
+    logger.info(
+        "Metadata repair: %d scanned, %d updated, %d unresolved (%s) in %.2fs",
+        stats["scanned"],
+        stats["updated"],
+        stats["unresolved"],
+        sources or "nothing to resolve",
+        time.perf_counter() - started,
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill in missing publication years without re-ingesting")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--raw-dir", type=Path, default=Path("data/raw_pmc"), help="Directory for cached raw HTML")
+    parser.add_argument("--csv", type=Path, default=Path("resources/SB_publication_PMC.csv"), help="CSV used as the fallback source")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--endpoint", default=None, help="esummary-compatible URL for batched lookups of anything still missing")
+    source.add_argument("--metadata-file", type=Path, default=None, help='Offline {"PMC123": 2019} mapping used instead of an endpoint')
+    parser.add_argument("--all", action="store_true", help="Re-resolve every dossier, not only those missing a year")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without rewriting dossiers")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    lookup: Optional[object] = None
+    if args.endpoint:
+        lookup = MetadataEndpoint(args.endpoint)
+    elif args.metadata_file:
+        lookup = StaticMetadata.load(args.metadata_file)
+    try:
+        repair_corpus(
+            normalize_json_dir(args.json_dir),
+            args.raw_dir,
+            csv_path=args.csv,
+            source=lookup,
+            recompute=args.all,
+            dry_run=args.dry_run,
+        )
+    except Exception as exc:
+        logger.exception("Metadata repair failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
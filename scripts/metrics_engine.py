@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Single-pass text metrics for Astro Genesis dossiers.
+
+Each section is lowercased and tokenized exactly once. Keyword occurrences are
+then looked up in the per-section token counter, so every keyword is counted
+on token boundaries ("rat" no longer matches "ratio") across all sections in
+one pass, regardless of how many keywords a dossier carries.
+
+``compute_metrics`` produces the ``metrics`` block written by
+``pmc_ingest.build_metrics``:
+
+``keyword_counts``
+    Total occurrences per keyword across all sections.
+``keyword_counts_by_section``
+    Non-zero occurrences per section.
+``keyword_density``
+    Occurrences per 1,000 tokens of the whole document.
+``section_tokens`` / ``section_chars``
+    Length of every section in tokens and characters.
+
+Running the module directly recomputes the metrics for the whole corpus:
+
+    python scripts/metrics_engine.py --json-dir data/papers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from dossier_schema import save_dossier
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+DENSITY_SCALE = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ``text`` once and split it into word tokens."""
+
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class KeywordMatcher:
+    """Counts a fixed keyword list against token streams.
+
+    Single-token keywords are answered from a :class:`~collections.Counter`
+    built once per section. Multi-word keywords ("space station") are matched
+    as token sequences, scanning only the positions where their first token
+    occurs.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._unigrams: Dict[str, List[str]] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for keyword in keywords:
+            if not isinstance(keyword, str) or keyword in self.keywords:
+                continue
+            parts = tuple(tokenize(keyword))
+            if not parts:
+                continue
+            self.keywords.append(keyword)
+            if len(parts) == 1:
+                self._unigrams.setdefault(parts[0], []).append(keyword)
+            else:
+                self._phrases.setdefault(parts[0], []).append((parts, keyword))
+
+    def count(self, tokens: Sequence[str]) -> Dict[str, int]:
+        counts = dict.fromkeys(self.keywords, 0)
+        if not tokens:
+            return counts
+
+        frequencies = Counter(tokens)
+        for token, keywords in self._unigrams.items():
+            hits = frequencies.get(token, 0)
+            if hits:
+                for keyword in keywords:
+                    counts[keyword] += hits
+
+        if self._phrases:
+            for position, token in enumerate(tokens):
+                candidates = self._phrases.get(token)
+                if not candidates:
+                    continue
+                for parts, keyword in candidates:
+                    if tuple(tokens[position : position + len(parts)]) == parts:
+                        counts[keyword] += 1
+        return counts
+
+
+def compute_metrics(
+    sections: Mapping[str, object],
+    keywords: Optional[Sequence[str]] = None,
+    year: Optional[int] = None,
+) -> Dict[str, object]:
+    """Return the dossier ``metrics`` block for ``sections`` and ``keywords``."""
+
+    metrics: Dict[str, object] = {}
+    if year:
+        metrics["publication_year"] = year
+
+    matcher = KeywordMatcher(keywords or [])
+    section_tokens: Dict[str, int] = {}
+    section_chars: Dict[str, int] = {}
+    totals = dict.fromkeys(matcher.keywords, 0)
+    by_section: Dict[str, Dict[str, int]] = {}
+
+    for name, value in sections.items():
+        text = value if isinstance(value, str) else ""
+        tokens = tokenize(text)
+        section_tokens[name] = len(tokens)
+        section_chars[name] = len(text)
+        if not matcher.keywords:
+            continue
+        counts = matcher.count(tokens)
+        hits = {keyword: count for keyword, count in counts.items() if count}
+        if hits:
+            by_section[name] = hits
+            for keyword, count in hits.items():
+                totals[keyword] += count
+
+    metrics["section_tokens"] = section_tokens
+    metrics["section_chars"] = section_chars
+
+    if matcher.keywords:
+        total_tokens = sum(section_tokens.values())
+        metrics["keyword_counts"] = totals
+        metrics["keyword_counts_by_section"] = by_section
+        metrics["keyword_density"] = {
+            keyword: round(count * DENSITY_SCALE / total_tokens, 3) if total_tokens else 0.0
+            for keyword, count in totals.items()
+        }
+    return metrics
+
+
+# Keys of the ``metrics`` block written by :func:`compute_metrics`.
+OWNED_KEYS = frozenset(
+    {
+        "publication_year",
+        "section_tokens",
+        "section_chars",
+        "keyword_counts",
+        "keyword_counts_by_section",
+        "keyword_density",
+    }
+)
+
+
+def refresh_dossier(data: Dict[str, object]) -> bool:
+    """Recompute ``data['metrics']`` in place. Returns ``True`` if it changed.
+
+    Keys written by other stages (e.g. ``section_lengths`` from
+    ``summarize_jsons``) are preserved.
+    """
+
+    sections = data.get("sections") if isinstance(data.get("sections"), dict) else {}
+    keywords = data.get("keywords") if isinstance(data.get("keywords"), list) else []
+    year = data.get("year") if isinstance(data.get("year"), int) else None
+
+    existing = data.get("metrics") if isinstance(data.get("metrics"), dict) else {}
+    # Replace everything this module owns, so counts for removed keywords (or
+    # a removed year) do not linger; keep only other stages' keys.
+    updated = {key: value for key, value in existing.items() if key not in OWNED_KEYS}
+    updated.update(compute_metrics(sections, keywords, year))
+    if updated == existing:
+        return False
+    data["metrics"] = updated
+    return True
+
+
+def refresh_corpus(json_dir: Path, dry_run: bool = False) -> Tuple[int, int]:
+    """Recompute metrics for every dossier in ``json_dir``.
+
+    Returns ``(scanned, updated)``.
+    """
+
+    scanned = updated = 0
+    started = time.perf_counter()
+    for path in sorted(json_dir.glob("*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        if not isinstance(data, dict):
+            continue
+        scanned += 1
+        if refresh_dossier(data):
+            updated += 1
+            if not dry_run:
+                save_dossier(path, data)
+            logger.debug("Refreshed metrics for %s", path.name)
+    logger.info(
+        "Recomputed metrics for %d dossiers (%d changed) in %.2fs",
+        scanned,
+        updated,
+        time.perf_counter() - started,
+    )
+    return scanned, updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute keyword and section metrics for every dossier")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without rewriting dossiers")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        refresh_corpus(normalize_json_dir(args.json_dir), dry_run=args.dry_run)
+    except Exception as exc:
+        logger.exception("Metric refresh failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""SQLite cache of parsed PMC articles.
+
+``pmc_ingest`` caches raw HTML, but every run still rebuilt the BeautifulSoup
+tree and re-ran ``extract_meta_from_html`` / ``parse_sections`` for each
+document. :class:`ParseCache` stores their output (meta, links, sections) as
+zlib-compressed JSON, keyed by the SHA-256 of the raw HTML and the
+extractor version, so the LLM and heuristic stages can be re-run without
+parsing anything. Bumping ``pmc_ingest.EXTRACTOR_VERSION`` after a parser
+change misses every old entry; editing a cached HTML file misses just that
+document.
+
+    python scripts/parse_cache.py stats
+    python scripts/parse_cache.py prune --keep-version 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path("data/parse_cache.sqlite")
+# Several ingest processes (``shard_merge.py run-local``) share one cache file;
+# writers wait this long for the lock before giving up on a cache write.
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# (meta, links, sections) as returned by ``pmc_ingest.parse_article``.
+ParsedArticle = Tuple[Dict[str, object], Dict[str, str], Dict[str, str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed (
+    html_sha256 TEXT NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    pmcid TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (html_sha256, extractor_version)
+)
+"""
+
+
+DIGEST_CHUNK_SIZE = 1 << 16
+
+
+def html_digest(html: Union[str, Path]) -> str:
+    """SHA-256 of the HTML text, or of a cached file's bytes read in chunks."""
+
+    if isinstance(html, Path):
+        digest = hashlib.sha256()
+        with html.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(DIGEST_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """Maps ``(sha256(html), extractor_version)`` to a parsed article."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "ParseCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, pmcid: str, html: Union[str, Path], version: int) -> Optional[ParsedArticle]:
+        digest = html_digest(html)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT pmcid, payload FROM parsed WHERE html_sha256 = ? AND extractor_version = ?",
+                    (digest, version),
+                ).fetchone()
+            except sqlite3.OperationalError as exc:
+                logger.warning("Parse cache read failed for %s (treating as a miss): %s", pmcid, exc)
+                row = None
+            # Identical HTML filed under another PMCID would carry the wrong
+            # canonical links, so treat it as a miss.
+            if row is None or row[0] != pmcid:
+                self.misses += 1
+                return None
+            self.hits += 1
+        data = json.loads(zlib.decompress(row[1]).decode("utf-8"))
+        return data["meta"], data["links"], data["sections"]
+
+    def put(self, pmcid: str, html: Union[str, Path], version: int, parsed: ParsedArticle) -> None:
+        meta, links, sections = parsed
+        payload = zlib.compress(
+            json.dumps({"meta": meta, "links": links, "sections": sections}, ensure_ascii=False).encode("utf-8")
+        )
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?, ?)",
+                    (html_digest(html), version, pmcid, payload, time.time()),
+                )
+                self._conn.commit()
+            except sqlite3.OperationalError as exc:
+                # A lost cache entry only costs a re-parse next run.
+                self._conn.rollback()
+                logger.warning("Could not cache parse of %s: %s", pmcid, exc)
+
+    def prune(self, keep_version: int) -> int:
+        """Delete entries written by other extractor versions; returns the count."""
+
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM parsed WHERE extractor_version != ?", (keep_version,))
+            self._conn.commit()
+            removed = cursor.rowcount
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> List[Tuple[int, int, int]]:
+        """``(extractor_version, entries, compressed_bytes)`` per version."""
+
+        with self._lock:
+            return self._conn.execute(
+                "SELECT extractor_version, COUNT(*), SUM(LENGTH(payload)) FROM parsed "
+                "GROUP BY extractor_version ORDER BY extractor_version"
+            ).fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or prune the parsed-article cache")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH, help="SQLite cache file")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Entries and size per extractor version")
+    prune = subparsers.add_parser("prune", help="Drop entries from other extractor versions")
+    prune.add_argument("--keep-version", type=int, default=None, help="Version to keep (default: current)")
+    args = parser.parse_args()
+
+    from pmc_ingest import EXTRACTOR_VERSION, configure_logging
+
+    configure_logging(args.verbose, args.quiet)
+    if not args.cache.exists():
+        logger.error("No parse cache at %s", args.cache)
+        raise SystemExit(1)
+
+    with ParseCache(args.cache) as cache:
+        if args.command == "stats":
+            for version, entries, size in cache.stats():
+                marker = " (current)" if version == EXTRACTOR_VERSION else ""
+                print(f"extractor v{version}{marker}: {entries} articles, {size / 1024:.1f} KiB compressed")
+        else:
+            keep = EXTRACTOR_VERSION if args.keep_version is None else args.keep_version
+            logger.info("Removed %d stale entries (kept extractor v%d)", cache.prune(keep), keep)
+
+
+if __name__ == "__main__":
+    main()
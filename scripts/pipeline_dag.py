@@ -0,0 +1,239 @@
+"""Staged producer/consumer runner used by ``pmc_ingest --pipeline``.
+
+A :class:`Pipeline` is a linear DAG of :class:`Stage` objects connected by
+bounded queues. Each stage runs ``workers`` threads; stages marked
+``processes=True`` hand their payloads to a process pool (for CPU-bound work
+such as HTML parsing) while the threads only wait on the result; the pool
+never forks the threaded parent (see :func:`process_context`), so stage
+functions must be importable module-level callables. Because
+every queue is bounded, a slow stage blocks its upstream producers instead of
+letting work pile up in memory, and a window of ``max_in_flight`` items bounds
+the reorder buffer in front of the sink.
+
+Items are numbered as they leave the source and the sink is called strictly in
+that order, so output ordering (and anything derived from it, such as record
+ids) is the same as a serial loop. A stage function returning ``None`` (or
+raising) drops the item; later stages skip it and the sink never sees it.
+
+Per-stage metrics – items, busy time, time spent blocked on a full downstream
+queue, and sampled input-queue depth – are collected for every run;
+:func:`format_report` renders them and names the likely bottleneck.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+_DROPPED = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    processes: bool = False
+    queue_size: int = 16
+    # Items for which this returns True skip ``fn`` (e.g. already parsed).
+    bypass: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    workers: int
+    processed: int = 0
+    dropped: int = 0
+    errors: int = 0
+    busy: float = 0.0
+    blocked: float = 0.0
+    depth_samples: int = 0
+    depth_total: int = 0
+    max_depth: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+    def utilisation(self, wall: float) -> float:
+        return self.busy / (self.workers * wall) if wall > 0 else 0.0
+
+    def sample(self, depth: int) -> None:
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+
+def process_context() -> "multiprocessing.context.BaseContext":
+    """Start method for stage process pools.
+
+    Pool workers start lazily, once the stage threads (and their HTTP/LLM
+    sessions) are already running; forking that multithreaded parent could
+    copy a lock held by another thread into the child. ``forkserver`` (or
+    ``spawn`` where it is unavailable) starts workers from a clean process.
+    """
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class Pipeline:
+    """Run ``source`` items through ``stages`` and into an ordered ``sink``."""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        max_in_flight: Optional[int] = None,
+        sample_interval: float = 0.05,
+    ):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.max_in_flight = max_in_flight or sum(stage.workers + stage.queue_size for stage in stages)
+        self.sample_interval = sample_interval
+        self.metrics: List[StageMetrics] = []
+        self.wall = 0.0
+
+    def run(self, source: Iterable[Any], sink: Callable[[Any], None]) -> List[StageMetrics]:
+        stages = self.stages
+        inputs: List["queue.Queue[Any]"] = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        results: "queue.Queue[Any]" = queue.Queue(maxsize=stages[-1].queue_size)
+        outputs = inputs[1:] + [results]
+        metrics = [StageMetrics(stage.name, stage.workers) for stage in stages]
+        sink_metrics = StageMetrics("sink", 1)
+        window = threading.Semaphore(self.max_in_flight)
+        pools: Dict[int, ProcessPoolExecutor] = {
+            index: ProcessPoolExecutor(max_workers=stage.workers, mp_context=process_context())
+            for index, stage in enumerate(stages)
+            if stage.processes
+        }
+        remaining = [stage.workers for stage in stages]
+        finished = threading.Event()
+
+        def feed() -> None:
+            try:
+                for seq, item in enumerate(source):
+                    window.acquire()
+                    inputs[0].put((seq, item))
+            except Exception:
+                logger.exception("Pipeline source failed; finishing with the items already queued")
+            finally:
+                for _ in range(stages[0].workers):
+                    inputs[0].put(_END)
+
+        def work(index: int) -> None:
+            stage, stats = stages[index], metrics[index]
+            inbox, outbox = inputs[index], outputs[index]
+            pool = pools.get(index)
+            while True:
+                message = inbox.get()
+                if message is _END:
+                    with stats._lock:
+                        remaining[index] -= 1
+                        last = remaining[index] == 0
+                    if last:
+                        for _ in range(stages[index + 1].workers if index + 1 < len(stages) else 1):
+                            outbox.put(_END)
+                    return
+                seq, payload = message
+                if payload is not _DROPPED and not (stage.bypass and stage.bypass(payload)):
+                    started = time.perf_counter()
+                    try:
+                        payload = pool.submit(stage.fn, payload).result() if pool else stage.fn(payload)
+                    except Exception:
+                        logger.exception("Stage %s failed on item %d", stage.name, seq)
+                        payload = None
+                        with stats._lock:
+                            stats.errors += 1
+                    elapsed = time.perf_counter() - started
+                    with stats._lock:
+                        stats.busy += elapsed
+                        stats.processed += 1
+                        if payload is None:
+                            stats.dropped += 1
+                    if payload is None:
+                        payload = _DROPPED
+                started = time.perf_counter()
+                outbox.put((seq, payload))
+                with stats._lock:
+                    stats.blocked += time.perf_counter() - started
+
+        def sample() -> None:
+            while not finished.wait(self.sample_interval):
+                for inbox, stats in zip(inputs, metrics):
+                    stats.sample(inbox.qsize())
+                sink_metrics.sample(results.qsize())
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(stages):
+            threads.extend(
+                threading.Thread(target=work, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            )
+        threads.append(threading.Thread(target=sample, name="pipeline-sampler", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        pending: Dict[int, Any] = {}
+        next_seq = 0
+        try:
+            while True:
+                message = results.get()
+                if message is _END:
+                    break
+                seq, payload = message
+                pending[seq] = payload
+                while next_seq in pending:
+                    payload = pending.pop(next_seq)
+                    next_seq += 1
+                    window.release()
+                    if payload is _DROPPED:
+                        continue
+                    sink_started = time.perf_counter()
+                    try:
+                        sink(payload)
+                    except Exception:
+                        logger.exception("Pipeline sink failed on item %d", next_seq - 1)
+                        sink_metrics.errors += 1
+                    sink_metrics.busy += time.perf_counter() - sink_started
+                    sink_metrics.processed += 1
+        finally:
+            finished.set()
+            for pool in pools.values():
+                pool.shutdown()
+
+        self.wall = time.perf_counter() - started
+        self.metrics = metrics + [sink_metrics]
+        return self.metrics
+
+
+def format_report(metrics: List[StageMetrics], wall: float) -> str:
+    """Tabulate per-stage metrics and name the most utilised stage."""
+
+    lines = [
+        f"{'stage':<10} {'workers':>7} {'items':>6} {'dropped':>7} {'busy':>6} {'blocked':>8} {'avg q':>6} {'max q':>6}"
+    ]
+    for stats in metrics:
+        lines.append(
+            f"{stats.name:<10} {stats.workers:>7} {stats.processed:>6} {stats.dropped:>7} "
+            f"{stats.utilisation(wall):>6.0%} {stats.blocked:>7.1f}s {stats.mean_depth:>6.1f} {stats.max_depth:>6}"
+        )
+    if metrics and wall > 0:
+        bottleneck = max(metrics, key=lambda stats: stats.utilisation(wall))
+        lines.append(
+            f"wall {wall:.1f}s; bottleneck: {bottleneck.name} "
+            f"({bottleneck.utilisation(wall):.0%} busy, avg input queue {bottleneck.mean_depth:.1f})"
+        )
+    return "\n".join(lines)
@@ -21,22 +21,36 @@ from __future__ import annotations
 
 import argparse
 import dataclasses
+import hashlib
 import json
 import logging
 import os
 import re
+import subprocess
 import sys
+import threading
+import time
 from collections import Counter
 from dataclasses import dataclass, field
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
 
 import requests
 from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter, Retry
 from urllib.parse import urljoin
 
+from dossier_schema import encode as encode_dossier, write_dossier
+from etag_manifest import ETAG_FILENAME, EtagManifest
+from llm_backends import BACKENDS, BackendConfigError, CompletionRequest, LLMBackend, create_backend
+from llm_control import BackendController, BackendUnavailable, RetryQueue
+from metadata_repair import resolve_year, row_year
+from metrics_engine import compute_metrics, refresh_corpus
+from parse_cache import DEFAULT_CACHE_PATH, ParseCache
+from pipeline_dag import Pipeline, Stage, format_report
+from shard_merge import parse_shard, shard_label, shard_of, write_manifest
+from prompt_budget import UsageLedger, budget_sections
+from run_metrics import METRICS, MetricsExporter
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +62,16 @@ except Exception as exc:  # pragma: no cover - surfaced in CLI error message
 else:
     _PANDAS_IMPORT_ERROR = None
 
+try:  # Optional dependency (NumPy) for MinHash section deduplication
+    from section_dedupe import BoilerplateIndex, DedupeReport, dedupe_sections
+except Exception:  # pragma: no cover - dedupe is skipped without numpy
+    BoilerplateIndex = DedupeReport = dedupe_sections = None
+
+try:  # Optional dependency (NumPy) for extractive summaries
+    from extractive_summary import summarize_sections
+except Exception:  # pragma: no cover - falls back to the lead sentences
+    summarize_sections = None
+
 
 def _load_local_env() -> None:
     """Load variables from a nearby .env file if present.
@@ -91,8 +115,12 @@ def _load_local_env() -> None:
 _load_local_env()
 
 
-def configure_logging(verbosity: int = 0, quiet: bool = False) -> None:
-    """Configure root logging for CLI usage."""
+def configure_logging(verbosity: int = 0, quiet: bool = False, stream: Optional[IO[str]] = None) -> None:
+    """Configure root logging for CLI usage.
+
+    Logs go to stdout unless ``stream`` is given; commands that write data to
+    stdout pass ``sys.stderr`` so the two never interleave.
+    """
 
     if quiet:
         level = logging.WARNING
@@ -101,7 +129,7 @@ def configure_logging(verbosity: int = 0, quiet: bool = False) -> None:
         if verbosity >= 1:
             level = logging.DEBUG
 
-    handler = logging.StreamHandler(sys.stdout)
+    handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
     handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
 
     root_logger = logging.getLogger()
@@ -112,6 +140,13 @@ def configure_logging(verbosity: int = 0, quiet: bool = False) -> None:
 
 PMC_BASE = "https://pmc.ncbi.nlm.nih.gov"
 USER_AGENT = "AstroGenesis-Ingestor/1.0 (+https://github.com/NASA-SpaceApps-Challenge)"
+# Bump whenever extract_meta_from_soup or parse_sections output changes so the
+# parse cache stops serving results from the old extractor.
+EXTRACTOR_VERSION = 2
+# ``--extractor streaming`` (stream_extract.py) also drops <nav> text, so its
+# results get their own parse-cache entries.
+EXTRACTORS = ("soup", "streaming")
+STREAMING_EXTRACTOR_VERSION = 1000 + EXTRACTOR_VERSION
 STOPWORDS = {
     "the",
     "and",
@@ -213,54 +248,181 @@ EXPERIMENT_KEYWORDS = {
 }
 
 
+# Token budget for the article sections sent with each structured-summary call.
+STRUCTURED_PROMPT_TOKEN_BUDGET = 2000
+STRUCTURED_SECTION_PRIORITIES = {
+    "abstract": 3.0,
+    "results": 2.5,
+    "conclusion": 2.0,
+    "methods": 1.0,
+}
+
+
+STRUCTURED_MAX_KEYWORDS = 8
+
+
+def structured_schema(combined: bool = False) -> Dict[str, object]:
+    """JSON schema for the structured-summary response (strict structured outputs)."""
+
+    properties: Dict[str, object] = {
+        "organism": {"type": ["string", "null"]},
+        "experiment_type": {"type": ["string", "null"]},
+        "platform": {"type": ["string", "null"]},
+        "keywords": {"type": "array", "items": {"type": "string"}},
+        "summary": {"type": ["string", "null"]},
+    }
+    if combined:
+        properties["ai_summary"] = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def validate_structured(data: object, combined: bool = False) -> Optional[Dict[str, object]]:
+    """Check an LLM response against :func:`structured_schema`.
+
+    Returns a cleaned copy (keywords lowercased and capped) or ``None`` when a
+    field is missing or has the wrong type.
+    """
+
+    if not isinstance(data, dict):
+        return None
+    cleaned: Dict[str, object] = {}
+    for name in ("organism", "experiment_type", "platform", "summary"):
+        value = data.get(name)
+        if value is not None and not isinstance(value, str):
+            return None
+        cleaned[name] = value.strip() or None if isinstance(value, str) else None
+    keywords = data.get("keywords")
+    if not isinstance(keywords, list) or not all(isinstance(item, str) for item in keywords):
+        return None
+    cleaned["keywords"] = [item.strip().lower() for item in keywords if item.strip()][:STRUCTURED_MAX_KEYWORDS]
+    if combined:
+        ai_summary = data.get("ai_summary")
+        if not isinstance(ai_summary, str) or not ai_summary.strip():
+            return None
+        cleaned["ai_summary"] = ai_summary.strip()
+    return cleaned
+
+
 class OptionalLLM:
-    """Tiny abstraction that optionally calls OpenAI for richer summaries."""
+    """Tiny abstraction that optionally calls an LLM for richer summaries.
+
+    The provider is an :class:`~llm_backends.LLMBackend`: hosted OpenAI by
+    default, or a self-hosted OpenAI-compatible server / the deterministic
+    fake backend via ``backend_kind``.
+
+    With ``combined=True`` a single request also returns the long-form
+    ``ai_summary`` normally produced later by ``summarize_jsons.py``.
 
-    def __init__(self, model: str = "gpt-4o-mini", enabled: Optional[bool] = None):
+    Requests go through a :class:`~llm_control.BackendController`; a failure
+    no longer disables the LLM for the rest of the run. ``last_error`` is set
+    when the most recent call fell back to heuristics so callers can retry.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        combined: bool = False,
+        controller: Optional[BackendController] = None,
+        backend: Optional[LLMBackend] = None,
+        backend_kind: str = "openai",
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+    ):
         self.model = model
         self.enabled = enabled
-        self._client = None
+        self.combined = combined
+        self._local = threading.local()
+        self.backend = backend
         self._reason = None
+        self.usage = UsageLedger()
+
+        if self.enabled is not False and self.backend is None:
+            try:
+                self.backend = create_backend(backend_kind, model, base_url=base_url, max_concurrency=max_concurrency)
+            except BackendConfigError as exc:
+                self._reason = f"{exc}; falling back to heuristics"
+        self.enabled = self.enabled is not False and self.backend is not None
+        if self.backend is not None:
+            self.model = self.backend.model
+        self.controller = controller or (self.backend.make_controller() if self.backend else BackendController())
 
-        if self.enabled is False:
-            return
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            self.enabled = False
-            self._reason = "OPENAI_API_KEY not set; falling back to heuristics"
-            return
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Error behind the calling thread's most recent heuristic fallback."""
 
-        try:
-            from openai import OpenAI
-        except Exception as exc:  # pragma: no cover - optional path
-            self.enabled = False
-            self._reason = f"openai package unavailable ({exc}); heuristics will be used"
-            return
+        return getattr(self._local, "last_error", None)
 
-        self._client = OpenAI(api_key=api_key)
-        self.enabled = True
+    @last_error.setter
+    def last_error(self, value: Optional[Exception]) -> None:
+        self._local.last_error = value
 
     @property
     def reason(self) -> Optional[str]:
         return self._reason
 
+    def _budgeted_sections(self, metadata: Dict[str, Optional[str]], sections: Dict[str, str]) -> Dict[str, str]:
+        budgeted, report = budget_sections(
+            {name: sections.get(name, "") for name in ("abstract", "methods", "results", "conclusion")},
+            STRUCTURED_PROMPT_TOKEN_BUDGET,
+            STRUCTURED_SECTION_PRIORITIES,
+            model=self.model,
+        )
+        if report.condensed:
+            logger.debug(
+                "Condensed %s for %s to fit %d tokens (%d requested)",
+                ", ".join(report.condensed),
+                metadata.get("pmcid") or metadata.get("title"),
+                report.budget,
+                report.requested,
+            )
+        return budgeted
+
     def structured_summary(
         self,
         metadata: Dict[str, Optional[str]],
         sections: Dict[str, str],
+        payload: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Optional[str]]:
-        if not self.enabled or not self._client:
+        """Infer organism/platform/keywords/summary (and ``ai_summary`` when combined).
+
+        ``payload`` is the budgeted prompt payload from
+        ``summarize_jsons.compile_payload``; in combined mode its sections are
+        sent instead of ``sections`` so both summaries see the same text.
+        """
+
+        self.last_error = None
+        if not self.enabled or self.backend is None:
             return {}
 
-        core_text = "\n\n".join(
-            f"## {name.capitalize()}\n{sections.get(name, '')}" for name in ("abstract", "methods", "results", "conclusion")
+        combined = self.combined and payload is not None
+        if combined:
+            prompt_sections = {
+                name: payload.get(name, "") for name in ("abstract", "background", "methods", "results", "conclusion")
+            }
+        else:
+            prompt_sections = self._budgeted_sections(metadata, sections)
+        core_text = "\n\n".join(f"## {name.capitalize()}\n{text}" for name, text in prompt_sections.items())
+
+        keys = (
+            "JSON keys: organism (string), experiment_type (string), platform (string), "
+            "keywords (array of <=8 lowercase keywords), summary (concise paragraph <=120 words)"
         )
+        if combined:
+            keys += (
+                ", ai_summary (descriptive 120–170 word summary of the full study that blends background, "
+                "methods, results and conclusion, highlights the scientific question, key findings and why they "
+                "matter for space biosciences, and does not repeat the title verbatim)"
+            )
         prompt = (
             "You are assisting with the NASA Space Biology archive. "
             "Analyse the following experiment report and respond with a compact JSON document. "
-            "JSON keys: organism (string), experiment_type (string), platform (string), "
-            "keywords (array of <=8 lowercase keywords), summary (concise paragraph <=120 words). "
+            f"{keys}. "
             "If unsure of a field use null. JSON only, no commentary.\n\n"
             f"Title: {metadata.get('title') or ''}\n"
             f"Year: {metadata.get('year') or ''}\n"
@@ -269,23 +431,38 @@ class OptionalLLM:
             f"Article sections:\n{core_text}"
         )
 
+        label = str(metadata.get("pmcid") or metadata.get("title") or "article")
         try:
-            completion = self._client.responses.create(
-                model=self.model,
-                input=prompt,
-                temperature=0.2,
-                max_output_tokens=400,
+            completion = self.controller.call(
+                self.backend.complete,
+                CompletionRequest(
+                    prompt,
+                    max_tokens=700 if combined else 400,
+                    temperature=0.2,
+                    schema=structured_schema(combined),
+                    schema_name="article_dossier",
+                ),
             )
-            message = completion.output[0].content[0].text  # type: ignore[index]
+            message = completion.text
+            logger.info(self.usage.record(label, completion.model, completion.prompt_tokens, completion.completion_tokens))
+        except BackendUnavailable as exc:
+            self.last_error = exc
+            logger.info("Using heuristics for %s: %s", label, exc)
+            return {}
         except Exception as exc:  # pragma: no cover - network failure path
-            self._reason = f"OpenAI request failed: {exc}"  # surface warning upstream
-            self.enabled = False
+            self.last_error = exc
+            self._reason = f"LLM request failed: {exc}"
+            logger.warning("LLM request failed for %s; using heuristics for now: %s", label, exc)
             return {}
         try:
             data = json.loads(message)
         except json.JSONDecodeError:
             return {}
-        return data
+        validated = validate_structured(data, combined)
+        if validated is None:
+            logger.warning("Discarding structured summary for %s: response does not match schema", label)
+            return {}
+        return validated
 
 
 @dataclass
@@ -302,10 +479,22 @@ class ArticleRecord:
     sections: Dict[str, str] = field(default_factory=dict)
     links: Dict[str, str] = field(default_factory=dict)
     summary: Optional[str] = None
+    ai_summary: Optional[str] = None
     metrics: Dict[str, object] = field(default_factory=dict)
 
     def as_dict(self) -> Dict[str, object]:
-        return dataclasses.asdict(self)
+        data = dataclasses.asdict(self)
+        # ``summarize_jsons`` treats the mere presence of ``ai_summary`` as done.
+        if data.get("ai_summary") is None:
+            data.pop("ai_summary", None)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "ArticleRecord":
+        """Rebuild a record from a dossier, ignoring keys added by later stages."""
+
+        names = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
 
 
 def normalize_json_dir(json_dir: Path) -> Path:
@@ -382,8 +571,10 @@ def parse_sections(soup: BeautifulSoup) -> Dict[str, str]:
 
 
 def extract_meta_from_html(pmcid: str, html: str) -> Tuple[Dict[str, Optional[str]], Dict[str, str]]:
-    soup = BeautifulSoup(html, "lxml")
+    return extract_meta_from_soup(pmcid, BeautifulSoup(html, "lxml"))
 
+
+def extract_meta_from_soup(pmcid: str, soup: BeautifulSoup) -> Tuple[Dict[str, Optional[str]], Dict[str, str]]:
     title = soup.find("meta", attrs={"name": "citation_title"})
     if title is None:
         title = soup.find("title")
@@ -392,15 +583,9 @@ def extract_meta_from_html(pmcid: str, html: str) -> Tuple[Dict[str, Optional[st
     author_tags = soup.find_all("meta", attrs={"name": "citation_author"})
     authors = [tag.get("content", "").strip() for tag in author_tags if tag.get("content")]
 
-    year = None
-    date_tag = soup.find("meta", attrs={"name": "citation_date"})
-    if date_tag and date_tag.get("content"):
-        try:
-            year = datetime.fromisoformat(date_tag["content"]).year
-        except Exception:
-            match = re.search(r"(19|20)\d{2}", date_tag["content"])
-            if match:
-                year = int(match.group(0))
+    year, year_source = resolve_year(soup)
+    if year:
+        logger.debug("Publication year %d for %s from %s", year, pmcid, year_source)
 
     pmc_url = canonical_pmc_url(pmcid)
     pdf_tag = soup.find("meta", attrs={"name": "citation_pdf_url"})
@@ -420,6 +605,57 @@ def extract_meta_from_html(pmcid: str, html: str) -> Tuple[Dict[str, Optional[st
     )
 
 
+def extractor_version(extractor: str = "soup") -> int:
+    return STREAMING_EXTRACTOR_VERSION if extractor == "streaming" else EXTRACTOR_VERSION
+
+
+# Article HTML as text, or the cached file itself when ``--extractor streaming``
+# parses straight from disk.
+HtmlSource = Union[str, Path]
+
+
+def html_text(html: HtmlSource) -> str:
+    if isinstance(html, Path):
+        return html.read_text(encoding="utf-8", errors="ignore")
+    return html
+
+
+def parse_article(
+    pmcid: str,
+    html: HtmlSource,
+    cache: Optional[ParseCache] = None,
+    extractor: str = "soup",
+) -> Tuple[Dict[str, Optional[str]], Dict[str, str], Dict[str, str]]:
+    """Return ``(meta, links, sections)`` from one parse of ``html``.
+
+    With a :class:`~parse_cache.ParseCache` the result is reused for as long as
+    both the HTML and :data:`EXTRACTOR_VERSION` are unchanged. ``extractor``
+    ``"streaming"`` uses the event-driven lxml extractor instead of building a
+    BeautifulSoup tree; given a path it reads the file in chunks, so the page
+    is never held in memory as one string.
+    """
+
+    version = extractor_version(extractor)
+    if cache is not None:
+        cached = cache.get(pmcid, html, version)
+        METRICS.cache("parse", cached is not None)
+        if cached is not None:
+            logger.debug("Parse cache hit for %s", pmcid)
+            return cached
+    with METRICS.parse_seconds.time(extractor=extractor):
+        if extractor == "streaming":
+            from stream_extract import extract_file, extract_html
+
+            meta, links, sections = extract_file(pmcid, html) if isinstance(html, Path) else extract_html(pmcid, html)
+        else:
+            soup = BeautifulSoup(html_text(html), "lxml")
+            meta, links = extract_meta_from_soup(pmcid, soup)
+            sections = parse_sections(soup)
+    if cache is not None:
+        cache.put(pmcid, html, version, (meta, links, sections))
+    return meta, links, sections
+
+
 def heuristic_keywords(text: str, limit: int = 8) -> List[str]:
     tokens = re.findall(r"[A-Za-z][A-Za-z\-]{2,}", text.lower())
     filtered = [token for token in tokens if token not in STOPWORDS]
@@ -493,19 +729,24 @@ def detect_experiment_type(text: str) -> Optional[str]:
     return None
 
 
-def simple_summary(sections: Dict[str, str]) -> str:
+def lead_summary(sections: Dict[str, str]) -> str:
     text = sections.get("abstract") or sections.get("results") or sections.get("conclusion") or ""
     sentences = re.split(r"(?<=[.!?])\s+", text)
     return " ".join(sentences[:3]).strip()
 
 
+def simple_summary(sections: Dict[str, str]) -> str:
+    """Heuristic summary: ranked extractive sentences, or the lead without NumPy."""
+
+    if summarize_sections is not None:
+        summary = summarize_sections(sections)
+        if summary:
+            return summary
+    return lead_summary(sections)
+
+
 def build_metrics(record: ArticleRecord) -> Dict[str, object]:
-    metrics: Dict[str, object] = {}
-    if record.year:
-        metrics["publication_year"] = record.year
-    if record.keywords:
-        metrics["keyword_counts"] = {kw: record.sections.get("results", "").lower().count(kw.lower()) for kw in record.keywords[:5]}
-    return metrics
+    return compute_metrics(record.sections, record.keywords, record.year)
 
 
 def load_csv_rows(csv_path: Path, limit: Optional[int] = None) -> List[Dict[str, object]]:
@@ -551,20 +792,44 @@ def fetch_raw_html(
     session: requests.Session,
     force: bool = False,
     source_url: Optional[str] = None,
-) -> str:
+    stream: bool = False,
+) -> HtmlSource:
+    """Return the article HTML, downloading it into ``raw_dir`` unless cached.
+
+    ``stream`` copies the response body to disk in chunks and returns the
+    cached file's path rather than its text, so neither the download nor the
+    streaming extractor ever holds the whole page in memory.
+    """
+
     out_path = raw_dir / f"{pmcid}.html"
     if out_path.exists() and not force:
         logger.info("Using cached HTML for %s", pmcid)
-        return out_path.read_text(encoding="utf-8", errors="ignore")
+        METRICS.cache("html", True)
+        return out_path if stream else out_path.read_text(encoding="utf-8", errors="ignore")
 
+    METRICS.cache("html", False)
     url = normalise_pmc_url(pmcid, source_url)
     logger.info("Fetching HTML for %s from %s", pmcid, url)
+    started = time.perf_counter()
+    temporary = out_path.with_suffix(".html.part")
     try:
-        response = session.get(url, timeout=30)
+        response = session.get(url, timeout=30, stream=stream)
         response.raise_for_status()
+        if stream:
+            with response, temporary.open("wb") as handle:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    handle.write(chunk)
     except Exception as exc:
         logger.error("Network error while fetching %s: %s", pmcid, exc)
+        METRICS.failures.inc(stage="fetch")
+        temporary.unlink(missing_ok=True)
         raise
+    finally:
+        METRICS.fetch_seconds.observe(time.perf_counter() - started)
+    if stream:
+        os.replace(temporary, out_path)
+        logger.debug("Streamed raw HTML for %s to %s", pmcid, out_path)
+        return out_path
     html = response.text
     out_path.write_text(html, encoding="utf-8")
     logger.debug("Wrote raw HTML for %s to %s", pmcid, out_path)
@@ -574,12 +839,24 @@ def fetch_raw_html(
 def synthesize_record(
     pmcid: str,
     idx: int,
-    html: str,
+    html: HtmlSource,
     row: Dict[str, object],
     llm: OptionalLLM,
+    dedupe: bool = True,
+    boilerplate: Optional["BoilerplateIndex"] = None,
+    dedupe_totals: Optional["DedupeReport"] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parsed: Optional[Tuple[Dict[str, Optional[str]], Dict[str, str], Dict[str, str]]] = None,
+    extractor: str = "soup",
 ) -> ArticleRecord:
-    meta, links = extract_meta_from_html(pmcid, html)
-    sections = parse_sections(BeautifulSoup(html, "lxml"))
+    meta, links, sections = parsed or parse_article(pmcid, html, cache=parse_cache, extractor=extractor)
+
+    if dedupe and dedupe_sections is not None:
+        sections, report = dedupe_sections(sections, boilerplate)
+        if report.bytes_saved:
+            logger.info("Deduplicated %s: %s", pmcid, report.summary())
+        if dedupe_totals is not None:
+            dedupe_totals.merge(report, f"exp_{idx:03d}")
 
     title = meta.get("title") or str(row.get("title") or row.get("Title") or "").strip()
     authors = meta.get("authors") or []
@@ -588,20 +865,20 @@ def synthesize_record(
         if raw_authors:
             authors = [a.strip() for a in str(raw_authors).replace(";", ",").split(",") if a.strip()]
 
-    year = meta.get("year")
-    if not year:
-        raw_year = row.get("year") or row.get("Year")
-        try:
-            if raw_year:
-                year = int(str(raw_year).split("-")[0])
-        except Exception:
-            year = None
+    year = meta.get("year") or row_year(row)
 
     combined_text = " ".join(sections.values())
 
+    prompt_payload = None
+    if llm.enabled and llm.combined:
+        from summarize_jsons import compile_payload
+
+        prompt_payload = compile_payload({"title": title, "authors": authors, "sections": sections}, log_label=pmcid)
+
     ai_payload = llm.structured_summary(
-        {"title": title, "authors": authors, "year": year, "pmc_url": links.get("pmc_html")},
+        {"pmcid": pmcid, "title": title, "authors": authors, "year": year, "pmc_url": links.get("pmc_html")},
         sections,
+        payload=prompt_payload,
     ) if llm.enabled else {}
 
     organism = ai_payload.get("organism") if ai_payload else detect_organism(combined_text)
@@ -624,48 +901,67 @@ def synthesize_record(
         sections=sections,
         links=links,
         summary=summary_text,
+        ai_summary=ai_payload.get("ai_summary") if ai_payload else None,
     )
     record.metrics = build_metrics(record)
+    if record.ai_summary and prompt_payload is not None:
+        from summarize_jsons import word_count
+
+        # Same backfill summarize_jsons.process_file performs after its own call.
+        record.metrics["section_lengths"] = {
+            name: word_count(prompt_payload[name]) for name in ("abstract", "results", "conclusion")
+        }
     return record
 
 
-def write_record(record: ArticleRecord, out_dir: Path) -> Path:
+# Dossier keys written by later stages (citation_graph, similar_papers) that a
+# re-ingest cannot recompute; write_record carries them over from the old file.
+PRESERVED_KEYS = ("citations_by_year", "related")
+
+
+def _preserved_fields(path: Path) -> Dict[str, object]:
+    try:
+        existing = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(existing, dict):
+        return {}
+    return {key: existing[key] for key in PRESERVED_KEYS if key in existing}
+
+
+def write_record(record: ArticleRecord, out_dir: Path, etags: Optional[EtagManifest] = None) -> Path:
     out_path = out_dir / f"{record.id}.json"
-    out_path.write_text(json.dumps(record.as_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+    data = record.as_dict()
+    if out_path.exists():
+        for key, value in _preserved_fields(out_path).items():
+            data.setdefault(key, value)
+    payload = encode_dossier(data, label=record.id)
+    write_dossier(out_path, payload)
+    if etags is not None:
+        etags.record(out_path, payload)
     logger.debug("Persisted JSON dossier for %s to %s", record.pmcid, out_path)
     return out_path
 
 
-def ingest(
-    csv_path: Path,
-    raw_dir: Path,
+def iter_pending_rows(
+    rows: List[Dict[str, object]],
     json_dir: Path,
-    limit: Optional[int] = None,
     force: bool = False,
-    llm_model: str = "gpt-4o-mini",
-    llm_enabled: Optional[bool] = None,
-) -> List[ArticleRecord]:
-    json_dir = normalize_json_dir(json_dir)
-    ensure_directories(raw_dir, json_dir)
-    session = make_session()
-    rows = load_csv_rows(csv_path, limit=limit)
-    llm = OptionalLLM(model=llm_model, enabled=llm_enabled)
+    shard: Optional[Tuple[int, int]] = None,
+) -> Iterable[Tuple[int, Dict[str, object], str]]:
+    """Yield ``(idx, row, pmcid)`` for rows that still need a dossier.
 
-    if llm.reason:
-        logger.info(llm.reason)
+    With ``shard=(i, N)`` only rows whose PMCID hashes to shard ``i`` are
+    considered; ``idx`` is still the row's position in the full CSV.
+    """
 
-    records: List[ArticleRecord] = []
-    logger.info(
-        "Beginning ingestion of %d rows from %s (force=%s)",
-        len(rows),
-        csv_path,
-        force,
-    )
     for idx, row in enumerate(rows, start=1):
         pmcid = derive_pmcid(row)
         if not pmcid:
             logger.warning("Skipping row %d: no PMCID detected", idx)
             continue
+        if shard is not None and shard_of(pmcid, shard[1]) != shard[0]:
+            continue
         record_id = f"exp_{idx:03d}"
         existing_json = json_dir / f"{record_id}.json"
         if not force and existing_json.exists():
@@ -676,21 +972,548 @@ def ingest(
                 existing_json.name,
             )
             continue
-        logger.info("Processing row %d -> %s", idx, pmcid)
+        yield idx, row, pmcid
+
+
+@dataclass
+class _WorkItem:
+    """One article travelling through the ``--pipeline`` stages."""
+
+    idx: int
+    row: Dict[str, object]
+    pmcid: str
+    extractor: str = "soup"
+    html: HtmlSource = ""
+    parsed: Optional[Tuple[Dict[str, Optional[str]], Dict[str, str], Dict[str, str]]] = None
+    cache_miss: bool = False
+    parse_seconds: Optional[float] = None
+    record: Optional["ArticleRecord"] = None
+    dedupe_report: Optional["DedupeReport"] = None
+    llm_error: Optional[Exception] = None
+
+
+def _parse_work_item(item: _WorkItem) -> _WorkItem:
+    # Runs in a worker process: module-level so it can be pickled.
+    if item.parsed is None:
+        started = time.perf_counter()
+        item.parsed = parse_article(item.pmcid, item.html, extractor=item.extractor)
+        # Metrics recorded in this process are lost; the parent reports the timing.
+        item.parse_seconds = time.perf_counter() - started
+    return item
+
+
+def ingest_pipelined(
+    pending: Iterable[Tuple[int, Dict[str, object], str]],
+    raw_dir: Path,
+    json_dir: Path,
+    llm: OptionalLLM,
+    records: List[ArticleRecord],
+    retry_queue: RetryQueue,
+    force: bool = False,
+    dedupe: bool = True,
+    boilerplate: Optional["BoilerplateIndex"] = None,
+    dedupe_totals: Optional["DedupeReport"] = None,
+    parse_cache: Optional[ParseCache] = None,
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    etags: Optional[EtagManifest] = None,
+    extractor: str = "soup",
+) -> None:
+    """Fetch → parse → enrich → write as concurrent stages (``--pipeline``).
+
+    Fetch and enrich run on threads, parsing on a process pool; dossiers are
+    written in CSV order so ids and ``records`` match the serial loop.
+    """
+
+    sessions = threading.local()
+
+    def fetch(item: _WorkItem) -> Optional[_WorkItem]:
+        if not hasattr(sessions, "session"):
+            sessions.session = make_session()
+        logger.info("Processing row %d -> %s", item.idx, item.pmcid)
         try:
-            csv_url = extract_pmc_url_from_row(row)
-            html = fetch_raw_html(pmcid, raw_dir, session, force=force, source_url=csv_url)
+            csv_url = extract_pmc_url_from_row(item.row)
+            item.html = fetch_raw_html(
+                item.pmcid, raw_dir, sessions.session, force=force, source_url=csv_url, stream=extractor == "streaming"
+            )
         except Exception as exc:
-            logger.error("Failed to fetch %s: %s", pmcid, exc)
-            continue
-        record = synthesize_record(pmcid, idx, html, row, llm)
-        write_record(record, json_dir)
-        logger.info("Wrote dossier %s for %s", record.id, pmcid)
+            logger.error("Failed to fetch %s: %s", item.pmcid, exc)
+            METRICS.row_done("ingest", "failed")
+            return None
+        if parse_cache is not None:
+            item.parsed = parse_cache.get(item.pmcid, item.html, extractor_version(extractor))
+            item.cache_miss = item.parsed is None
+            METRICS.cache("parse", not item.cache_miss)
+        return item
+
+    def enrich(item: _WorkItem) -> _WorkItem:
+        if item.parse_seconds is not None:
+            METRICS.parse_seconds.observe(item.parse_seconds, extractor=extractor)
+        if item.cache_miss and parse_cache is not None:
+            parse_cache.put(item.pmcid, item.html, extractor_version(extractor), item.parsed)
+        # Each article gets its own report; the writer folds them into the
+        # run totals so DedupeReport is never shared between threads.
+        item.dedupe_report = DedupeReport() if dedupe_totals is not None else None
+        item.record = synthesize_record(
+            item.pmcid,
+            item.idx,
+            item.html,
+            item.row,
+            llm,
+            dedupe=dedupe,
+            boilerplate=boilerplate,
+            dedupe_totals=item.dedupe_report,
+            parsed=item.parsed,
+        )
+        item.llm_error = llm.last_error
+        return item
+
+    def write(item: _WorkItem) -> None:
+        record = item.record
+        write_record(record, json_dir, etags)
+        logger.info("Wrote dossier %s for %s", record.id, item.pmcid)
         records.append(record)
+        METRICS.row_done("ingest")
+        if dedupe_totals is not None and item.dedupe_report is not None:
+            dedupe_totals.merge(item.dedupe_report)
+            dedupe_totals.duplicates_by_paper.update(item.dedupe_report.duplicates_by_paper)
+        if item.llm_error is not None:
+            retry_queue.push(item.pmcid, (item.idx, item.row, item.html))
+
+    enrich_workers = llm.backend.max_concurrency if llm.enabled and llm.backend else 2
+    runner = Pipeline(
+        [
+            Stage("fetch", fetch, workers=fetch_workers),
+            Stage(
+                "parse",
+                _parse_work_item,
+                workers=parse_workers or os.cpu_count() or 2,
+                processes=True,
+                bypass=lambda item: item.parsed is not None,
+            ),
+            Stage("enrich", enrich, workers=enrich_workers),
+        ]
+    )
+    runner.run((_WorkItem(idx, row, pmcid, extractor) for idx, row, pmcid in pending), write)
+    logger.info("Pipeline stages:\n%s", format_report(runner.metrics, runner.wall))
+
+
+@dataclass
+class IngestContext:
+    """Long-lived ingest state: HTTP session, LLM client, caches and dedupe index."""
+
+    raw_dir: Path
+    json_dir: Path
+    session: requests.Session
+    llm: OptionalLLM
+    dedupe: bool
+    boilerplate: Optional["BoilerplateIndex"]
+    dedupe_totals: Optional["DedupeReport"]
+    parse_cache: Optional[ParseCache]
+    etags: EtagManifest
+    retry_queue: RetryQueue
+    extractor: str = "soup"
+
+    @classmethod
+    def open(
+        cls,
+        raw_dir: Path,
+        json_dir: Path,
+        llm_model: Optional[str] = None,
+        llm_enabled: Optional[bool] = None,
+        dedupe: bool = True,
+        boilerplate_path: Optional[Path] = None,
+        combined_summary: bool = False,
+        llm_backend: str = "openai",
+        llm_base_url: Optional[str] = None,
+        llm_concurrency: Optional[int] = None,
+        parse_cache_path: Optional[Path] = None,
+        extractor: str = "soup",
+    ) -> "IngestContext":
+        ensure_directories(raw_dir, json_dir)
+        llm = OptionalLLM(
+            model=llm_model,
+            enabled=llm_enabled,
+            combined=combined_summary,
+            backend_kind=llm_backend,
+            base_url=llm_base_url,
+            max_concurrency=llm_concurrency,
+        )
+
+        if llm.reason:
+            logger.info(llm.reason)
+
+        boilerplate = None
+        dedupe_totals = None
+        if dedupe and dedupe_sections is None:
+            logger.info("numpy unavailable; section deduplication disabled")
+        elif dedupe:
+            dedupe_totals = DedupeReport()
+            if boilerplate_path and boilerplate_path.exists():
+                boilerplate = BoilerplateIndex.load(boilerplate_path)
+                logger.info("Loaded %d boilerplate sentences from %s", len(boilerplate), boilerplate_path)
+
+        return cls(
+            raw_dir=raw_dir,
+            json_dir=json_dir,
+            session=make_session(),
+            llm=llm,
+            dedupe=dedupe,
+            boilerplate=boilerplate,
+            dedupe_totals=dedupe_totals,
+            parse_cache=ParseCache(parse_cache_path) if parse_cache_path else None,
+            etags=EtagManifest(json_dir.parent / ETAG_FILENAME),
+            retry_queue=RetryQueue(),
+            extractor=extractor,
+        )
+
+    def close(self) -> None:
+        self.etags.save()
+        if self.parse_cache is not None:
+            logger.info("Parse cache: %d hit(s), %d miss(es)", self.parse_cache.hits, self.parse_cache.misses)
+            self.parse_cache.close()
+        if self.llm.usage.requests:
+            logger.info("LLM token usage: %s", self.llm.usage.summary())
+        if self.dedupe_totals is not None and self.dedupe_totals.papers:
+            logger.info("Section deduplication: %s", self.dedupe_totals.summary())
+
+
+def _store_record(records: List[ArticleRecord], record: ArticleRecord) -> None:
+    for position, existing in enumerate(records):
+        if existing.id == record.id:
+            records[position] = record
+            return
+    records.append(record)
+
+
+def ingest_rows(
+    ctx: IngestContext,
+    pending: Iterable[Tuple[int, Dict[str, object], str]],
+    force: bool = False,
+    pipeline: bool = False,
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    retry_wait: float = 120.0,
+) -> List[ArticleRecord]:
+    """Write a dossier for every ``(idx, row, pmcid)`` in ``pending``.
+
+    ``force`` re-downloads the HTML; rows are always re-synthesised. Dossiers
+    written with heuristics after an LLM failure are retried at the end,
+    waiting up to ``retry_wait`` seconds for the circuit to close.
+    """
+
+    llm, retry_queue = ctx.llm, ctx.retry_queue
+    records: List[ArticleRecord] = []
+    pending = list(pending)
+    METRICS.start_run("ingest", len(pending))
+    if pipeline:
+        ingest_pipelined(
+            pending,
+            ctx.raw_dir,
+            ctx.json_dir,
+            llm,
+            records,
+            retry_queue,
+            force=force,
+            dedupe=ctx.dedupe,
+            boilerplate=ctx.boilerplate,
+            dedupe_totals=ctx.dedupe_totals,
+            parse_cache=ctx.parse_cache,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            etags=ctx.etags,
+            extractor=ctx.extractor,
+        )
+    else:
+        for idx, row, pmcid in pending:
+            logger.info("Processing row %d -> %s", idx, pmcid)
+            try:
+                csv_url = extract_pmc_url_from_row(row)
+                html = fetch_raw_html(
+                    pmcid, ctx.raw_dir, ctx.session, force=force, source_url=csv_url, stream=ctx.extractor == "streaming"
+                )
+            except Exception as exc:
+                logger.error("Failed to fetch %s: %s", pmcid, exc)
+                METRICS.row_done("ingest", "failed")
+                continue
+            try:
+                record = synthesize_record(
+                    pmcid,
+                    idx,
+                    html,
+                    row,
+                    llm,
+                    dedupe=ctx.dedupe,
+                    boilerplate=ctx.boilerplate,
+                    dedupe_totals=ctx.dedupe_totals,
+                    parse_cache=ctx.parse_cache,
+                    extractor=ctx.extractor,
+                )
+                write_record(record, ctx.json_dir, ctx.etags)
+            except Exception:
+                # Like the pipeline's stages: one bad page must not end the run.
+                logger.exception("Failed to build the dossier for row %d (%s)", idx, pmcid)
+                METRICS.row_done("ingest", "failed")
+                continue
+            logger.info("Wrote dossier %s for %s", record.id, pmcid)
+            records.append(record)
+            METRICS.row_done("ingest")
+            if llm.last_error is not None:
+                retry_queue.push(pmcid, (idx, row, html))
+
+    if len(retry_queue):
+        logger.info("Retrying LLM enrichment for %d dossier(s) written with heuristics", len(retry_queue))
+    for pmcid, (idx, row, html) in retry_queue.drain(llm.controller, max_wait=retry_wait):
+        record = synthesize_record(
+            pmcid,
+            idx,
+            html,
+            row,
+            llm,
+            dedupe=ctx.dedupe,
+            boilerplate=ctx.boilerplate,
+            parse_cache=ctx.parse_cache,
+            extractor=ctx.extractor,
+        )
+        if llm.last_error is not None:
+            retry_queue.push(pmcid, (idx, row, html))
+            continue
+        write_record(record, ctx.json_dir, ctx.etags)
+        _store_record(records, record)
+        logger.info("Rewrote dossier %s for %s with LLM enrichment", record.id, pmcid)
+    return records
+
+
+def ingest(
+    csv_path: Path,
+    raw_dir: Path,
+    json_dir: Path,
+    limit: Optional[int] = None,
+    force: bool = False,
+    llm_model: Optional[str] = None,
+    llm_enabled: Optional[bool] = None,
+    dedupe: bool = True,
+    boilerplate_path: Optional[Path] = None,
+    combined_summary: bool = False,
+    llm_backend: str = "openai",
+    llm_base_url: Optional[str] = None,
+    llm_concurrency: Optional[int] = None,
+    parse_cache_path: Optional[Path] = None,
+    pipeline: bool = False,
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    extractor: str = "soup",
+) -> List[ArticleRecord]:
+    json_dir = normalize_json_dir(json_dir)
+    rows = load_csv_rows(csv_path, limit=limit)
+    ctx = IngestContext.open(
+        raw_dir,
+        json_dir,
+        llm_model=llm_model,
+        llm_enabled=llm_enabled,
+        dedupe=dedupe,
+        boilerplate_path=boilerplate_path,
+        combined_summary=combined_summary,
+        llm_backend=llm_backend,
+        llm_base_url=llm_base_url,
+        llm_concurrency=llm_concurrency,
+        parse_cache_path=parse_cache_path,
+        extractor=extractor,
+    )
+    logger.info(
+        "Beginning ingestion of %d rows from %s (force=%s)",
+        len(rows),
+        csv_path,
+        force,
+    )
+    if shard is not None:
+        logger.info("Shard %d/%d: keeping rows whose PMCID hashes to this shard", *shard)
+    records = ingest_rows(
+        ctx,
+        iter_pending_rows(rows, json_dir, force, shard=shard),
+        force=force,
+        pipeline=pipeline,
+        fetch_workers=fetch_workers,
+        parse_workers=parse_workers,
+    )
     logger.info("Finished ingestion: %d successful records", len(records))
+    ctx.close()
+    if shard is not None:
+        assigned = []
+        for idx, row in enumerate(rows, start=1):
+            pmcid = derive_pmcid(row)
+            if pmcid and shard_of(pmcid, shard[1]) == shard[0]:
+                assigned.append((f"exp_{idx:03d}", pmcid))
+        write_manifest(json_dir, shard, csv_path, assigned, EXTRACTOR_VERSION)
     return records
 
 
+def row_fingerprint(row: Dict[str, object]) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _raw_snapshot(raw_dir: Path) -> Dict[str, int]:
+    with os.scandir(raw_dir) as listing:
+        return {
+            entry.name[: -len(".html")].upper(): entry.stat().st_mtime_ns
+            for entry in listing
+            if entry.name.endswith(".html") and entry.is_file()
+        }
+
+
+def update_frontend_index(record_ids: Iterable[str]) -> None:
+    """Rebuild only ``record_ids`` in ``public/data`` via ``build:nasa-data --ids``."""
+
+    ids = sorted(set(record_ids))
+    if not ids:
+        return
+    repo_root = Path(__file__).resolve().parent.parent
+    try:
+        subprocess.run(["npm", "run", "--silent", "build:nasa-data", "--", "--ids", ",".join(ids)], cwd=repo_root, check=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        logger.warning("Frontend index update failed for %d dossier(s): %s", len(ids), exc)
+
+
+# Rows whose ingest failed in --watch are retried after WATCH_RETRY_BASE seconds,
+# doubling up to WATCH_RETRY_MAX, instead of on every poll.
+WATCH_RETRY_BASE = 30.0
+WATCH_RETRY_MAX = 3600.0
+
+
+def watch(
+    csv_path: Path,
+    ctx: IngestContext,
+    interval: float = 2.0,
+    limit: Optional[int] = None,
+    pipeline: bool = False,
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    frontend: bool = True,
+    author_index_path: Optional[Path] = None,
+    max_cycles: Optional[int] = None,
+) -> None:
+    """Poll the CSV and raw HTML cache and ingest only what changed.
+
+    The first cycle writes dossiers that are missing, like a normal run. After
+    that, a row is re-ingested when its CSV content changes (dossier ids follow
+    row positions, so inserting a row re-ingests every row after it), when its
+    cached HTML is replaced, or when its dossier is deleted. The session, LLM
+    client, parse cache and boilerplate index stay loaded between cycles.
+
+    A row that fails (fetch error, bad page) is not retried on every poll: it
+    waits with exponential backoff, unless its CSV row or HTML changes again.
+    Errors never stop the watcher.
+    """
+
+    author_index = None
+    if author_index_path is not None:
+        from author_index import AuthorIndex
+
+        author_index = AuthorIndex.load(author_index_path)
+
+    fingerprints: Dict[int, str] = {}
+    csv_signature: Optional[Tuple[int, int]] = None
+    raw_mtimes: Dict[str, int] = {}
+    rows: List[Dict[str, object]] = []
+    # Row index -> (consecutive failures, monotonic time of the next attempt).
+    failures: Dict[int, Tuple[int, float]] = {}
+    cycle = 0
+    logger.info("Watching %s and %s every %.1fs (Ctrl+C to stop)", csv_path, ctx.raw_dir, interval)
+    while max_cycles is None or cycle < max_cycles:
+        if cycle:
+            time.sleep(interval)
+        cycle += 1
+        started = time.perf_counter()
+
+        signature = _file_signature(csv_path)
+        changed: Dict[int, str] = {}
+        if signature != csv_signature:
+            if signature is None:
+                logger.warning("%s is missing; waiting for it to reappear", csv_path)
+                continue
+            try:
+                rows = load_csv_rows(csv_path, limit=limit)
+            except Exception as exc:
+                logger.warning("Could not read %s (will retry): %s", csv_path, exc)
+                continue
+            csv_signature = signature
+            current = {idx: row_fingerprint(row) for idx, row in enumerate(rows, start=1)}
+            if fingerprints:
+                changed.update((idx, "csv row changed") for idx, value in current.items() if fingerprints.get(idx) != value)
+                dropped = len(fingerprints) - len(current)
+                if dropped > 0:
+                    logger.warning("%d row(s) removed from the CSV; their dossiers are left in place", dropped)
+            fingerprints = current
+
+        snapshot = _raw_snapshot(ctx.raw_dir)
+        if raw_mtimes:
+            touched = {pmcid for pmcid, mtime in snapshot.items() if raw_mtimes.get(pmcid) != mtime}
+            if touched:
+                for idx, row in enumerate(rows, start=1):
+                    if derive_pmcid(row) in touched:
+                        changed.setdefault(idx, "raw HTML changed")
+
+        now = time.monotonic()
+        pending: List[Tuple[int, Dict[str, object], str]] = []
+        for idx, row in enumerate(rows, start=1):
+            pmcid = derive_pmcid(row)
+            if not pmcid:
+                continue
+            if idx in changed:
+                failures.pop(idx, None)
+            elif not (ctx.json_dir / f"exp_{idx:03d}.json").exists():
+                if idx in failures and failures[idx][1] > now:
+                    continue
+                changed[idx] = "dossier missing"
+            if idx in changed:
+                logger.info("Row %d (%s): %s", idx, pmcid, changed[idx])
+                pending.append((idx, row, pmcid))
+
+        records: List[ArticleRecord] = []
+        if pending:
+            try:
+                records = ingest_rows(
+                    ctx,
+                    pending,
+                    pipeline=pipeline,
+                    fetch_workers=fetch_workers,
+                    parse_workers=parse_workers,
+                    retry_wait=0.0,
+                )
+                ctx.etags.save()
+            except Exception:
+                logger.exception("Cycle %d failed; will retry its rows later", cycle)
+            written = {record.id for record in records}
+            for idx, _, pmcid in pending:
+                if f"exp_{idx:03d}" in written:
+                    failures.pop(idx, None)
+                    continue
+                attempts = failures.get(idx, (0, 0.0))[0] + 1
+                delay = min(WATCH_RETRY_BASE * 2 ** (attempts - 1), WATCH_RETRY_MAX)
+                failures[idx] = (attempts, time.monotonic() + delay)
+                logger.warning("Row %d (%s) failed %d time(s); retrying in %.0fs", idx, pmcid, attempts, delay)
+            if frontend:
+                update_frontend_index(record.id for record in records)
+            if author_index is not None:
+                try:
+                    author_index.update((record.as_dict() for record in records), prune=False)
+                    author_index.save(author_index_path)
+                except (OSError, ValueError) as exc:
+                    logger.warning("Author index update failed: %s", exc)
+            logger.info("Cycle %d: %d dossier(s) updated in %.2fs", cycle, len(records), time.perf_counter() - started)
+        # Re-snapshot so HTML fetched during this cycle is not seen as a change.
+        raw_mtimes = _raw_snapshot(ctx.raw_dir) if pending else snapshot
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Harvest PMC publications and emit Astro Genesis dossiers")
     parser.add_argument("--csv", type=Path, default=Path("resources/SB_publication_PMC.csv"), help="Path to the SB_publication_PMC.csv file")
@@ -702,32 +1525,202 @@ def main() -> None:
         action="store_true",
         help="Refetch HTML and overwrite dossiers even if cached",
     )
-    parser.add_argument("--llm", choices=["auto", "off"], default="auto", help="Use OpenAI if configured ('auto') or disable ('off')")
-    parser.add_argument("--llm-model", default="gpt-4o-mini", help="OpenAI model name when LLM is enabled")
+    parser.add_argument("--llm", choices=["auto", "off"], default="auto", help="Use the LLM backend if configured ('auto') or disable ('off')")
+    parser.add_argument("--llm-backend", choices=BACKENDS, default="openai", help="LLM provider: hosted OpenAI, a self-hosted OpenAI-compatible server, or the offline fake")
+    parser.add_argument("--llm-base-url", default=None, help="Base URL for --llm-backend openai-compatible (default: $LLM_BASE_URL or http://localhost:8080/v1)")
+    parser.add_argument("--llm-concurrency", type=int, default=None, help="Maximum concurrent LLM requests for the selected backend")
+    parser.add_argument("--llm-model", default=None, help="Model name when LLM is enabled (default: gpt-4o-mini for OpenAI)")
+    parser.add_argument(
+        "--combined-summary",
+        action="store_true",
+        help="Also request ai_summary in the ingest LLM call so summarize_jsons.py can skip the article",
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Keep duplicate sections and repeated sentences instead of stripping them",
+    )
+    parser.add_argument(
+        "--boilerplate",
+        type=Path,
+        default=Path("data/boilerplate.json"),
+        help="Boilerplate sentences to strip (written by section_dedupe.py --boilerplate-out)",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        type=Path,
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite cache of parsed meta/sections keyed by HTML hash and extractor version",
+    )
+    parser.add_argument("--no-parse-cache", action="store_true", help="Always re-parse cached HTML")
+    parser.add_argument(
+        "--extractor",
+        choices=EXTRACTORS,
+        default="soup",
+        help="HTML extractor: BeautifulSoup DOM ('soup') or the bounded-memory lxml event parser with streamed downloads ('streaming')",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run fetch/parse/enrich/write as concurrent stages with bounded queues and report per-stage metrics",
+    )
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Fetch threads for --pipeline")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Parse processes for --pipeline (default: CPU count)")
+    parser.add_argument(
+        "--shard",
+        default=None,
+        metavar="I/N",
+        help="Only ingest rows whose PMCID hashes to shard I of N (0 <= I < N); writes a shard manifest for shard_merge.py",
+    )
+    parser.add_argument(
+        "--refresh-metrics",
+        action="store_true",
+        help="After ingesting, recompute keyword/section metrics for every dossier in --json-dir",
+    )
+    parser.add_argument(
+        "--columnar-snapshot",
+        type=Path,
+        default=None,
+        help="After ingesting, write a columnar (Parquet or .npz) corpus snapshot to this directory",
+    )
+    parser.add_argument(
+        "--citation-graph",
+        type=Path,
+        default=None,
+        help="After ingesting, build the in-corpus citation graph in this directory and store citations_by_year in each dossier",
+    )
+    parser.add_argument(
+        "--author-index",
+        type=Path,
+        default=None,
+        help="After ingesting, incrementally update the author index file at this path (e.g. data/authors.json.gz)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: poll --csv and --raw-dir and re-ingest only new or changed rows",
+    )
+    parser.add_argument("--watch-interval", type=float, default=2.0, help="Seconds between --watch polls")
+    parser.add_argument(
+        "--no-frontend-update",
+        action="store_true",
+        help="In --watch mode, do not refresh public/data for updated dossiers",
+    )
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve live Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help="Rewrite Prometheus metrics to this file every few seconds (node_exporter textfile collector)",
+    )
     parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
     parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
     args = parser.parse_args()
 
     configure_logging(args.verbose, args.quiet)
     logger.debug("CLI arguments: %s", args)
+    if args.watch and args.shard:
+        parser.error("--watch cannot be combined with --shard")
 
     llm_enabled = None if args.llm == "auto" else False
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if args.json_dir == Path("data/papers"):
+            args.json_dir = Path("data/shards") / shard_label(*shard) / "papers"
     try:
-        normalized_json_dir = normalize_json_dir(args.json_dir)
-        records = ingest(
-            csv_path=args.csv,
-            raw_dir=args.raw_dir,
-            json_dir=normalized_json_dir,
-            limit=args.limit,
-            force=args.force,
-            llm_model=args.llm_model,
-            llm_enabled=llm_enabled,
-        )
-    except Exception as exc:
-        logger.exception("Fatal error during ingestion")
-        raise SystemExit(1) from exc
+        exporter = MetricsExporter(port=args.metrics_port, textfile=args.metrics_textfile)
+    except OSError as exc:
+        parser.error(f"cannot start metrics exporter: {exc}")
+    try:
+        if args.watch:
+            normalized_json_dir = normalize_json_dir(args.json_dir)
+            ctx = IngestContext.open(
+                args.raw_dir,
+                normalized_json_dir,
+                llm_model=args.llm_model,
+                llm_enabled=llm_enabled,
+                dedupe=not args.no_dedupe,
+                boilerplate_path=args.boilerplate,
+                combined_summary=args.combined_summary,
+                llm_backend=args.llm_backend,
+                llm_base_url=args.llm_base_url,
+                llm_concurrency=args.llm_concurrency,
+                parse_cache_path=None if args.no_parse_cache else args.parse_cache,
+                extractor=args.extractor,
+            )
+            try:
+                watch(
+                    args.csv,
+                    ctx,
+                    interval=args.watch_interval,
+                    limit=args.limit,
+                    pipeline=args.pipeline,
+                    fetch_workers=args.fetch_workers,
+                    parse_workers=args.parse_workers,
+                    frontend=not args.no_frontend_update,
+                    author_index_path=args.author_index,
+                )
+            except KeyboardInterrupt:
+                logger.info("Stopping watch")
+            except Exception as exc:
+                logger.exception("Fatal error while watching")
+                raise SystemExit(1) from exc
+            finally:
+                ctx.close()
+            return
+
+        try:
+            normalized_json_dir = normalize_json_dir(args.json_dir)
+            records = ingest(
+                csv_path=args.csv,
+                raw_dir=args.raw_dir,
+                json_dir=normalized_json_dir,
+                limit=args.limit,
+                force=args.force,
+                llm_model=args.llm_model,
+                llm_enabled=llm_enabled,
+                dedupe=not args.no_dedupe,
+                boilerplate_path=args.boilerplate,
+                combined_summary=args.combined_summary,
+                llm_backend=args.llm_backend,
+                llm_base_url=args.llm_base_url,
+                llm_concurrency=args.llm_concurrency,
+                parse_cache_path=None if args.no_parse_cache else args.parse_cache,
+                pipeline=args.pipeline,
+                fetch_workers=args.fetch_workers,
+                parse_workers=args.parse_workers,
+                shard=shard,
+                extractor=args.extractor,
+            )
+        except Exception as exc:
+            logger.exception("Fatal error during ingestion")
+            raise SystemExit(1) from exc
+
+        logger.info("Ingested %d publications -> %s", len(records), normalized_json_dir)
+
+        if args.refresh_metrics:
+            refresh_corpus(normalized_json_dir)
+
+        if args.columnar_snapshot:
+            from corpus_columnar import build_from_dir
+
+            build_from_dir(normalized_json_dir, args.columnar_snapshot)
+
+        if args.citation_graph:
+            from citation_graph import build_graph, write_outputs
+
+            write_outputs(build_graph(normalized_json_dir, args.raw_dir), args.citation_graph, normalized_json_dir)
+
+        if args.author_index:
+            from author_index import build_index
 
-    logger.info("Ingested %d publications -> %s", len(records), normalized_json_dir)
+            build_index(normalized_json_dir, args.author_index)
+    finally:
+        exporter.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""Token-aware prompt budgeting shared by the ingest and summarisation scripts.
+
+Rather than cutting every section at a fixed character count, callers give each
+LLM request a token budget. :func:`budget_sections` splits that budget across
+sections by priority (short sections keep their full text and donate the
+remainder to longer ones) and shrinks over-long sections by keeping their
+highest-scoring sentences in original order instead of a raw prefix.
+
+Tokens are counted with ``tiktoken`` when it is installed and with a local
+regex approximation otherwise. :class:`UsageLedger` records token usage and
+estimated cost per file so API spend stays predictable.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from run_metrics import METRICS
+
+# USD per one million (input, output) tokens.
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_WORD = re.compile(r"[a-z][a-z\-]{2,}")
+_ENCODERS: Dict[str, Optional[Callable[[str], List[int]]]] = {}
+
+
+def _encoder(model: Optional[str]) -> Optional[Callable[[str], List[int]]]:
+    key = model or ""
+    if key not in _ENCODERS:
+        try:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+            _ENCODERS[key] = encoding.encode
+        except Exception:  # pragma: no cover - tiktoken is optional
+            _ENCODERS[key] = None
+    return _ENCODERS[key]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens with ``tiktoken`` when available, otherwise approximately.
+
+    The fallback counts word and punctuation pieces, charging long words one
+    token per four characters, which tracks BPE tokenisers closely on English
+    scientific prose.
+    """
+
+    if not text:
+        return 0
+    encode = _encoder(model)
+    if encode is not None:
+        return len(encode(text))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _APPROX_TOKEN.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in _SENTENCE_SPLIT.split(text.strip()) if sentence]
+
+
+def extract_top_sentences(text: str, budget: int, model: Optional[str] = None) -> str:
+    """Return the best sentences of ``text`` that fit in ``budget`` tokens.
+
+    Sentences are scored by how many of the section's most frequent content
+    words they contain (normalised by length), with a small bonus for the
+    opening sentence, then re-emitted in their original order.
+    """
+
+    if budget <= 0 or not text:
+        return ""
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+
+    words = [_WORD.findall(sentence.lower()) for sentence in sentences]
+    frequencies = Counter(word for sentence_words in words for word in sentence_words)
+    scores = []
+    for position, sentence_words in enumerate(words):
+        score = sum(frequencies[word] for word in set(sentence_words)) / math.sqrt(len(sentence_words) + 1)
+        if position == 0:
+            score *= 1.25
+        scores.append(score)
+
+    chosen: List[int] = []
+    used = 0
+    for position in sorted(range(len(sentences)), key=lambda i: (-scores[i], i)):
+        cost = count_tokens(sentences[position], model) + 1
+        if used + cost > budget:
+            continue
+        chosen.append(position)
+        used += cost
+
+    if not chosen:
+        # A single sentence longer than the budget: fall back to its prefix.
+        words_only = sentences[0].split()
+        kept: List[str] = []
+        for word in words_only:
+            if count_tokens(" ".join(kept + [word]), model) > budget - 1:
+                break
+            kept.append(word)
+        return " ".join(kept) + "…" if kept else ""
+
+    text_out = " ".join(sentences[i] for i in sorted(chosen))
+    return text_out if len(chosen) == len(sentences) else text_out + " …"
+
+
+def allocate_budget(lengths: Mapping[str, int], priorities: Mapping[str, float], budget: int) -> Dict[str, int]:
+    """Water-fill ``budget`` tokens over sections weighted by ``priorities``.
+
+    Sections shorter than their weighted share keep their full length and the
+    unused tokens are redistributed among the remaining sections.
+    """
+
+    allocation = {name: 0 for name in lengths}
+    pending = {name for name, length in lengths.items() if length > 0}
+    remaining = budget
+    while pending and remaining > 0:
+        weight_total = sum(priorities.get(name, 1.0) for name in pending)
+        shares = {name: remaining * priorities.get(name, 1.0) / weight_total for name in pending}
+        satisfied = {name for name in pending if lengths[name] <= shares[name]}
+        if not satisfied:
+            for name in pending:
+                allocation[name] = int(shares[name])
+            break
+        for name in satisfied:
+            allocation[name] = lengths[name]
+            remaining -= lengths[name]
+        pending -= satisfied
+    return allocation
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    requested: int = 0
+    used: int = 0
+    condensed: List[str] = field(default_factory=list)
+
+
+def budget_sections(
+    sections: Mapping[str, str],
+    budget: int,
+    priorities: Optional[Mapping[str, float]] = None,
+    model: Optional[str] = None,
+) -> Tuple[Dict[str, str], BudgetReport]:
+    """Fit ``sections`` into ``budget`` tokens, condensing by priority."""
+
+    priorities = priorities or {}
+    texts = {name: (text or "").strip() for name, text in sections.items()}
+    lengths = {name: count_tokens(text, model) for name, text in texts.items()}
+    allocation = allocate_budget(lengths, priorities, budget)
+
+    report = BudgetReport(budget=budget, requested=sum(lengths.values()))
+    result: Dict[str, str] = {}
+    for name, text in texts.items():
+        if lengths[name] <= allocation[name]:
+            result[name] = text
+        else:
+            result[name] = extract_top_sentences(text, allocation[name], model)
+            report.condensed.append(name)
+        report.used += count_tokens(result[name], model)
+    return result, report
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return None
+    return (prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1_000_000
+
+
+@dataclass
+class UsageLedger:
+    """Accumulates token usage and estimated spend across a run."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, label: str, model: str, prompt_tokens: int, completion_tokens: int) -> str:
+        """Add one request to the totals and return a log line describing it."""
+
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost or 0.0
+        METRICS.llm_tokens.inc(prompt_tokens, kind="prompt")
+        METRICS.llm_tokens.inc(completion_tokens, kind="completion")
+        return (
+            f"Token usage for {label} ({model}): prompt={prompt_tokens} "
+            f"completion={completion_tokens} cost={f'${cost:.5f}' if cost is not None else 'n/a'}"
+        )
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} request(s), {self.prompt_tokens} prompt + "
+            f"{self.completion_tokens} completion tokens, est. ${self.cost:.4f}"
+        )
+
+
+def response_usage(response: object) -> Tuple[int, int]:
+    """Extract ``(prompt, completion)`` token counts from an OpenAI response.
+
+    Handles both the Chat Completions (``prompt_tokens``) and Responses
+    (``input_tokens``) shapes; missing usage yields zeros.
+    """
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", 0)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", 0)
+    return int(prompt or 0), int(completion or 0)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Publish content-hashed copies of the frontend data files.
+
+``npm run build:nasa-data`` writes ``public/data/index.json`` and
+``public/data/papers/<id>.json`` under fixed names, so browsers and the
+service worker have to revalidate every file after a deploy. This step copies
+each file to a name carrying a hash of its bytes
+(``papers/exp_001.3f9c2a1b7d4e.json``, ``index.5be0c1d2a9f3.json``) and writes
+``public/data/manifest.json`` mapping logical names to hashed ones:
+
+    {"version": 1, "index": "index.5be0c1d2a9f3.json",
+     "papers": {"exp_001": "papers/exp_001.3f9c2a1b7d4e.json", ...}}
+
+A hashed file never changes, so clients cache it forever and only fetch the
+papers whose hash moved. Hashes depend only on content: a paper that did not
+change keeps its name across runs. The unhashed files stay in place for older
+clients. Hashed files referenced by neither the new nor the previous manifest
+are deleted, so clients still holding the previous manifest keep working for
+one more generation.
+
+It runs automatically after ``npm run build:nasa-data`` (``postbuild:nasa-data``)
+and can be run by hand:
+
+    python scripts/public_assets.py --out-dir public/data
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+_HASHED_NAME = re.compile(r"^(?P<stem>[^.]+)\.(?P<digest>[0-9a-f]{%d})\.json$" % HASH_LENGTH)
+
+
+def content_hash(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+
+
+def is_hashed(name: str) -> bool:
+    return _HASHED_NAME.match(name) is not None
+
+
+def _publish_file(source: Path) -> str:
+    """Write ``source`` next to itself under its hashed name; returns that name."""
+
+    payload = source.read_bytes()
+    target = source.with_name(f"{source.stem}.{content_hash(payload)}.json")
+    if not target.exists():
+        temporary = target.with_suffix(".json.tmp")
+        temporary.write_bytes(payload)
+        os.replace(temporary, target)
+    return target.name
+
+
+def _referenced(manifest: Dict[str, object]) -> Set[str]:
+    paths = set((manifest.get("papers") or {}).values())
+    if manifest.get("index"):
+        paths.add(str(manifest["index"]))
+    return paths
+
+
+def load_manifest(out_dir: Path) -> Optional[Dict[str, object]]:
+    try:
+        manifest = json.loads((out_dir / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def publish(out_dir: Path, prune: bool = True) -> Dict[str, object]:
+    """Hash ``index.json`` and every paper in ``out_dir`` and write the manifest."""
+
+    index_path = out_dir / "index.json"
+    if not index_path.exists():
+        raise FileNotFoundError(f"{index_path} not found; run `npm run build:nasa-data` first")
+    papers_dir = out_dir / "papers"
+    previous = load_manifest(out_dir) or {}
+
+    papers: Dict[str, str] = {}
+    written = 0
+    for source in sorted(papers_dir.glob("*.json")):
+        if is_hashed(source.name):
+            continue
+        name = f"papers/{_publish_file(source)}"
+        if (previous.get("papers") or {}).get(source.stem) != name:
+            written += 1
+        papers[source.stem] = name
+
+    manifest: Dict[str, object] = {
+        "version": MANIFEST_VERSION,
+        "index": _publish_file(index_path),
+        "papers": papers,
+    }
+    temporary = out_dir / (MANIFEST_FILENAME + ".tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(temporary, out_dir / MANIFEST_FILENAME)
+
+    removed = 0
+    if prune:
+        keep = _referenced(manifest) | _referenced(previous)
+        for candidate in [*out_dir.glob("*.json"), *papers_dir.glob("*.json")]:
+            if is_hashed(candidate.name) and candidate.relative_to(out_dir).as_posix() not in keep:
+                candidate.unlink()
+                removed += 1
+
+    logger.info(
+        "Published %d hashed paper(s) (%d changed), index %s; removed %d stale file(s)",
+        len(papers),
+        written,
+        manifest["index"],
+        removed,
+    )
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write content-hashed copies of public/data and a manifest")
+    parser.add_argument("--out-dir", type=Path, default=Path("public/data"), help="Frontend data directory")
+    parser.add_argument("--no-prune", action="store_true", help="Keep hashed files that no manifest references")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        publish(args.out_dir, prune=not args.no_prune)
+    except (OSError, ValueError) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Live Prometheus-format metrics for long ``pmc_ingest`` and ``summarize_jsons`` runs.
+
+Instrumented code updates the module-level :data:`METRICS` registry (a lock and
+a few additions per event, so it is always on). Nothing leaves the process
+unless an exporter is started:
+
+* ``--metrics-port 9108`` serves ``GET /metrics`` on ``127.0.0.1``, ready to be
+  scraped by Prometheus or read with ``curl``;
+* ``--metrics-textfile data/metrics/ingest.prom`` rewrites the file every few
+  seconds (atomically) for node_exporter's textfile collector or ``watch cat``.
+
+Exported series (all prefixed ``pmc_``): rows processed and rows planned per
+run, HTML/parse cache hits and misses, fetch/parse/LLM latency histograms, LLM
+tokens, failures per stage, and per-run throughput and ETA derived from the
+rows processed so far. No ``prometheus_client`` dependency: the text
+exposition format is written directly.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TEXTFILE_INTERVAL = 5.0
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum].
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[position] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class RunMetrics:
+    """The metric families shared by the ingest and summarise runs."""
+
+    def __init__(self) -> None:
+        self.rows_processed = Counter("pmc_rows_processed_total", "Rows finished, by run and outcome.", ("run", "outcome"))
+        self.rows_planned = Gauge("pmc_rows_planned", "Rows scheduled for the current run.", ("run",))
+        self.cache_hits = Counter("pmc_cache_hits_total", "Cache hits, by cache.", ("cache",))
+        self.cache_misses = Counter("pmc_cache_misses_total", "Cache misses, by cache.", ("cache",))
+        self.fetch_seconds = Histogram("pmc_fetch_seconds", "Latency of article HTML downloads.")
+        self.parse_seconds = Histogram("pmc_parse_seconds", "Latency of HTML extraction, by extractor.", ("extractor",))
+        self.llm_seconds = Histogram("pmc_llm_seconds", "Latency of LLM requests, by outcome.", ("outcome",))
+        self.llm_tokens = Counter("pmc_llm_tokens_total", "LLM tokens used, by kind.", ("kind",))
+        self.failures = Counter("pmc_failures_total", "Failures, by stage.", ("stage",))
+        self.throughput = Gauge("pmc_run_rows_per_second", "Rows finished per second since the run started.", ("run",))
+        self.eta = Gauge("pmc_run_eta_seconds", "Estimated seconds until the run's planned rows are finished.", ("run",))
+        self.elapsed = Gauge("pmc_run_elapsed_seconds", "Seconds since the run started.", ("run",))
+        self._families = [
+            self.rows_processed,
+            self.rows_planned,
+            self.cache_hits,
+            self.cache_misses,
+            self.fetch_seconds,
+            self.parse_seconds,
+            self.llm_seconds,
+            self.llm_tokens,
+            self.failures,
+            self.throughput,
+            self.eta,
+            self.elapsed,
+        ]
+        self._started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def start_run(self, run: str, planned: int) -> None:
+        """Begin timing ``run`` with ``planned`` rows; calling again adds to the plan."""
+
+        with self._lock:
+            self._started.setdefault(run, time.monotonic())
+        self.rows_planned.inc(planned, run=run)
+
+    def row_done(self, run: str, outcome: str = "ok") -> None:
+        self.rows_processed.inc(run=run, outcome=outcome)
+
+    def cache(self, name: str, hit: bool) -> None:
+        (self.cache_hits if hit else self.cache_misses).inc(cache=name)
+
+    def _update_derived(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            runs = dict(self._started)
+        with self.rows_processed._lock:
+            done: Dict[str, float] = {}
+            for (run, _), value in self.rows_processed._values.items():
+                done[run] = done.get(run, 0.0) + value
+        for run, started in runs.items():
+            elapsed = now - started
+            finished = done.get(run, 0.0)
+            rate = finished / elapsed if elapsed > 0 else 0.0
+            remaining = max(self.rows_planned.value(run=run) - finished, 0.0)
+            self.elapsed.set(round(elapsed, 3), run=run)
+            self.throughput.set(round(rate, 4), run=run)
+            if remaining == 0:
+                self.eta.set(0, run=run)
+            elif rate > 0:
+                self.eta.set(round(remaining / rate, 1), run=run)
+
+    def render(self) -> str:
+        self._update_derived()
+        lines: List[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = RunMetrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: RunMetrics = METRICS
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - http.server API
+        logger.debug("metrics %s", format % args)
+
+
+def write_textfile(path: Path, registry: RunMetrics = METRICS) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(registry.render(), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+class MetricsExporter:
+    """Runs the optional HTTP endpoint and/or textfile writer for one process."""
+
+    def __init__(
+        self,
+        port: Optional[int] = None,
+        textfile: Optional[Path] = None,
+        host: str = "127.0.0.1",
+        interval: float = TEXTFILE_INTERVAL,
+        registry: RunMetrics = METRICS,
+    ):
+        self.textfile = textfile
+        self.interval = interval
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        if port is not None:
+            handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+            self._server = ThreadingHTTPServer((host, port), handler)
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+            logger.info("Serving metrics on http://%s:%d/metrics", host, self._server.server_address[1])
+        if textfile is not None:
+            self._threads.append(threading.Thread(target=self._write_loop, name="metrics-textfile", daemon=True))
+            logger.info("Writing metrics to %s every %.0fs", textfile, interval)
+        for thread in self._threads:
+            thread.start()
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_textfile(self.textfile, self.registry)
+            except OSError as exc:
+                logger.warning("Could not write metrics to %s: %s", self.textfile, exc)
+
+    def close(self) -> None:
+        """Stop exporting; the textfile keeps the final values."""
+
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.textfile is not None:
+            try:
+                write_textfile(self.textfile, self.registry)
+            except OSError as exc:
+                logger.warning("Could not write metrics to %s: %s", self.textfile, exc)
+
+    def __enter__(self) -> "MetricsExporter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Near-duplicate and boilerplate section detection with MinHash/LSH.
+
+``detect_section`` occasionally captures navigation text, figure legends, or the
+same paragraph under both *results* and *conclusion*. This module removes that
+noise before dossiers are written or prompts are built:
+
+Within a paper
+    A section that is a near-duplicate of an earlier one is dropped entirely;
+    otherwise each sentence is compared (MinHash over word shingles, bucketed
+    with LSH) against the sentences already kept and repeats are stripped.
+Across the corpus
+    Sentences that recur near-verbatim in at least ``--min-papers`` dossiers
+    are treated as boilerplate (licence blurbs, "Open in a separate window",
+    figure legend templates). They are stripped from every dossier and saved to
+    a boilerplate file that ``pmc_ingest.py --boilerplate`` applies at ingest
+    time.
+
+Every pass reports the bytes and tokens saved:
+
+    python scripts/section_dedupe.py --json-dir data/papers               # report only
+    python scripts/section_dedupe.py --json-dir data/papers --apply \\
+        --boilerplate-out data/boilerplate.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dossier_schema import save_dossier
+from metrics_engine import tokenize
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.8
+MIN_SENTENCE_TOKENS = 6
+MIN_BOILERPLATE_PAPERS = 3
+SEED = 1729
+_PRIME = (1 << 31) - 1
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in _SENTENCE_SPLIT.split(text.strip()) if sentence]
+
+
+def shingle_hashes(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> np.ndarray:
+    """CRC32 hashes of the ``size``-token shingles of ``tokens``."""
+
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)]
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in set(grams)), dtype=np.uint64)
+
+
+class MinHasher:
+    """Universal-hash MinHash: ``min((a * x + b) mod p)`` for ``num_perm`` seeds."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.seed = seed
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, features: np.ndarray) -> np.ndarray:
+        if not features.size:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        values = (self._a[:, None] * (features[None, :] % _PRIME) + self._b[:, None]) % _PRIME
+        return values.min(axis=1)
+
+    def text_signature(self, text: str) -> Tuple[np.ndarray, int]:
+        """Return ``(signature, token_count)`` for ``text``."""
+
+        tokens = tokenize(text)
+        return self.signature(shingle_hashes(tokens)), len(tokens)
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    return float(np.count_nonzero(left == right)) / len(left)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures; candidates are verified by the caller."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by the number of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self.signatures: List[np.ndarray] = []
+
+    def _keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows].tobytes()
+
+    def add(self, signature: np.ndarray) -> int:
+        key = len(self.signatures)
+        self.signatures.append(signature)
+        for bucket in self._keys(signature):
+            self._buckets[bucket].append(key)
+        return key
+
+    def query(self, signature: np.ndarray, threshold: float = SIMILARITY_THRESHOLD) -> List[int]:
+        seen = set()
+        matches: List[int] = []
+        for bucket in self._keys(signature):
+            for key in self._buckets.get(bucket, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if estimate_similarity(signature, self.signatures[key]) >= threshold:
+                    matches.append(key)
+        return matches
+
+
+@dataclass
+class DedupeReport:
+    papers: int = 0
+    sections_removed: int = 0
+    sentences_removed: int = 0
+    boilerplate_removed: int = 0
+    bytes_saved: int = 0
+    tokens_saved: int = 0
+    duplicate_sections: List[str] = field(default_factory=list)
+    duplicates_by_paper: Dict[str, List[str]] = field(default_factory=dict)
+
+    def merge(self, other: "DedupeReport", paper_id: Optional[str] = None) -> None:
+        self.papers += other.papers
+        self.sections_removed += other.sections_removed
+        self.sentences_removed += other.sentences_removed
+        self.boilerplate_removed += other.boilerplate_removed
+        self.bytes_saved += other.bytes_saved
+        self.tokens_saved += other.tokens_saved
+        if paper_id and other.duplicate_sections:
+            self.duplicates_by_paper[paper_id] = list(other.duplicate_sections)
+
+    def summary(self) -> str:
+        return (
+            f"{self.papers} papers: {self.sections_removed} duplicate sections, "
+            f"{self.sentences_removed} repeated sentences, {self.boilerplate_removed} boilerplate sentences removed; "
+            f"saved {self.bytes_saved} bytes / {self.tokens_saved} tokens"
+        )
+
+
+class BoilerplateIndex:
+    """Known boilerplate sentences, matched approximately via LSH."""
+
+    def __init__(self, sentences: Iterable[str] = (), hasher: Optional[MinHasher] = None):
+        self.hasher = hasher or MinHasher()
+        self.sentences: List[str] = []
+        self._lsh = LSHIndex(self.hasher.num_perm)
+        for sentence in sentences:
+            self.add(sentence)
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def add(self, sentence: str) -> None:
+        signature, _ = self.hasher.text_signature(sentence)
+        self.sentences.append(sentence)
+        self._lsh.add(signature)
+
+    def matches(self, signature: np.ndarray) -> bool:
+        return bool(self._lsh.query(signature))
+
+    def save(self, path: Path) -> None:
+        payload = {"num_perm": self.hasher.num_perm, "seed": self.hasher.seed, "sentences": self.sentences}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "BoilerplateIndex":
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        hasher = MinHasher(payload.get("num_perm", NUM_PERM), payload.get("seed", SEED))
+        return cls(payload.get("sentences", []), hasher)
+
+
+def _size(text: str) -> Tuple[int, int]:
+    return len(text.encode("utf-8")), len(tokenize(text))
+
+
+def dedupe_sections(
+    sections: Dict[str, str],
+    boilerplate: Optional[BoilerplateIndex] = None,
+    hasher: Optional[MinHasher] = None,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> Tuple[Dict[str, str], DedupeReport]:
+    """Strip duplicate sections, repeated sentences and known boilerplate.
+
+    Sections are processed in their dict order, so the first occurrence of any
+    repeated text is the one that survives.
+    """
+
+    hasher = boilerplate.hasher if boilerplate is not None else hasher or MinHasher()
+    report = DedupeReport(papers=1)
+    section_index = LSHIndex(hasher.num_perm)
+    sentence_index = LSHIndex(hasher.num_perm)
+    cleaned: Dict[str, str] = {}
+
+    for name, text in sections.items():
+        if not isinstance(text, str) or not text.strip():
+            cleaned[name] = text
+            continue
+
+        before_bytes, before_tokens = _size(text)
+        section_signature, token_count = hasher.text_signature(text)
+        if token_count >= MIN_SENTENCE_TOKENS and section_index.query(section_signature, threshold):
+            cleaned[name] = ""
+            report.sections_removed += 1
+            report.duplicate_sections.append(name)
+            report.bytes_saved += before_bytes
+            report.tokens_saved += before_tokens
+            continue
+        section_index.add(section_signature)
+
+        kept: List[str] = []
+        for sentence in split_sentences(text):
+            signature, sentence_tokens = hasher.text_signature(sentence)
+            if sentence_tokens < MIN_SENTENCE_TOKENS:
+                kept.append(sentence)
+                continue
+            if boilerplate is not None and boilerplate.matches(signature):
+                report.boilerplate_removed += 1
+                continue
+            if sentence_index.query(signature, threshold):
+                report.sentences_removed += 1
+                continue
+            sentence_index.add(signature)
+            kept.append(sentence)
+
+        result = " ".join(kept)
+        after_bytes, after_tokens = _size(result)
+        report.bytes_saved += before_bytes - after_bytes
+        report.tokens_saved += before_tokens - after_tokens
+        cleaned[name] = result
+
+    return cleaned, report
+
+
+def find_boilerplate(
+    corpus_sections: Iterable[Dict[str, str]],
+    min_papers: int = MIN_BOILERPLATE_PAPERS,
+    hasher: Optional[MinHasher] = None,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> BoilerplateIndex:
+    """Cluster near-identical sentences across papers and keep the recurring ones."""
+
+    hasher = hasher or MinHasher()
+    lsh = LSHIndex(hasher.num_perm)
+    representatives: List[str] = []
+    papers_per_cluster: List[set] = []
+
+    for paper, sections in enumerate(corpus_sections):
+        for text in sections.values():
+            if not isinstance(text, str):
+                continue
+            for sentence in split_sentences(text):
+                signature, token_count = hasher.text_signature(sentence)
+                if token_count < MIN_SENTENCE_TOKENS:
+                    continue
+                matches = lsh.query(signature, threshold)
+                if matches:
+                    papers_per_cluster[matches[0]].add(paper)
+                    continue
+                lsh.add(signature)
+                representatives.append(sentence)
+                papers_per_cluster.append({paper})
+
+    recurring = [sentence for sentence, papers in zip(representatives, papers_per_cluster) if len(papers) >= min_papers]
+    logger.info(
+        "Found %d boilerplate sentences (seen in >= %d papers) among %d distinct sentences",
+        len(recurring),
+        min_papers,
+        len(representatives),
+    )
+    return BoilerplateIndex(recurring, hasher)
+
+
+def dedupe_corpus(
+    json_dir: Path,
+    apply: bool = False,
+    min_papers: int = MIN_BOILERPLATE_PAPERS,
+    boilerplate_out: Optional[Path] = None,
+) -> DedupeReport:
+    from corpus_export import iter_dossier_paths, iter_dossiers
+
+    def all_sections() -> Iterable[Dict[str, str]]:
+        for data in iter_dossiers(json_dir):
+            sections = data.get("sections")
+            yield sections if isinstance(sections, dict) else {}
+
+    boilerplate = find_boilerplate(all_sections(), min_papers=min_papers)
+    if boilerplate_out:
+        boilerplate.save(boilerplate_out)
+        logger.info("Saved %d boilerplate sentences to %s", len(boilerplate), boilerplate_out)
+
+    total = DedupeReport()
+    for path in iter_dossier_paths(json_dir):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        sections = data.get("sections")
+        if not isinstance(sections, dict):
+            continue
+        cleaned, report = dedupe_sections(sections, boilerplate)
+        total.merge(report, str(data.get("id") or path.stem))
+        if report.bytes_saved:
+            logger.debug("%s: %s", path.name, report.summary())
+            if apply:
+                data["sections"] = cleaned
+                save_dossier(path, data)
+
+    logger.info("%s%s", "Deduplicated " if apply else "Would deduplicate ", total.summary())
+    return total
+
+
+def main() -> None:
+    from pmc_ingest import configure_logging, normalize_json_dir
+
+    parser = argparse.ArgumentParser(description="Detect and strip duplicate and boilerplate dossier sections")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--apply", action="store_true", help="Rewrite dossiers with duplicates removed (default: report only)")
+    parser.add_argument("--min-papers", type=int, default=MIN_BOILERPLATE_PAPERS, help="Papers a sentence must recur in to count as boilerplate")
+    parser.add_argument("--boilerplate-out", type=Path, default=None, help="Save detected boilerplate for pmc_ingest.py --boilerplate")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    configure_logging(args.verbose, args.quiet)
+    logger.debug("CLI arguments: %s", args)
+    try:
+        dedupe_corpus(
+            normalize_json_dir(args.json_dir),
+            apply=args.apply,
+            min_papers=args.min_papers,
+            boilerplate_out=args.boilerplate_out,
+        )
+    except Exception as exc:
+        logger.exception("Section deduplication failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Deterministic sharding for ``pmc_ingest.py`` and merging of shard outputs.
+
+``pmc_ingest.py --shard i/N`` (``0 <= i < N``) keeps only the CSV rows whose
+PMCID hashes to shard ``i``. Every shard reads the full CSV, so dossier ids
+(``exp_<row>``) are identical to an unsharded run no matter how the work is
+split. Each shard writes ``shard-<i>-of-<N>.manifest.json`` next to its
+dossier directory listing the rows it owns and the SHA-256 of every dossier
+it produced.
+
+``merge`` validates a set of manifests (same CSV, same ``N``, every shard
+present, hashes intact, no conflicting ids) and copies the dossiers into
+``data/papers``; ``--build-index`` then regenerates the frontend index with
+``npm run build:nasa-data``. ``run-local`` starts ``N`` ingest processes on
+this machine, standing in for separate hosts, and merges their output:
+
+    python scripts/shard_merge.py run-local --shards 4 --work-dir data/shards -- --llm off
+    python scripts/shard_merge.py merge data/shards/*/*.manifest.json --out data/papers --build-index
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+MANIFEST_VERSION = 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``"i/N"`` into ``(i, N)``; raises ``ValueError`` when malformed."""
+
+    try:
+        index_text, count_text = value.split("/", 1)
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {value!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must satisfy 0 <= i < N, got {value!r}")
+    return index, count
+
+
+def shard_of(pmcid: str, count: int) -> int:
+    """Stable shard for ``pmcid`` (independent of row order and Python's hash seed)."""
+
+    digest = hashlib.sha256(pmcid.strip().upper().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_label(index: int, count: int) -> str:
+    return f"shard-{index:02d}-of-{count:02d}"
+
+
+def manifest_path(json_dir: Path, index: int, count: int) -> Path:
+    return json_dir.parent / f"{shard_label(index, count)}.manifest.json"
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def write_manifest(
+    json_dir: Path,
+    shard: Tuple[int, int],
+    csv_path: Path,
+    assigned: Sequence[Tuple[str, str]],
+    extractor_version: int,
+) -> Path:
+    """Record which ``(id, pmcid)`` rows this shard owns and what it wrote."""
+
+    index, count = shard
+    path = manifest_path(json_dir, index, count)
+    dossiers: Dict[str, Dict[str, str]] = {}
+    missing: List[Dict[str, str]] = []
+    for record_id, pmcid in assigned:
+        dossier = json_dir / f"{record_id}.json"
+        if dossier.exists():
+            dossiers[record_id] = {"pmcid": pmcid, "sha256": file_sha256(dossier)}
+        else:
+            missing.append({"id": record_id, "pmcid": pmcid})
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "shard": index,
+        "shards": count,
+        "csv": str(csv_path),
+        "csv_sha256": file_sha256(csv_path),
+        "extractor_version": extractor_version,
+        "host": socket.gethostname(),
+        "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "papers_dir": os.path.relpath(json_dir, path.parent),
+        "assigned": len(assigned),
+        "dossiers": dossiers,
+        "missing": missing,
+    }
+    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    logger.info(
+        "Wrote %s: %d/%d dossiers present, %d missing",
+        path,
+        len(dossiers),
+        len(assigned),
+        len(missing),
+    )
+    return path
+
+
+def load_manifests(paths: Iterable[Path]) -> List[Tuple[Path, Dict[str, object]]]:
+    manifests = []
+    for path in paths:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{path}: unsupported manifest version {data.get('version')!r}")
+        manifests.append((path, data))
+    return manifests
+
+
+def validate_manifests(manifests: List[Tuple[Path, Dict[str, object]]], allow_partial: bool = False) -> int:
+    """Check that ``manifests`` describe one consistent split; returns ``N``."""
+
+    if not manifests:
+        raise ValueError("no shard manifests given")
+    counts = {data["shards"] for _, data in manifests}
+    csv_hashes = {data["csv_sha256"] for _, data in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"manifests disagree on shard count: {sorted(counts)}")
+    if len(csv_hashes) != 1:
+        raise ValueError("manifests were produced from different CSV files")
+    count = counts.pop()
+
+    seen: Dict[int, Path] = {}
+    for path, data in manifests:
+        index = data["shard"]
+        if index in seen:
+            raise ValueError(f"shard {index}/{count} appears twice ({seen[index]} and {path})")
+        seen[index] = path
+    absent = sorted(set(range(count)) - set(seen))
+    if absent:
+        message = f"missing shard(s) {', '.join(f'{i}/{count}' for i in absent)}"
+        if not allow_partial:
+            raise ValueError(message + " (pass --allow-partial to merge anyway)")
+        logger.warning(message)
+    return count
+
+
+def merge_shards(
+    manifest_paths: Sequence[Path],
+    out_dir: Path,
+    allow_partial: bool = False,
+) -> Dict[str, int]:
+    """Copy every shard's dossiers into ``out_dir`` after validating them."""
+
+    manifests = load_manifests(manifest_paths)
+    count = validate_manifests(manifests, allow_partial=allow_partial)
+
+    # Validate every shard before touching out_dir so a bad shard never
+    # leaves a half-merged corpus behind.
+    copies: List[Tuple[Path, Path, str]] = []
+    missing = 0
+    owners: Dict[str, int] = {}
+    for path, data in sorted(manifests, key=lambda item: item[1]["shard"]):
+        index = data["shard"]
+        papers_dir = (path.parent / data["papers_dir"]).resolve()
+        for record_id, entry in sorted(data["dossiers"].items()):
+            if record_id in owners:
+                raise ValueError(f"{record_id} claimed by shards {owners[record_id]} and {index}")
+            owners[record_id] = index
+            if shard_of(entry["pmcid"], count) != index:
+                raise ValueError(f"{record_id} ({entry['pmcid']}) does not belong to shard {index}/{count}")
+            source = papers_dir / f"{record_id}.json"
+            if not source.exists() or file_sha256(source) != entry["sha256"]:
+                raise ValueError(f"{source} is missing or differs from {path.name}; re-run that shard")
+            copies.append((source, out_dir / f"{record_id}.json", entry["sha256"]))
+        for entry in data["missing"]:
+            logger.warning("Shard %d/%d has no dossier for %s (%s)", index, count, entry["id"], entry["pmcid"])
+        missing += len(data["missing"])
+
+    stats = {"copied": 0, "unchanged": 0, "missing": missing}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for source, target, digest in copies:
+        if target.exists() and file_sha256(target) == digest:
+            stats["unchanged"] += 1
+            continue
+        temporary = target.with_suffix(".json.tmp")
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, target)
+        stats["copied"] += 1
+
+    logger.info(
+        "Merged %d shard(s) into %s: %d copied, %d unchanged, %d missing",
+        len(manifests),
+        out_dir,
+        stats["copied"],
+        stats["unchanged"],
+        stats["missing"],
+    )
+    return stats
+
+
+def build_frontend_index(repo_root: Path) -> None:
+    """Regenerate ``public/data`` from ``data/papers`` via the TypeScript builder."""
+
+    logger.info("Rebuilding frontend index with npm run build:nasa-data")
+    subprocess.run(["npm", "run", "build:nasa-data"], cwd=repo_root, check=True)
+
+
+def run_local(
+    count: int,
+    work_dir: Path,
+    ingest_args: Sequence[str],
+    out_dir: Optional[Path] = None,
+    build_index: bool = False,
+) -> Dict[str, int]:
+    """Run ``count`` ingest processes in parallel, one per shard, then merge."""
+
+    processes = []
+    manifests = []
+    for index in range(count):
+        json_dir = work_dir / shard_label(index, count) / "papers"
+        command = [
+            sys.executable,
+            str(SCRIPT_DIR / "pmc_ingest.py"),
+            "--shard",
+            f"{index}/{count}",
+            "--json-dir",
+            str(json_dir),
+            *ingest_args,
+        ]
+        logger.info("Starting %s: %s", shard_label(index, count), " ".join(command))
+        processes.append(subprocess.Popen(command))
+        manifests.append(manifest_path(json_dir, index, count))
+
+    failed = [index for index, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"shard(s) {failed} exited with an error; see their logs above")
+    stats = merge_shards(manifests, out_dir or Path("data/papers"))
+    if build_index:
+        build_frontend_index(SCRIPT_DIR.parent)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge sharded pmc_ingest output or run shards locally")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge = subparsers.add_parser("merge", help="Validate shard manifests and merge their dossiers")
+    merge.add_argument("manifests", nargs="+", type=Path, help="shard-*.manifest.json files")
+    merge.add_argument("--out", type=Path, default=Path("data/papers"), help="Merged dossier directory")
+    merge.add_argument("--allow-partial", action="store_true", help="Merge even if some shards are absent")
+    merge.add_argument("--build-index", action="store_true", help="Run npm run build:nasa-data after merging")
+
+    local = subparsers.add_parser("run-local", help="Run N shard processes on this machine, then merge")
+    local.add_argument("--shards", type=int, required=True, help="Number of shards / processes")
+    local.add_argument("--work-dir", type=Path, default=Path("data/shards"), help="Where shard outputs are written")
+    local.add_argument("--out", type=Path, default=Path("data/papers"), help="Merged dossier directory")
+    local.add_argument("--build-index", action="store_true", help="Run npm run build:nasa-data after merging")
+    local.add_argument("ingest_args", nargs=argparse.REMAINDER, help="Arguments passed to pmc_ingest.py after --")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging
+
+    configure_logging(args.verbose, args.quiet)
+    try:
+        if args.command == "merge":
+            merge_shards(args.manifests, args.out, allow_partial=args.allow_partial)
+            if args.build_index:
+                build_frontend_index(SCRIPT_DIR.parent)
+        else:
+            ingest_args = [arg for arg in args.ingest_args if arg != "--"]
+            run_local(args.shards, args.work_dir, ingest_args, out_dir=args.out, build_index=args.build_index)
+    except (OSError, ValueError, RuntimeError, subprocess.CalledProcessError) as exc:
+        logger.error("%s", exc)
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Offline "related experiments" index built with NumPy only.
+
+Pipeline stage that embeds every dossier and precomputes its nearest
+neighbours, without network access, GPUs or extra ML dependencies:
+
+1. Hashing vectoriser: section tokens are hashed (CRC32) into a fixed number of
+   features, weighted with sublinear TF-IDF and stored as CSR arrays.
+2. Randomised truncated SVD (Halko et al.) reduces the sparse matrix to dense,
+   L2-normalised ``float32`` vectors. The matrix is written as a raw
+   memory-mapped file (``embeddings.f32``) plus a small JSON header.
+3. Top-k neighbours are found with batched dense matrix products, so peak
+   memory is ``batch_size x n_papers`` floats regardless of corpus size.
+
+The neighbour lists are written to a sidecar (``similar.json``) and, with
+``--write-dossiers``, into each dossier under ``related``:
+
+    python scripts/similar_papers.py --out data/similar --top-k 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dossier_schema import save_dossier
+from corpus_export import iter_dossier_paths
+from metrics_engine import tokenize
+from pmc_ingest import STOPWORDS, configure_logging, normalize_json_dir
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 2**18
+EMBEDDING_DIM = 128
+OVERSAMPLE = 10
+POWER_ITERATIONS = 2
+DEFAULT_TOP_K = 8
+BATCH_SIZE = 512
+CHUNK_NNZ = 1 << 16
+SEED = 20240601
+
+
+@dataclass
+class SparseMatrix:
+    """Minimal CSR matrix: row ``i`` spans ``indices/data[indptr[i]:indptr[i+1]]``.
+
+    Products are evaluated over row chunks of at most ``CHUNK_NNZ`` non-zeros so
+    the temporary ``nnz x r`` buffers stay small for large corpora.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_features: int
+    _transposed: Optional["SparseMatrix"] = field(default=None, repr=False)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def _row_chunks(self) -> Iterable[Tuple[int, int]]:
+        start = 0
+        while start < self.n_rows:
+            limit = self.indptr[start] + CHUNK_NNZ
+            stop = int(np.searchsorted(self.indptr, limit, side="right")) - 1
+            stop = min(max(stop, start + 1), self.n_rows)
+            yield start, stop
+            start = stop
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """``X @ dense`` for a dense ``(n_features, r)`` matrix."""
+
+        out = np.zeros((self.n_rows, dense.shape[1]), dtype=np.float32)
+        for start, stop in self._row_chunks():
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            product = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+            bounds = self.indptr[start:stop] - lo
+            filled = np.diff(self.indptr[start : stop + 1]) > 0
+            out[start:stop][filled] = np.add.reduceat(product, bounds[filled], axis=0)
+        return out
+
+    def transpose(self) -> "SparseMatrix":
+        order = np.argsort(self.indices, kind="stable")
+        rows = np.repeat(np.arange(self.n_rows, dtype=np.int64), np.diff(self.indptr))
+        indptr = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.n_features), out=indptr[1:])
+        return SparseMatrix(indptr=indptr, indices=rows[order], data=self.data[order], n_features=self.n_rows)
+
+    def tdot(self, dense: np.ndarray) -> np.ndarray:
+        """``X.T @ dense`` for a dense ``(n_rows, r)`` matrix."""
+
+        if self._transposed is None:
+            self._transposed = self.transpose()
+        return self._transposed.dot(dense)
+
+
+def document_text(data: Dict[str, object]) -> str:
+    parts: List[str] = [str(data.get("title") or "")]
+    keywords = data.get("keywords")
+    if isinstance(keywords, list):
+        parts.extend(str(keyword) for keyword in keywords)
+    sections = data.get("sections")
+    if isinstance(sections, dict):
+        parts.extend(text for text in sections.values() if isinstance(text, str))
+    return " ".join(parts)
+
+
+def hash_token(token: str, n_features: int = N_FEATURES) -> int:
+    return zlib.crc32(token.encode("utf-8")) % n_features
+
+
+def vectorize(texts: Iterable[str], n_features: int = N_FEATURES) -> SparseMatrix:
+    """Hash ``texts`` into an L2-normalised sublinear TF-IDF CSR matrix."""
+
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[float] = []
+    for text in texts:
+        hashed = Counter(
+            hash_token(token, n_features)
+            for token in tokenize(text)
+            if len(token) > 2 and token not in STOPWORDS and not token.isdigit()
+        )
+        for feature in sorted(hashed):
+            indices.append(feature)
+            counts.append(1.0 + math.log(hashed[feature]))
+        indptr.append(len(indices))
+
+    # Only hashed buckets that actually occur become columns, so the dense
+    # random projections below scale with the vocabulary, not ``n_features``.
+    used, compact = np.unique(np.asarray(indices, dtype=np.int64), return_inverse=True)
+    matrix = SparseMatrix(
+        indptr=np.asarray(indptr, dtype=np.int64),
+        indices=compact.astype(np.int64),
+        data=np.asarray(counts, dtype=np.float32),
+        n_features=len(used),
+    )
+    n_docs = max(matrix.n_rows, 1)
+    df = np.bincount(matrix.indices, minlength=matrix.n_features)
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+    matrix.data *= idf[matrix.indices].astype(np.float32)
+
+    lengths = np.diff(matrix.indptr)
+    filled = lengths > 0
+    row_norms = np.ones(matrix.n_rows, dtype=np.float32)
+    if matrix.data.size:
+        row_norms[filled] = np.sqrt(np.add.reduceat(matrix.data**2, matrix.indptr[:-1][filled]))
+    matrix.data /= np.repeat(row_norms, lengths)
+    return matrix
+
+
+def randomized_svd_embed(matrix: SparseMatrix, dim: int = EMBEDDING_DIM, seed: int = SEED) -> np.ndarray:
+    """Project ``matrix`` onto its top ``dim`` singular directions (``U * S``)."""
+
+    n_rows = matrix.n_rows
+    dim = max(1, min(dim, n_rows - 1 if n_rows > 1 else 1, matrix.n_features))
+    rank = min(dim + OVERSAMPLE, n_rows, matrix.n_features)
+    rng = np.random.default_rng(seed)
+
+    sketch = matrix.dot(rng.standard_normal((matrix.n_features, rank), dtype=np.float32))
+    basis, _ = np.linalg.qr(sketch)
+    for _ in range(POWER_ITERATIONS):
+        basis, _ = np.linalg.qr(matrix.tdot(basis))
+        basis, _ = np.linalg.qr(matrix.dot(basis))
+
+    small = matrix.tdot(basis).T  # (rank, n_features) == basis.T @ X
+    u_small, singular, _ = np.linalg.svd(small, full_matrices=False)
+    embeddings = (basis @ u_small[:, :dim]) * singular[:dim]
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (embeddings / norms).astype(np.float32)
+
+
+def write_embeddings(embeddings: np.ndarray, ids: Sequence[str], out_dir: Path) -> Path:
+    """Store ``embeddings`` as a raw float32 memmap plus a JSON header."""
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    matrix_path = out_dir / "embeddings.f32"
+    mapped = np.memmap(matrix_path, dtype=np.float32, mode="w+", shape=embeddings.shape)
+    mapped[:] = embeddings
+    mapped.flush()
+    del mapped
+
+    header = {
+        "ids": list(ids),
+        "shape": list(embeddings.shape),
+        "dtype": "float32",
+        "n_features": N_FEATURES,
+        "seed": SEED,
+    }
+    (out_dir / "embeddings.json").write_text(json.dumps(header, indent=2), encoding="utf-8")
+    return matrix_path
+
+
+def load_embeddings(out_dir: Path) -> Tuple[List[str], np.memmap]:
+    """Open a stored embedding matrix read-only without loading it into RAM."""
+
+    header = json.loads((out_dir / "embeddings.json").read_text(encoding="utf-8"))
+    mapped = np.memmap(out_dir / "embeddings.f32", dtype=np.float32, mode="r", shape=tuple(header["shape"]))
+    return header["ids"], mapped
+
+
+def top_k_neighbors(
+    embeddings: np.ndarray,
+    top_k: int = DEFAULT_TOP_K,
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(indices, scores)`` of each row's ``top_k`` cosine neighbours."""
+
+    n_rows = embeddings.shape[0]
+    top_k = max(0, min(top_k, n_rows - 1))
+    indices = np.zeros((n_rows, top_k), dtype=np.int64)
+    scores = np.zeros((n_rows, top_k), dtype=np.float32)
+    if not top_k:
+        return indices, scores
+
+    for start in range(0, n_rows, batch_size):
+        stop = min(start + batch_size, n_rows)
+        sims = np.asarray(embeddings[start:stop]) @ np.asarray(embeddings).T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        candidates = np.argpartition(-sims, top_k - 1, axis=1)[:, :top_k]
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        indices[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return indices, scores
+
+
+def build_index(
+    json_dir: Path,
+    out_dir: Path,
+    top_k: int = DEFAULT_TOP_K,
+    dim: int = EMBEDDING_DIM,
+    write_dossiers: bool = False,
+) -> Dict[str, List[Dict[str, object]]]:
+    json_dir = normalize_json_dir(json_dir)
+    started = time.perf_counter()
+
+    paths: List[Path] = []
+    ids: List[str] = []
+    texts: List[str] = []
+    for path in iter_dossier_paths(json_dir):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Skipping unreadable dossier %s: %s", path, exc)
+            continue
+        paths.append(path)
+        ids.append(str(data.get("id") or path.stem))
+        texts.append(document_text(data))
+
+    if len(ids) < 2:
+        logger.warning("Need at least two dossiers to build a similarity index (found %d)", len(ids))
+        return {}
+
+    matrix = vectorize(texts)
+    logger.info("Vectorised %d dossiers (%d non-zero features)", matrix.n_rows, matrix.data.size)
+    embeddings = randomized_svd_embed(matrix, dim=dim)
+    write_embeddings(embeddings, ids, out_dir)
+    _, mapped = load_embeddings(out_dir)
+    neighbor_idx, neighbor_scores = top_k_neighbors(mapped, top_k=top_k)
+
+    related: Dict[str, List[Dict[str, object]]] = {}
+    for row, record_id in enumerate(ids):
+        related[record_id] = [
+            {"id": ids[col], "score": round(float(score), 4)}
+            for col, score in zip(neighbor_idx[row].tolist(), neighbor_scores[row].tolist())
+        ]
+    (out_dir / "similar.json").write_text(json.dumps(related, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if write_dossiers:
+        for path, record_id in zip(paths, ids):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            data["related"] = related[record_id]
+            save_dossier(path, data)
+
+    logger.info(
+        "Built %d-dim embeddings and top-%d neighbours for %d dossiers in %.2fs -> %s",
+        embeddings.shape[1],
+        top_k,
+        len(ids),
+        time.perf_counter() - started,
+        out_dir,
+    )
+    return related
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build an offline similar-papers index for Astro Genesis dossiers")
+    parser.add_argument("--json-dir", type=Path, default=Path("data/papers"), help="Directory for JSON dossiers")
+    parser.add_argument("--out", type=Path, default=Path("data/similar"), help="Directory for embeddings and similar.json")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Neighbours to keep per dossier")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="Embedding dimensionality")
+    parser.add_argument("--write-dossiers", action="store_true", help="Also store neighbours in each dossier under 'related'")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    configure_logging(args.verbose, args.quiet)
+    logger.debug("CLI arguments: %s", args)
+    try:
+        build_index(args.json_dir, args.out, top_k=args.top_k, dim=args.dim, write_dossiers=args.write_dossiers)
+    except Exception as exc:
+        logger.exception("Similar-papers index build failed")
+        raise SystemExit(1) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Event-driven PMC article extraction without building a DOM.
+
+``pmc_ingest.parse_article`` parses every page into a full BeautifulSoup tree,
+which costs many times the size of the HTML for multi-megabyte review and
+supplement-heavy pages, although only ``<meta>`` tags, the ``<title>``, a
+couple of container blocks and the text under headings are ever read.
+:class:`ArticleTarget` is a parser target for lxml's incremental HTML parser:
+it receives ``start``/``end``/``data`` events while the page is fed in chunks
+and keeps only the text it will return. Script, style, template and ``<nav>``
+content is skipped as it streams past.
+
+The output matches ``parse_article``: the same ``(meta, links, sections)``
+triple, section text collected from the siblings that follow a matching
+heading inside ``#maincontent`` (the whole page when it has none), and the
+``div.abstr`` / ``section.abstract`` fallback for the abstract. Select it
+with ``pmc_ingest.py --extractor streaming``. Benchmark both extractors over
+the raw HTML cache with:
+
+    python scripts/stream_extract.py --raw-dir data/raw_pmc
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from lxml import etree
+
+from metadata_repair import META_SOURCES, resolve_year_from
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+HEADING_TAGS = frozenset(f"h{level}" for level in range(1, 7))
+SKIPPED_TAGS = frozenset({"script", "style", "template", "noscript", "nav"})
+YEAR_META_NAMES = frozenset(name for _, names in META_SOURCES for name in names)
+
+# Heading labels per section, in the order ``parse_sections`` tries them.
+SECTION_LABELS: Sequence[Tuple[str, Sequence[str]]] = (
+    ("abstract", ("abstract",)),
+    ("methods", ("methods", "materials", "materials and methods", "experimental")),
+    ("results", ("results", "findings", "results and discussion")),
+    ("conclusion", ("conclusion", "conclusions", "summary", "closing remarks")),
+)
+_LABEL_PATTERNS = [
+    (section, [re.compile(rf"\b{re.escape(label)}\b", re.IGNORECASE) for label in labels])
+    for section, labels in SECTION_LABELS
+]
+
+ParsedArticle = Tuple[Dict[str, object], Dict[str, str], Dict[str, str]]
+
+
+def _normalise(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _Capture:
+    """Text collected for one heading, or inside one container element."""
+
+    __slots__ = ("depth", "in_main", "heading", "parts", "sections")
+
+    def __init__(self, depth: int, in_main: bool = False):
+        self.depth = depth
+        self.in_main = in_main
+        self.heading: Optional[List[str]] = []
+        self.parts: List[str] = []
+        self.sections: List[str] = []
+
+
+class ArticleTarget:
+    """lxml parser target collecting what ``parse_article`` reads from a page.
+
+    Heading captures follow ``detect_section``: a capture opens at an
+    ``<hN>``, gathers the heading text, and from the heading's end collects
+    every text node until a sibling heading starts or the heading's parent
+    closes. Headings that match no section label are dropped as soon as
+    their text is known, so memory holds only candidate section text.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._pending: List[str] = []
+        self._skip_depth: Optional[int] = None
+        self._json_ld: Optional[List[str]] = None
+        self._main_depth: Optional[int] = None
+        self.saw_main = False
+
+        self._headings: List[_Capture] = []
+        self.candidates: List[_Capture] = []
+        self._containers: Dict[str, _Capture] = {}
+        self.blocks: Dict[str, str] = {}
+
+        self.title_meta: Optional[str] = None
+        self.title_tag: Optional[str] = None
+        self._title: Optional[_Capture] = None
+        self.authors: List[str] = []
+        self.pdf_url: Optional[str] = None
+        self.year_metas: List[Tuple[str, str]] = []
+        self.json_ld: List[str] = []
+
+    # -- parser target interface ---------------------------------------------------------
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self._flush()
+        depth = self._depth
+        self._depth += 1
+        if self._skip_depth is not None:
+            return
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = depth
+            if tag == "script" and attrib.get("type") == "application/ld+json":
+                self._json_ld = []
+            return
+
+        if tag == "meta":
+            self._meta(attrib)
+        elif tag == "title" and self.title_tag is None and self._title is None:
+            self._title = _Capture(depth)
+        elif tag in HEADING_TAGS:
+            # A sibling heading ends the previous heading's section.
+            self._headings = [capture for capture in self._headings if capture.depth != depth]
+            capture = _Capture(depth, in_main=self._main_depth is not None)
+            self._headings.append(capture)
+            self.candidates.append(capture)
+        elif tag == "div" and attrib.get("id") == "maincontent" and not self.saw_main:
+            self._main_depth = depth
+            self.saw_main = True
+
+        classes = (attrib.get("class") or "").split()
+        for name, element, css_class in (("abstr", "div", "abstr"), ("abstract", "section", "abstract"), ("history", "section", "history")):
+            if tag == element and css_class in classes and name not in self.blocks and name not in self._containers:
+                self._containers[name] = _Capture(depth)
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        self._depth -= 1
+        depth = self._depth
+        if self._skip_depth is not None:
+            if depth == self._skip_depth:
+                self._skip_depth = None
+                if self._json_ld is not None:
+                    self.json_ld.append("".join(self._json_ld))
+                    self._json_ld = None
+            return
+
+        if self._title is not None and depth == self._title.depth:
+            self.title_tag = "".join(self._title.parts)
+            self._title = None
+        for capture in list(self._headings):
+            if capture.heading is not None and capture.depth == depth:
+                self._close_heading(capture)
+        # The parent of a heading closed: its section ends here.
+        self._headings = [capture for capture in self._headings if capture.depth <= depth]
+        for name, capture in list(self._containers.items()):
+            if capture.depth == depth:
+                self.blocks[name] = " ".join(capture.parts)
+                del self._containers[name]
+        if self._main_depth == depth:
+            self._main_depth = None
+
+    def data(self, text: str) -> None:
+        self._pending.append(text)
+
+    def close(self) -> "ArticleTarget":
+        self._flush()
+        for name, capture in self._containers.items():
+            self.blocks.setdefault(name, " ".join(capture.parts))
+        self._containers.clear()
+        return self
+
+    # -- internals -----------------------------------------------------------------------
+
+    def _flush(self) -> None:
+        # lxml may split one text node over several ``data`` calls (entities,
+        # chunk boundaries); join them so the text matches BeautifulSoup's.
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        if self._skip_depth is not None:
+            if self._json_ld is not None:
+                self._json_ld.append(text)
+            return
+        stripped = text.strip()
+        if not stripped:
+            return
+        if self._title is not None:
+            self._title.parts.append(stripped)
+        for capture in self._headings:
+            (capture.heading if capture.heading is not None else capture.parts).append(stripped)
+        for capture in self._containers.values():
+            capture.parts.append(stripped)
+
+    def _close_heading(self, capture: _Capture) -> None:
+        heading = " ".join(capture.heading or [])
+        capture.heading = None
+        capture.sections = [
+            section for section, patterns in _LABEL_PATTERNS if heading and any(pattern.search(heading) for pattern in patterns)
+        ]
+        if not capture.sections:
+            self._headings.remove(capture)
+            self.candidates.remove(capture)
+
+    def _meta(self, attrib: Dict[str, str]) -> None:
+        name = attrib.get("name")
+        content = attrib.get("content")
+        if name == "citation_title" and self.title_meta is None:
+            self.title_meta = content or ""
+        elif name == "citation_author" and content:
+            self.authors.append(content.strip())
+        elif name == "citation_pdf_url" and self.pdf_url is None:
+            self.pdf_url = content or ""
+        key = (name or attrib.get("property") or "").strip().lower()
+        if key in YEAR_META_NAMES and content:
+            self.year_metas.append((key, content))
+
+    # -- results -------------------------------------------------------------------------
+
+    def sections(self) -> Dict[str, str]:
+        candidates = [capture for capture in self.candidates if capture.in_main or not self.saw_main]
+        sections: Dict[str, str] = {}
+        for section, _ in SECTION_LABELS:
+            sections[section] = ""
+            for capture in candidates:
+                if section in capture.sections and capture.parts:
+                    sections[section] = _normalise(" ".join(capture.parts))
+                    break
+        if not sections["abstract"]:
+            block = self.blocks.get("abstr") if "abstr" in self.blocks else self.blocks.get("abstract")
+            if block:
+                sections["abstract"] = _normalise(block)
+        return sections
+
+    def result(self, pmcid: str) -> ParsedArticle:
+        from pmc_ingest import canonical_pmc_url
+
+        year, year_source = resolve_year_from(self.year_metas, self.json_ld, self.blocks.get("history"))
+        if year:
+            logger.debug("Publication year %d for %s from %s", year, pmcid, year_source)
+        pmc_url = canonical_pmc_url(pmcid)
+        links = {"pmc_html": pmc_url}
+        if self.pdf_url:
+            links["pmc_pdf"] = self.pdf_url
+        title = self.title_meta if self.title_meta is not None else self.title_tag
+        meta = {"pmcid": pmcid, "title": title or "", "authors": self.authors, "year": year, "pmc_url": pmc_url}
+        return meta, links, self.sections()
+
+
+def extract_chunks(pmcid: str, chunks: Iterable[Union[str, bytes]], encoding: Optional[str] = None) -> ParsedArticle:
+    """Parse a page delivered as ``chunks`` (e.g. ``response.iter_content``)."""
+
+    target = ArticleTarget()
+    parser = etree.HTMLParser(target=target, encoding=encoding, remove_comments=True, no_network=True)
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+    parser.close()
+    return target.result(pmcid)
+
+
+def extract_html(pmcid: str, html: str) -> ParsedArticle:
+    return extract_chunks(pmcid, (html[start : start + CHUNK_SIZE] for start in range(0, len(html), CHUNK_SIZE)))
+
+
+def extract_file(pmcid: str, path: Path) -> ParsedArticle:
+    def chunks() -> Iterable[bytes]:
+        with path.open("rb") as handle:
+            while True:
+                chunk = handle.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    return extract_chunks(pmcid, chunks(), encoding="utf-8")
+
+
+def benchmark(raw_dir: Path, limit: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """Time both extractors over cached HTML and report peak traced memory."""
+
+    from pmc_ingest import parse_article
+
+    paths = sorted(raw_dir.glob("*.html"))[:limit]
+    pages = [(path.stem, path.read_text(encoding="utf-8", errors="ignore")) for path in paths]
+    report: Dict[str, Dict[str, float]] = {}
+    outputs: Dict[str, List[ParsedArticle]] = {}
+    for name, extract in (("soup", lambda pmcid, html: parse_article(pmcid, html)), ("streaming", extract_html)):
+        started = time.perf_counter()
+        outputs[name] = [extract(pmcid, html) for pmcid, html in pages]
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        peak = 0
+        for pmcid, html in pages:
+            tracemalloc.reset_peak()
+            extract(pmcid, html)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        report[name] = {
+            "pages": len(pages),
+            "seconds": round(elapsed, 3),
+            "mib_per_s": round(sum(len(html) for _, html in pages) / (1 << 20) / elapsed, 2) if elapsed else 0.0,
+            "peak_mib": round(peak / (1 << 20), 2),
+        }
+    report["streaming"]["identical"] = sum(a == b for a, b in zip(outputs["soup"], outputs["streaming"]))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the BeautifulSoup and streaming article extractors")
+    parser.add_argument("--raw-dir", type=Path, default=Path("data/raw_pmc"), help="Directory of cached raw HTML")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N pages")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity (use -vv for debug)")
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings and errors")
+    args = parser.parse_args()
+
+    from pmc_ingest import configure_logging
+
+    configure_logging(args.verbose, args.quiet)
+    report = benchmark(args.raw_dir, args.limit)
+    for name, stats in report.items():
+        print(
+            f"{name:<10} {stats['pages']:>4} pages  {stats['seconds']:>7}s  {stats['mib_per_s']:>7} MiB/s  "
+            f"peak {stats['peak_mib']:>6} MiB" + (f"  identical {stats['identical']}" if "identical" in stats else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
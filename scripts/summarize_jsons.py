@@ -3,12 +3,18 @@
 
 from __future__ import annotations
 
+import argparse
 import json
 import os
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from openai import OpenAI, OpenAIError
+from llm_backends import BACKENDS, Completion, CompletionRequest, LLMBackend, OpenAIBackend, create_backend
+from dossier_index import DossierIndex
+from dossier_schema import save_dossier
+from llm_control import BackendController, BackendUnavailable, RetryQueue
+from prompt_budget import UsageLedger, budget_sections
+from run_metrics import METRICS, MetricsExporter
 
 
 def log(message: str) -> None:
@@ -38,9 +44,14 @@ TEMPERATURE = 0.4
 PRIMARY_MODEL = "gpt-4o-mini"
 FALLBACK_MODEL = "gpt-3.5-turbo"
 MAX_BATCH = 608
+MAX_RETRY_ATTEMPTS = 3
+# Dossiers per complete_batch call, as a multiple of the backend's concurrency:
+# enough to keep every slot busy while the slowest request of a batch finishes.
+BATCH_FACTOR = 4
 
 
 AI_SUMMARY_KEY = "ai_summary"
+INDEX_FILENAME = "dossier_index.json"
 
 
 def load_json(path: Path) -> Dict:
@@ -49,16 +60,7 @@ def load_json(path: Path) -> Dict:
 
 
 def save_json(path: Path, data: Dict) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        f.write("\n")
-
-
-def load_log(log_path: Path) -> set[str]:
-    if not log_path.exists():
-        return set()
-    with log_path.open("r", encoding="utf-8") as f:
-        return {line.strip() for line in f if line.strip()}
+    save_dossier(path, data)
 
 
 def append_log(log_path: Path, filenames: Iterable[str]) -> None:
@@ -94,29 +96,16 @@ def word_count(text: str) -> int:
     return len(text.split()) if text else 0
 
 
-SECTION_CHAR_LIMIT = 1200
-
-
-def trim_section(text: str, *, section_name: str, limit: int = SECTION_CHAR_LIMIT) -> str:
-    """Trim text to the configured character limit while warning if shortened."""
-
-    if not text:
-        return ""
-
-    stripped = text.strip()
-    if len(stripped) <= limit:
-        return stripped
-
-    truncated = stripped[:limit].rstrip()
-    last_space = truncated.rfind(" ")
-    if last_space > 0:
-        truncated = truncated[:last_space].rstrip()
-
-    log(
-        "Warning: %s section truncated from %d to %d characters."
-        % (section_name, len(stripped), len(truncated))
-    )
-    return f"{truncated}…"
+# Token budget shared by all section text in one summary prompt (the fixed
+# instructions and title/authors are not counted against it).
+PROMPT_TOKEN_BUDGET = 1500
+SECTION_PRIORITIES = {
+    "abstract": 3.0,
+    "results": 3.0,
+    "conclusion": 2.0,
+    "methods": 1.0,
+    "background": 1.0,
+}
 
 
 def compile_payload(data: Dict, *, log_label: str | None = None) -> Dict[str, str]:
@@ -167,81 +156,152 @@ def compile_payload(data: Dict, *, log_label: str | None = None) -> Dict[str, st
                 % (log_label, conclusion_fallback)
             )
 
-    conclusion_label = (
-        "conclusion"
-        if not conclusion_fallback
-        else f"{conclusion_fallback} (fallback for conclusion)"
+    raw_sections = {
+        "abstract": collect_section_text(sections, "abstract"),
+        "background": collect_section_text(sections, "introduction")
+        or collect_section_text(sections, "background")
+        or str(data.get("summary") or ""),
+        "methods": collect_section_text(sections, "methods"),
+        "results": collect_section_text(sections, "results"),
+        "conclusion": conclusion_raw,
+    }
+    budgeted, report = budget_sections(
+        raw_sections, PROMPT_TOKEN_BUDGET, SECTION_PRIORITIES, model=PRIMARY_MODEL
     )
+    if report.condensed and log_label:
+        log(
+            "%s sections condensed to fit %d-token budget (%d requested, %d used): %s"
+            % (
+                log_label,
+                report.budget,
+                report.requested,
+                report.used,
+                ", ".join(report.condensed),
+            )
+        )
 
     return {
         "title": data.get("title", ""),
         "authors": authors_text,
-        "abstract": trim_section(
-            collect_section_text(sections, "abstract"), section_name="abstract"
-        ),
-        "background": trim_section(
-            collect_section_text(sections, "introduction")
-            or collect_section_text(sections, "background")
-            or data.get("summary", ""),
-            section_name="background",
-        ),
-        "methods": trim_section(
-            collect_section_text(sections, "methods"), section_name="methods"
-        ),
-        "results": trim_section(
-            collect_section_text(sections, "results"), section_name="results"
-        ),
-        "conclusion": trim_section(conclusion_raw, section_name=conclusion_label),
+        **budgeted,
     }
 
 
-def request_summary(client: OpenAI, payload: Dict[str, str]) -> str:
-    prompt = PROMPT_TEMPLATE.format(**payload)
-    try:
-        response = client.chat.completions.create(
-            model=PRIMARY_MODEL,
-            temperature=TEMPERATURE,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        log(f"Primary model {PRIMARY_MODEL} succeeded.")
-        return response.choices[0].message.content.strip()
-    except OpenAIError as primary_error:
-        log(
-            "Primary model %s failed with %s. Attempting fallback %s."
-            % (PRIMARY_MODEL, primary_error, FALLBACK_MODEL)
-        )
+def summary_models(backend: LLMBackend) -> List[str]:
+    if isinstance(backend, OpenAIBackend):
+        return [PRIMARY_MODEL, FALLBACK_MODEL]
+    return [backend.model]
+
+
+def summary_request(payload: Dict[str, str], model: str) -> CompletionRequest:
+    return CompletionRequest(PROMPT_TEMPLATE.format(**payload), temperature=TEMPERATURE, model=model)
+
+
+def request_summary(
+    backend: LLMBackend,
+    payload: Dict[str, str],
+    *,
+    ledger: UsageLedger | None = None,
+    label: str = "request",
+    controller: BackendController | None = None,
+    first: Union[Completion, Exception, None] = None,
+) -> str:
+    """Summarise ``payload``, falling back to ``FALLBACK_MODEL`` on OpenAI errors.
+
+    Both attempts go through ``controller``; once its circuit opens this raises
+    :class:`BackendUnavailable` immediately instead of trying either model.
+    Self-hosted backends serve a single model, so they get one attempt.
+    ``first`` is the outcome of the primary attempt when it already ran as
+    part of a batch (see :func:`summarize_batch`).
+    """
+
+    controller = controller or backend.make_controller()
+    models = summary_models(backend)
+
+    errors: List[str] = []
+    for attempt, model in enumerate(models):
         try:
-            response = client.chat.completions.create(
-                model=FALLBACK_MODEL,
-                temperature=TEMPERATURE,
-                messages=[{"role": "user", "content": prompt}],
+            if attempt == 0 and first is not None:
+                if isinstance(first, Exception):
+                    raise first
+                completion = first
+            else:
+                completion = controller.call(backend.complete, summary_request(payload, model))
+        except BackendUnavailable:
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(f"{model} failed with: {exc}")
+            if attempt + 1 < len(models):
+                log(
+                    "Primary model %s failed with %s. Attempting fallback %s."
+                    % (model, exc, models[attempt + 1])
+                )
+                continue
+            raise RuntimeError(". ".join(errors)) from exc
+        role = "Primary" if attempt == 0 else "Fallback"
+        log(f"{role} model {model} succeeded.")
+        if ledger is not None:
+            log(
+                ledger.record(
+                    label,
+                    completion.model,
+                    completion.prompt_tokens,
+                    completion.completion_tokens,
+                )
             )
-            log(f"Fallback model {FALLBACK_MODEL} succeeded.")
-            return response.choices[0].message.content.strip()
-        except OpenAIError as fallback_error:
-            raise RuntimeError(
-                f"Primary model failed with: {primary_error}. Fallback failed with: {fallback_error}"
-            ) from fallback_error
+        return completion.text
+    raise RuntimeError("No model available for summarization")
 
 
-def process_file(path: Path, data: Dict, client: OpenAI) -> bool:
-    if AI_SUMMARY_KEY in data:
-        log(f"Skipping {path.name} (already contains {AI_SUMMARY_KEY})")
-        return False
-
+def prepare_payload(path: Path, data: Dict) -> Dict[str, str]:
     payload = compile_payload(data, log_label=path.name)
-
     missing_sections = [key for key, value in payload.items() if not value]
     if missing_sections:
         log(
             "Warning: %s missing sections for prompt: %s"
             % (path.name, ", ".join(sorted(missing_sections)))
         )
+    return payload
+
+
+def process_file(
+    path: Path,
+    data: Dict,
+    backend: LLMBackend,
+    ledger: UsageLedger | None = None,
+    controller: BackendController | None = None,
+    retry_queue: RetryQueue | None = None,
+    *,
+    force: bool = False,
+    payload: Optional[Dict[str, str]] = None,
+    first: Union[Completion, Exception, None] = None,
+) -> bool:
+    """Summarise one dossier; ``force`` regenerates an existing ``ai_summary``.
+
+    ``payload`` and ``first`` carry the prompt payload and primary-model
+    outcome when the request was already sent by :func:`summarize_batch`.
+    """
+
+    if AI_SUMMARY_KEY in data and not force:
+        log(f"Skipping {path.name} (already contains {AI_SUMMARY_KEY})")
+        return False
+
+    if payload is None:
+        payload = prepare_payload(path, data)
 
     try:
-        summary = request_summary(client, payload)
+        summary = request_summary(
+            backend, payload, ledger=ledger, label=path.name, controller=controller, first=first
+        )
+    except BackendUnavailable as exc:
+        log(f"Deferring {path.name}: {exc}")
+        if retry_queue is not None:
+            retry_queue.push(path.name, (path, data))
+        return False
     except Exception as exc:  # pylint: disable=broad-except
         log(f"Error summarizing {path}: {exc}")
+        if retry_queue is not None and retry_queue.push(path.name, (path, data)):
+            log(f"Queued {path.name} for retry later in this run.")
         return False
 
     summary_words = word_count(summary)
@@ -269,6 +329,45 @@ def process_file(path: Path, data: Dict, client: OpenAI) -> bool:
     return True
 
 
+def summarize_batch(
+    items: Sequence[Tuple[Path, Dict, bool]],
+    backend: LLMBackend,
+    ledger: UsageLedger | None = None,
+    controller: BackendController | None = None,
+    retry_queue: RetryQueue | None = None,
+) -> List[bool]:
+    """Summarise several ``(path, data, force)`` dossiers with one batch request.
+
+    The primary-model requests go out together through
+    :meth:`LLMBackend.complete_batch`; each result is then finished by
+    :func:`process_file`, which handles the fallback model, deferral and saving
+    exactly as for a single dossier.
+    """
+
+    controller = controller or backend.make_controller()
+    model = summary_models(backend)[0]
+    payloads: List[Optional[Dict[str, str]]] = []
+    requests: List[CompletionRequest] = []
+    for path, data, force in items:
+        if AI_SUMMARY_KEY in data and not force:
+            payloads.append(None)
+            continue
+        payload = prepare_payload(path, data)
+        payloads.append(payload)
+        requests.append(summary_request(payload, model))
+
+    results = iter(backend.complete_batch(requests, controller))
+    outcomes = []
+    for (path, data, force), payload in zip(items, payloads):
+        first = next(results) if payload is not None else None
+        outcomes.append(
+            process_file(
+                path, data, backend, ledger, controller, retry_queue, force=force, payload=payload, first=first
+            )
+        )
+    return outcomes
+
+
 def resolve_data_dir(repo_root: Path) -> Path:
     """Locate the directory that holds JSON dossiers."""
 
@@ -288,7 +387,48 @@ def resolve_data_dir(repo_root: Path) -> Path:
     )
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--llm-backend",
+        choices=BACKENDS,
+        default="openai",
+        help="LLM provider: hosted OpenAI, a self-hosted OpenAI-compatible server, or the offline fake",
+    )
+    parser.add_argument(
+        "--llm-base-url",
+        default=None,
+        help="Base URL for --llm-backend openai-compatible (default: $LLM_BASE_URL or http://localhost:8080/v1)",
+    )
+    parser.add_argument(
+        "--llm-model",
+        default=None,
+        help="Model served by a self-hosted backend (OpenAI uses %s with %s as fallback)"
+        % (PRIMARY_MODEL, FALLBACK_MODEL),
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=None,
+        help="Maximum concurrent LLM requests for the selected backend",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live Prometheus metrics on 127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        default=None,
+        help="Rewrite Prometheus metrics to this file every few seconds",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
     repo_root = Path(__file__).resolve().parent.parent
     log_path = repo_root / "summarized.log"
 
@@ -302,20 +442,37 @@ def main() -> None:
 
     log(f"Using data directory: {data_dir}")
 
-    processed_log = load_log(log_path)
-    files = sorted(data_dir.glob("*.json"))
+    index = DossierIndex(data_dir.parent / INDEX_FILENAME, data_dir)
+    for name in index.refresh():
+        log(f"Error reading {data_dir / name}: skipped")
+    log(
+        "Dossier index: %d tracked, %d re-read since last run."
+        % (len(index.entries), index.reread)
+    )
 
-    if not files:
-        log("No JSON files found to summarize. Nothing to do.")
+    if not index.pending():
+        index.save()
+        log("No JSON files need a summary. Nothing to do.")
         return
 
-    log("Checking OPENAI_API_KEY...")
-    _ = ensure_api_key()
-    log("OPENAI_API_KEY found. Initializing OpenAI client.")
-    client = OpenAI()
+    if args.llm_backend == "openai":
+        log("Checking OPENAI_API_KEY...")
+        _ = ensure_api_key()
+        log("OPENAI_API_KEY found. Initializing OpenAI client.")
+    else:
+        log(f"Initializing {args.llm_backend} backend.")
+    backend = create_backend(
+        args.llm_backend,
+        PRIMARY_MODEL if args.llm_backend == "openai" else args.llm_model,
+        base_url=args.llm_base_url,
+        max_concurrency=args.llm_concurrency,
+    )
 
     processed_files: List[str] = []
     updates = 0
+    ledger = UsageLedger()
+    controller = backend.make_controller()
+    retry_queue: RetryQueue = RetryQueue(max_attempts=MAX_RETRY_ATTEMPTS)
 
     if MAX_BATCH:
         log(
@@ -325,34 +482,75 @@ def main() -> None:
     else:
         log("Batch cap disabled: will attempt to summarize all available files this run.")
 
-    for json_path in files:
-        if MAX_BATCH and updates >= MAX_BATCH:
+    pending: List[tuple[Path, Dict, str, bool]] = []
+    for name, status in index.pending():
+        if MAX_BATCH and len(pending) >= MAX_BATCH:
             log(
                 "Reached MAX_BATCH=%d limit; remaining files will be processed in a "
                 "future run." % MAX_BATCH
             )
             break
+        json_path = data_dir / name
         rel_name = json_path.relative_to(repo_root).as_posix()
-        if rel_name in processed_log:
-            log(f"Skipping {rel_name} (already listed in summarized.log)")
-            continue
-
-        if not json_path.is_file():
-            log(f"Skipping {rel_name} (not a regular file)")
-            continue
-
         try:
             data = load_json(json_path)
         except Exception as exc:  # pylint: disable=broad-except
             log(f"Error reading {json_path}: {exc}")
             continue
-
-        log(f"Summarizing {rel_name}")
-        if process_file(json_path, data, client):
-            processed_files.append(rel_name)
-            updates += 1
-
+        stale = status == "stale"
+        if stale:
+            log(f"{rel_name} sections changed since it was summarized; regenerating.")
+        pending.append((json_path, data, rel_name, stale))
+
+    if args.metrics_port is not None or args.metrics_textfile is not None:
+        log("Exporting run metrics (port=%s, textfile=%s)." % (args.metrics_port, args.metrics_textfile))
+    exporter = MetricsExporter(port=args.metrics_port, textfile=args.metrics_textfile)
+    METRICS.start_run("summarize", len(pending))
+    with exporter:
+        # complete_batch runs up to the backend's concurrency at once; the AIMD
+        # window in ``controller`` decides how many are actually in flight.
+        rel_names = {path.name: rel_name for path, _, rel_name, _ in pending}
+        batch_size = backend.max_concurrency * BATCH_FACTOR
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            log(
+                "Summarizing %s" % ", ".join(rel_name for _, _, rel_name, _ in batch)
+            )
+            outcomes = summarize_batch(
+                [(json_path, data, stale) for json_path, data, _, stale in batch],
+                backend,
+                ledger,
+                controller,
+                retry_queue,
+            )
+            for (json_path, data, rel_name, _), done in zip(batch, outcomes):
+                if done:
+                    index.mark_summarized(json_path, data)
+                    processed_files.append(rel_name)
+                    updates += 1
+                    METRICS.row_done("summarize")
+                else:
+                    METRICS.row_done("summarize", "deferred")
+
+        if len(retry_queue):
+            log(f"Retrying {len(retry_queue)} deferred file(s).")
+            METRICS.start_run("summarize", len(retry_queue))
+        for name, (json_path, data) in retry_queue.drain(controller):
+            log(f"Retrying {rel_names[name]}")
+            if process_file(
+                json_path, data, backend, ledger, controller, retry_queue, force=True
+            ):
+                index.mark_summarized(json_path, data)
+                processed_files.append(rel_names[name])
+                updates += 1
+                METRICS.row_done("summarize")
+            else:
+                METRICS.row_done("summarize", "deferred")
+
+    index.save()
     append_log(log_path, processed_files)
+    if ledger.requests:
+        log(f"Token usage this run: {ledger.summary()}")
     if updates:
         log(
             "✅ Summarization complete. %d file(s) updated. Latest output in %s"
@@ -0,0 +1,41 @@
+import { withBase } from './paths';
+
+/**
+ * Mapping written by `scripts/public_assets.py` from logical data files to content-hashed copies.
+ */
+export type AssetManifest = {
+  version: number;
+  index: string;
+  papers: Record<string, string>;
+};
+
+let manifestPromise: Promise<AssetManifest | null> | null = null;
+
+/**
+ * Load `data/manifest.json` once per page. Resolves to `null` when the deploy has no manifest,
+ * in which case callers fall back to the unhashed file names.
+ */
+export const loadAssetManifest = () => {
+  manifestPromise ??= fetch(withBase('data/manifest.json'), { cache: 'no-cache' })
+    .then((response) => (response.ok ? (response.json() as Promise<AssetManifest>) : null))
+    .catch(() => null);
+  return manifestPromise;
+};
+
+export const indexAssetPath = async () => {
+  const manifest = await loadAssetManifest();
+  return manifest ? `data/${manifest.index}` : 'data/index.json';
+};
+
+/** Unhashed path of a paper's detail file, used when the deploy has no manifest entry for it. */
+export const plainPaperPath = (id: string) => `data/papers/${id}.json`;
+
+/**
+ * Path of a paper's detail file. The hashed name changes only when the paper's content does,
+ * so it doubles as a version tag for the offline copy.
+ */
+export const paperAssetPath = async (id: string) => {
+  const manifest = await loadAssetManifest();
+  const hashed = manifest?.papers[id];
+  return hashed ? `data/${hashed}` : plainPaperPath(id);
+};
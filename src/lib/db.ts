@@ -5,6 +5,8 @@ export type PaperRecord = PaperIndex & {
   sections?: PaperDetail['sections'];
   links?: PaperDetail['links'];
   ai_summary?: string;
+  /** Data path the detail was fetched from; hashed paths change when the paper does. */
+  asset?: string;
   cachedAt?: number;
 };
 
@@ -134,15 +136,15 @@ export const seedIndex = async (items: PaperIndex[]) => {
   });
 };
 
-export const upsertPaperDetail = async (detail: PaperDetail) => {
+export const upsertPaperDetail = async (detail: PaperDetail, asset?: string) => {
   if (db) {
     const database = db;
     const existing = await database.papers.get(detail.id);
-    await database.papers.put({ ...existing, ...detail, cachedAt: Date.now() });
+    await database.papers.put({ ...existing, ...detail, asset, cachedAt: Date.now() });
     return;
   }
 
-  writeToMemory(detail, { refreshCachedAt: true });
+  writeToMemory({ ...detail, asset }, { refreshCachedAt: true });
 };
 
 export const getPaperFromCache = (id: string) => {
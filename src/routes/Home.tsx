@@ -14,10 +14,11 @@ import ActiveFiltersBar from '../components/ActiveFiltersBar';
 import { useSearchStore } from '../lib/state';
 import { buildIndex, runSearch, getCachedRecords } from '../lib/search';
 import { withBase } from '../lib/paths';
+import { indexAssetPath } from '../lib/assets';
 import { FuiBadge, FuiCallout, FuiConnectorLayer, HudDivider } from '@/components/fui';
 
 const fetchIndex = async (): Promise<PaperIndex[]> => {
-  const response = await fetch(withBase('data/index.json'));
+  const response = await fetch(withBase(await indexAssetPath()));
   if (!response.ok) throw new Error('Failed to load index');
   return response.json();
 };
@@ -15,6 +15,7 @@ import { getPaperFromCache, upsertPaperDetail } from '../lib/db';
 import type { PaperDetail } from '../lib/types';
 import { createFallbackPaper } from '../lib/fallback';
 import { withBase } from '../lib/paths';
+import { paperAssetPath, plainPaperPath } from '../lib/assets';
 
 type PaperQueryResult = {
   paper: PaperDetail;
@@ -22,20 +23,30 @@ type PaperQueryResult = {
 };
 
 const fetchPaper = async (id: string): Promise<PaperQueryResult> => {
-  const cached = await getPaperFromCache(id);
-  if (cached && cached.sections && cached.links) {
+  const [cached, asset] = await Promise.all([getPaperFromCache(id), paperAssetPath(id)]);
+  // Copies cached before hashed assets existed carry no `asset`; they are only current while
+  // the deploy still serves the unhashed file.
+  const current = cached?.asset ? cached.asset === asset : asset === plainPaperPath(id);
+  const usable = Boolean(cached && cached.sections && cached.links);
+  if (usable && current) {
     return { paper: cached as PaperDetail, isFallback: false };
   }
 
   try {
-    const response = await fetch(withBase(`data/papers/${id}.json`));
+    const response = await fetch(withBase(asset));
     if (!response.ok) {
       throw new Error(`Failed to fetch dossier: ${response.status}`);
     }
     const data = (await response.json()) as PaperDetail;
-    await upsertPaperDetail(data);
+    await upsertPaperDetail(data, asset);
     return { paper: data, isFallback: false };
   } catch (error) {
+    // Offline (no manifest) or mid-deploy: an older complete copy beats the stub.
+    if (usable) {
+      // eslint-disable-next-line no-console
+      console.warn('[Archive] dossier refresh failed, serving cached copy.', error);
+      return { paper: cached as PaperDetail, isFallback: false };
+    }
     // eslint-disable-next-line no-console
     console.warn('[Archive] dossier retrieval failed, supplying fallback stub.', error);
     return { paper: createFallbackPaper(id), isFallback: true };
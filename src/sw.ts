@@ -1,8 +1,9 @@
 /// <reference lib="WebWorker" />
 
 import { precacheAndRoute } from 'workbox-precaching';
+import { ExpirationPlugin } from 'workbox-expiration';
 import { registerRoute } from 'workbox-routing';
-import { StaleWhileRevalidate } from 'workbox-strategies';
+import { CacheFirst, NetworkFirst, StaleWhileRevalidate } from 'workbox-strategies';
 import { withBase } from './lib/paths';
 
 declare let self: ServiceWorkerGlobalScope & { __WB_MANIFEST: Array<any> };
@@ -11,6 +12,31 @@ precacheAndRoute(self.__WB_MANIFEST);
 
 const dataPrefix = new URL(withBase('data/'), self.registration.scope).pathname;
 
+// Content-hashed copies written by scripts/public_assets.py never change under the same name.
+const hashedDataAsset = /\.[0-9a-f]{12}\.json$/;
+
+registerRoute(
+  ({ url }) => url.pathname.startsWith(dataPrefix) && hashedDataAsset.test(url.pathname),
+  new CacheFirst({
+    cacheName: 'bio-data-immutable',
+    // Every deploy adds new hashed names; evict superseded copies instead of growing forever.
+    plugins: [
+      new ExpirationPlugin({
+        maxEntries: 1500,
+        maxAgeSeconds: 60 * 24 * 60 * 60,
+        purgeOnQuotaError: true
+      })
+    ]
+  })
+);
+
+registerRoute(
+  ({ url }) => url.pathname === `${dataPrefix}manifest.json`,
+  new NetworkFirst({
+    cacheName: 'bio-data-manifest'
+  })
+);
+
 registerRoute(
   ({ url }) => url.pathname.startsWith(dataPrefix),
   new StaleWhileRevalidate({